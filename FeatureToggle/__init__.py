@@ -1,23 +1,145 @@
 # Python Imports
 
 from redis.exceptions import LockError, BusyLoadingError, ConnectionError, RedisError
-import pickle
-from typing import Dict, Any, Optional
+from typing import Dict, Any, FrozenSet, List, Optional, Set, Tuple
 
 # Unleash Imports
-from UnleashClient import constants as consts
+from UnleashClient import constants as consts, serialization
 from UnleashClient import UnleashClient
 from UnleashClient.utils import LOGGER
-from FeatureToggle.utils import timed_lru_cache
+from UnleashClient.instrumentation import LookupStats
+from UnleashClient.subscriber import ProvisioningSubscriber
+from UnleashClient.loader import store_provisioning, read_provisioning_version, read_provisioning_shard
+from FeatureToggle.utils import versioned_cache
 from FeatureToggle.redis_utils import RedisConnector
 
 
+# Strategy name => key of the parameter holding its comma separated values.
+# The parsed values are returned under the same key by fetch_feature_toggles.
+# Keep updating this mapping for new strategies which gets added
+TOGGLE_STRATEGY_PARAMETERS = {
+    'EnableForPartners': 'partner_names',
+    'EnableForBusinesses': 'business_via_names',
+    'EnableForDomains': 'domain_names',
+    'EnableForExperts': 'expert_emails',
+    'EnableForTeams': 'team_ids',
+}
+
+
 def split_and_strip(parameters: str):
     return [
         x.strip() for x in parameters.split(',')
     ]
 
 
+def parse_feature_toggles(feature_toggles: list,
+                          cas_name: str,
+                          environment: str) -> Dict[str, Dict[str, FrozenSet[str]]]:
+    """
+    Extracts the toggles of one cas and environment from the raw feature provisioning
+    Args:
+        feature_toggles(list): Features as stored in Redis by update_cache
+        cas_name(str): CAS name to keep features for
+        environment(str): Environment to keep features for
+    Returns:
+        (dict): Feature name without cas and environment => parameter key => frozenset of values
+    """
+    response = {}  # type: Dict[str, Dict[str, FrozenSet[str]]]
+
+    active_cas_env_name = f'{cas_name}.{environment}'
+
+    for feature_toggle in feature_toggles or []:
+        cas_env_name, feature_name = _split_feature_name(feature_toggle['name'])
+
+        if cas_env_name == active_cas_env_name:
+            response[feature_name] = _parse_toggle(feature_toggle)
+
+    return response
+
+
+def _split_feature_name(full_feature_name: str) -> Tuple[Optional[str], str]:
+    """
+    Splits "<cas>.<env>.<feature name>" into "<cas>.<env>" and the feature name, which may contain dots
+    Returns:
+        (tuple): CAS and environment name (None if the name has neither) and feature name
+    """
+    feature = full_feature_name.split('.', 2)
+
+    if len(feature) > 2:
+        return f'{feature[0]}.{feature[1]}', feature[2]
+    return None, full_feature_name
+
+
+def _parse_toggle(feature_toggle: dict) -> Dict[str, FrozenSet[str]]:
+    # Define empty set for empty values
+    toggle = {key: frozenset() for key in TOGGLE_STRATEGY_PARAMETERS.values()}  # type: Dict[str, FrozenSet[str]]
+    for strategy in feature_toggle.get('strategies', []):
+        key = TOGGLE_STRATEGY_PARAMETERS.get(strategy.get('name', ''))
+        if key:
+            toggle[key] = frozenset(split_and_strip(strategy.get('parameters', {}).get(key, '')))
+
+    return toggle
+
+
+def compile_feature_toggles(feature_toggles: list) -> Dict[str, Dict[str, Dict[str, List[str]]]]:
+    """
+    Parses the toggles of every cas and environment at once, so update_cache can store them ready to use
+    Args:
+        feature_toggles(list): Features as stored in Redis by update_cache
+    Returns:
+        (dict): "<cas>.<env>" => feature name without cas and environment => parameter key => sorted list of values
+    """
+    response = {}  # type: Dict[str, Dict[str, Dict[str, List[str]]]]
+
+    for feature_toggle in feature_toggles or []:
+        cas_env_name, feature_name = _split_feature_name(feature_toggle['name'])
+
+        if cas_env_name is not None:
+            toggle = _parse_toggle(feature_toggle)
+            response.setdefault(cas_env_name, {})[feature_name] = {
+                key: sorted(values) for key, values in toggle.items()
+            }
+
+    return response
+
+
+def load_compiled_feature_toggles(
+        compiled_toggles: Dict[str, Dict[str, List[str]]]) -> Dict[str, Dict[str, FrozenSet[str]]]:
+    """
+    Turns the toggles of one cas and environment stored by update_cache into the output of parse_feature_toggles
+    """
+    return {
+        feature_name: {key: frozenset(values) for key, values in toggle.items()}
+        for feature_name, toggle in compiled_toggles.items()
+    }
+
+
+class FeatureToggleIndex:
+    """
+    Inverted index over parsed feature toggles: parameter key => value => names of the features enabled for it
+    """
+    def __init__(self, feature_toggles: Dict[str, Dict[str, FrozenSet[str]]]) -> None:
+        self.feature_toggles = feature_toggles
+
+        index = {key: {} for key in TOGGLE_STRATEGY_PARAMETERS.values()}  # type: Dict[str, Dict[str, Set[str]]]
+        for feature_name, toggle in feature_toggles.items():
+            for key, values in toggle.items():
+                entity_index = index.setdefault(key, {})
+                for value in values:
+                    entity_index.setdefault(value, set()).add(feature_name)
+
+        self.index = {
+            key: {value: frozenset(feature_names) for value, feature_names in entity_index.items()}
+            for key, entity_index in index.items()
+        }  # type: Dict[str, Dict[str, FrozenSet[str]]]
+
+    def features_for(self, key: str, value: Any) -> FrozenSet[str]:
+        """
+        Returns the names of the features enabled for value of the given parameter key
+        """
+        return self.index.get(key, {}).get(value, frozenset())
+
+
 class FeatureToggles:
     __client = None
     __url = None
@@ -35,6 +157,21 @@ class FeatureToggles:
     __sentinel_service_name = None
     __redis_auth_enabled = False
     __redis_password = None
+    __redis_client_tracking = False
+    __sentinel_read_from_replicas = False
+    __redis_pool_options = None  # type: Optional[dict]
+    __disable_metrics = True
+    __metrics_aggregation = False
+    __read_cache = None
+    __provisioning_codec = consts.PROVISIONING_CODEC
+    __provisioning_allow_pickle = True
+    __push_updates = False
+    __revalidate_interval = consts.FEATURE_TOGGLES_REVALIDATE_INTERVAL
+    __push_revalidate_interval = consts.FEATURES_PUSH_REFRESH_INTERVAL
+    __subscriber = None  # type: Optional[ProvisioningSubscriber]
+    __toggle_index = None  # type: Optional[FeatureToggleIndex]
+    # Counts is_enabled_for_* calls; set lookup_stats.debug_sample_rate to log a sample of them at DEBUG
+    lookup_stats = LookupStats()
 
     @staticmethod
     def initialize(url: str,
@@ -50,7 +187,17 @@ class FeatureToggles:
                    sentinels: Optional[list] = None,
                    sentinel_service_name: Optional[str] = None,
                    redis_auth_enabled: bool = False,
-                   redis_password: Optional[str] = None
+                   redis_password: Optional[str] = None,
+                   revalidate_interval: int = consts.FEATURE_TOGGLES_REVALIDATE_INTERVAL,
+                   provisioning_codec: str = consts.PROVISIONING_CODEC,
+                   push_updates: bool = False,
+                   push_revalidate_interval: int = consts.FEATURES_PUSH_REFRESH_INTERVAL,
+                   redis_client_tracking: bool = False,
+                   sentinel_read_from_replicas: bool = False,
+                   redis_pool_options: Optional[dict] = None,
+                   disable_metrics: bool = True,
+                   metrics_aggregation: bool = False,
+                   provisioning_allow_pickle: bool = True
                    ) -> None:
         """ Static access method. """
         if FeatureToggles.__client is None:
@@ -68,7 +215,27 @@ class FeatureToggles:
             FeatureToggles.__sentinel_service_name = sentinel_service_name
             FeatureToggles.__redis_auth_enabled = redis_auth_enabled
             FeatureToggles.__redis_password = redis_password
+            FeatureToggles.__redis_client_tracking = redis_client_tracking
+            FeatureToggles.__sentinel_read_from_replicas = sentinel_enabled and sentinel_read_from_replicas
+            FeatureToggles.__redis_pool_options = redis_pool_options
+            FeatureToggles.__disable_metrics = disable_metrics
+            FeatureToggles.__metrics_aggregation = metrics_aggregation
+            FeatureToggles.__provisioning_codec = serialization.get_codec(provisioning_codec).name
+            FeatureToggles.__provisioning_allow_pickle = provisioning_allow_pickle
             FeatureToggles.__cache = FeatureToggles.__get_cache()
+            FeatureToggles.__read_cache = FeatureToggles.__get_read_cache()
+            FeatureToggles.fetch_feature_toggles.revalidate_seconds = revalidate_interval
+            FeatureToggles.__revalidate_interval = revalidate_interval
+            FeatureToggles.__push_revalidate_interval = push_revalidate_interval
+            FeatureToggles.__push_updates = push_updates
+            if push_updates:
+                FeatureToggles.__subscriber = ProvisioningSubscriber(
+                    FeatureToggles.__get_subscriber_cache(),
+                    on_update=FeatureToggles.__on_features_update,
+                    on_subscribe=FeatureToggles.__on_features_subscribe,
+                    on_unsubscribe=FeatureToggles.__on_features_unsubscribe
+                )
+                FeatureToggles.__subscriber.start()
             LOGGER.info(f'Initializing Feature toggles')
         else:
             raise Exception("Client has been already initialized")
@@ -79,25 +246,56 @@ class FeatureToggles:
         Create redis connection
         """
         if FeatureToggles.__cache is None:
-            if FeatureToggles.__sentinel_enabled:
-                FeatureToggles.__cache = RedisConnector.get_sentinel_connection(
-                    FeatureToggles.__sentinels, FeatureToggles.__sentinel_service_name, FeatureToggles.__redis_db,
-                    FeatureToggles.__redis_auth_enabled, FeatureToggles.__redis_password
+            # Only the reads are worth caching
+            client_tracking = FeatureToggles.__redis_client_tracking and not FeatureToggles.__sentinel_read_from_replicas
+            FeatureToggles.__cache = FeatureToggles.__get_connection(client_tracking, read_from_replicas=False)
+
+        return FeatureToggles.__cache
+
+    @staticmethod
+    def __get_read_cache():
+        """
+        Create redis connection for reads, to the sentinel replicas if enabled and else the same as __get_cache
+        """
+        if FeatureToggles.__read_cache is None:
+            if FeatureToggles.__sentinel_read_from_replicas:
+                FeatureToggles.__read_cache = FeatureToggles.__get_connection(
+                    client_tracking=FeatureToggles.__redis_client_tracking, read_from_replicas=True
                 )
             else:
-                FeatureToggles.__cache = RedisConnector.get_non_sentinel_connection(
-                    FeatureToggles.__redis_host, FeatureToggles.__redis_port, FeatureToggles.__redis_db,
-                    FeatureToggles.__redis_auth_enabled, FeatureToggles.__redis_password
-                )
+                return FeatureToggles.__cache
 
-        return FeatureToggles.__cache
+        return FeatureToggles.__read_cache
+
+    @staticmethod
+    def __get_subscriber_cache():
+        """
+        Create redis connection for provisioning updates, without a socket timeout as it blocks until one is published
+        """
+        return FeatureToggles.__get_connection(
+            client_tracking=False, read_from_replicas=FeatureToggles.__sentinel_read_from_replicas,
+            pool_options={**(FeatureToggles.__redis_pool_options or {}), **consts.REDIS_SUBSCRIBER_POOL_OPTIONS}
+        )
 
     @staticmethod
-    def update_cache(data: Dict[str, Any]) -> None:
+    def __get_connection(client_tracking: bool, read_from_replicas: bool, pool_options: Optional[dict] = None):
+        """
+        Returns the process-wide connection for the initialised parameters, also used by UnleashClient
+        """
+        return RedisConnector.get_connection(
+            FeatureToggles.__redis_host, FeatureToggles.__redis_port, FeatureToggles.__redis_db,
+            FeatureToggles.__redis_auth_enabled, FeatureToggles.__redis_password,
+            FeatureToggles.__sentinel_enabled, FeatureToggles.__sentinels, FeatureToggles.__sentinel_service_name,
+            client_tracking, read_from_replicas,
+            FeatureToggles.__redis_pool_options if pool_options is None else pool_options
+        )
+
+    @staticmethod
+    def update_cache(data: List[Dict[str, Any]]) -> None:
         """
         Update cache data
         Args:
-            data(dict): Feature toggles Data
+            data(list): Feature toggles Data
         Returns:
             None
         """
@@ -108,9 +306,11 @@ class FeatureToggles:
 
         LOGGER.info(f'Updating the cache data: {data}')
         try:
-            FeatureToggles.__cache.set(
-                consts.FEATURES_URL, pickle.dumps(data)
-            )
+            shards = {
+                consts.FEATURE_TOGGLES_SHARD_KEY.format(cas_env_name): compiled_toggles
+                for cas_env_name, compiled_toggles in compile_feature_toggles(data).items()
+            }
+            store_provisioning(FeatureToggles.__cache, data, FeatureToggles.__provisioning_codec, shards)
         except (LockError, BusyLoadingError, ConnectionError, RedisError) as redis_err:
             error_msg = f'Redis Exception occurred while updating the redis cache: {str(redis_err)}'
             LOGGER.info(error_msg)
@@ -121,6 +321,25 @@ class FeatureToggles:
             raise Exception(error_msg)
         LOGGER.info(f'[Feature Toggles] Cache Updated')
 
+    @staticmethod
+    def __on_features_update(version: Optional[str] = None) -> None:
+        """
+        Reloads the feature toggles in the subscriber thread, or in the thread already revalidating them, callers keep
+        being served the cached ones meanwhile
+        """
+        FeatureToggles.fetch_feature_toggles.invalidate()
+        FeatureToggles.fetch_feature_toggles()
+
+    @staticmethod
+    def __on_features_subscribe() -> None:
+        FeatureToggles.fetch_feature_toggles.revalidate_seconds = FeatureToggles.__push_revalidate_interval
+        # Catch up with updates published while not subscribed
+        FeatureToggles.__on_features_update()
+
+    @staticmethod
+    def __on_features_unsubscribe() -> None:
+        FeatureToggles.fetch_feature_toggles.revalidate_seconds = FeatureToggles.__revalidate_interval
+
     @staticmethod
     def __get_unleash_client():
         """
@@ -140,7 +359,14 @@ class FeatureToggles:
                 sentinels=FeatureToggles.__sentinels,
                 sentinel_service_name= FeatureToggles.__sentinel_service_name,
                 redis_auth_enabled=FeatureToggles.__redis_auth_enabled,
-                redis_password=FeatureToggles.__redis_password
+                redis_password=FeatureToggles.__redis_password,
+                sentinel_read_from_replicas=FeatureToggles.__sentinel_read_from_replicas,
+                push_updates=FeatureToggles.__push_updates,
+                redis_client_tracking=FeatureToggles.__redis_client_tracking,
+                redis_pool_options=FeatureToggles.__redis_pool_options,
+                disable_metrics=FeatureToggles.__disable_metrics,
+                metrics_aggregation=FeatureToggles.__metrics_aggregation,
+                provisioning_allow_pickle=FeatureToggles.__provisioning_allow_pickle
             )
             FeatureToggles.__client.initialize_client()
 
@@ -180,9 +406,9 @@ class FeatureToggles:
             (bool): True if Feature is enabled else False
         """
         feature_toggles = FeatureToggles.fetch_feature_toggles()
-        LOGGER.info(f"Enable_for_domain_FT_cache_info: "
-                    f"{FeatureToggles.fetch_feature_toggles.__wrapped__.cache_info()}")
-        return domain_name in feature_toggles.get(feature_name, {}).get('domain_names', [])
+        enabled = domain_name in feature_toggles.get(feature_name, {}).get('domain_names', frozenset())
+        FeatureToggles.lookup_stats.record('is_enabled_for_domain', 'Enable_for_domain %s(%s): %s', feature_name, domain_name, enabled)
+        return enabled
 
     @staticmethod
     def is_enabled_for_partner(feature_name: str,
@@ -196,9 +422,9 @@ class FeatureToggles:
             (bool): True if Feature is enabled else False
         """
         feature_toggles = FeatureToggles.fetch_feature_toggles()
-        LOGGER.info(f"Enable_for_partner_FT_cache_info: "
-                    f"{FeatureToggles.fetch_feature_toggles.__wrapped__.cache_info()}")
-        return partner_name in feature_toggles.get(feature_name, {}).get('partner_names', [])
+        enabled = partner_name in feature_toggles.get(feature_name, {}).get('partner_names', frozenset())
+        FeatureToggles.lookup_stats.record('is_enabled_for_partner', 'Enable_for_partner %s(%s): %s', feature_name, partner_name, enabled)
+        return enabled
 
     @staticmethod
     def is_enabled_for_business(feature_name: str,
@@ -212,9 +438,9 @@ class FeatureToggles:
             (bool): True if Feature is enabled else False
         """
         feature_toggles = FeatureToggles.fetch_feature_toggles()
-        LOGGER.info(f"Enable_for_business_FT_cache_info: "
-                    f"{FeatureToggles.fetch_feature_toggles.__wrapped__.cache_info()}")
-        return business_via_name in feature_toggles.get(feature_name, {}).get('business_via_names', [])
+        enabled = business_via_name in feature_toggles.get(feature_name, {}).get('business_via_names', frozenset())
+        FeatureToggles.lookup_stats.record('is_enabled_for_business', 'Enable_for_business %s(%s): %s', feature_name, business_via_name, enabled)
+        return enabled
 
     @staticmethod
     def is_enabled_for_expert(feature_name: str,
@@ -228,9 +454,9 @@ class FeatureToggles:
             (bool): True if Feature is enabled else False
         """
         feature_toggles = FeatureToggles.fetch_feature_toggles()
-        LOGGER.info(f"Enable_for_expert_FT_cache_info: "
-                    f"{FeatureToggles.fetch_feature_toggles.__wrapped__.cache_info()}")
-        return expert_email in feature_toggles.get(feature_name, {}).get('expert_emails', [])
+        enabled = expert_email in feature_toggles.get(feature_name, {}).get('expert_emails', frozenset())
+        FeatureToggles.lookup_stats.record('is_enabled_for_expert', 'Enable_for_expert %s(%s): %s', feature_name, expert_email, enabled)
+        return enabled
 
     @staticmethod
     def is_enabled_for_team(feature_name: str,
@@ -244,36 +470,109 @@ class FeatureToggles:
             (bool): True if feature is enabled else False
         """
         feature_toggles = FeatureToggles.fetch_feature_toggles()
-        LOGGER.info(f"Enable_for_team_FT_cache_info: "
-                    f"{FeatureToggles.fetch_feature_toggles.__wrapped__.cache_info()}")
-        return team_id in feature_toggles.get(feature_name, {}).get('team_ids', [])
+        enabled = team_id in feature_toggles.get(feature_name, {}).get('team_ids', frozenset())
+        FeatureToggles.lookup_stats.record('is_enabled_for_team', 'Enable_for_team %s(%s): %s', feature_name, team_id, enabled)
+        return enabled
+
+    @staticmethod
+    def enabled_features_for(domain_name: Optional[str] = None,
+                             partner_name: Optional[str] = None,
+                             business_via_name: Optional[str] = None,
+                             expert_email: Optional[str] = None,
+                             team_id: Optional[str] = None) -> Set[str]:
+        """
+        Util method to get all the features enabled for the given entities from the inverted index
+        Args:
+            domain_name(Optional[str]): Name of the domain
+            partner_name(Optional[str]): Name of the Partner
+            business_via_name(Optional[str]): Business Via Name
+            expert_email(Optional[str]): Expert Email
+            team_id(Optional[str]): Team ID
+        Returns:
+            (set): Names of the features enabled for at least one of the given entities
+        """
+        lookups = [
+            (key, value) for key, value in (
+                ('domain_names', domain_name),
+                ('partner_names', partner_name),
+                ('business_via_names', business_via_name),
+                ('expert_emails', expert_email),
+                ('team_ids', team_id),
+            ) if value is not None
+        ]
+        toggle_index = FeatureToggles.__get_toggle_index(FeatureToggles.fetch_feature_toggles())
+        enabled_features = set()  # type: Set[str]
+        for key, value in lookups:
+            enabled_features.update(toggle_index.features_for(key, value))
+        return enabled_features
+
+    @staticmethod
+    def __get_toggle_index(feature_toggles: Dict[str, Dict[str, FrozenSet[str]]]) -> FeatureToggleIndex:
+        """
+        Returns the inverted index of the given feature toggles, building it if they were refreshed since
+        """
+        toggle_index = FeatureToggles.__toggle_index
+        if toggle_index is None or toggle_index.feature_toggles is not feature_toggles:
+            toggle_index = FeatureToggleIndex(feature_toggles)
+            FeatureToggles.__toggle_index = toggle_index
+        return toggle_index
 
     @staticmethod
-    @timed_lru_cache(seconds=(60*60), maxsize=2048)
+    def __get_shard_key() -> str:
+        """
+        Returns the key of the Redis hash holding the parsed toggles of the initialised cas and environment
+        """
+        return consts.FEATURE_TOGGLES_SHARD_KEY.format(f'{FeatureToggles.__cas_name}.{FeatureToggles.__environment}')
+
+    @staticmethod
+    def __fetch_features_version() -> Optional[str]:
+        """
+        Returns the version of the provisioning stored in Redis, None if it isn't available
+        """
+        if FeatureToggles.__cache is None:
+            return None
+        return read_provisioning_version(FeatureToggles.__get_read_cache())
+
+    @staticmethod
+    @versioned_cache(version_func=lambda: FeatureToggles.__fetch_features_version(),
+                     revalidate_seconds=consts.FEATURE_TOGGLES_REVALIDATE_INTERVAL,
+                     default={})
     def fetch_feature_toggles():
         """
         Returns(Dict):
-            Feature toggles data
+            Feature toggles data of the initialised cas and environment
             Eg: {
-                "<CAS-Name>.<ENVIRONMENT>.<FeatureName>": {
-                    "domain_names": [<Domain Names List>],
-                    "business_via_names": [<List of Business Via Names>],
-                    "partner_names": [<List Of Partner Names>]
+                "<FeatureName>": {
+                    "domain_names": frozenset({<Domain Names>}),
+                    "business_via_names": frozenset({<Business Via Names>}),
+                    "partner_names": frozenset({<Partner Names>}),
+                    "expert_emails": frozenset({<Expert Emails>}),
+                    "team_ids": frozenset({<Team IDs>})
                 }
             }
+            The previous toggles are kept if they can't be reloaded, and {} is returned if they never loaded.
         """
         # TODO: Remove the cas and environment name from the feature toggles while returning the response
         response = {}
         LOGGER.info(f'Loading Feature Toggles from Redis')
-        LOGGER.info(f"Fetch_feature_toggles_cache_info:"
-                    f"{FeatureToggles.fetch_feature_toggles.__wrapped__.cache_info()}")
         if FeatureToggles.__cache is None:
             LOGGER.error('To update cache Feature Toggles class needs to be initialised')
             return response
 
         try:
-            feature_toggles = pickle.loads(
-                FeatureToggles.__cache.get(consts.FEATURES_URL)
+            # Toggles parsed by update_cache, unless it was written by an older client or is out of date
+            compiled_toggles = read_provisioning_shard(
+                FeatureToggles.__get_read_cache(), FeatureToggles.__get_shard_key(),
+                allow_pickle=FeatureToggles.__provisioning_allow_pickle
+            )
+            if compiled_toggles is not None:
+                response = load_compiled_feature_toggles(compiled_toggles)
+                FeatureToggles.__get_toggle_index(response)
+                return response
+
+            feature_toggles = serialization.decode(
+                FeatureToggles.__get_read_cache().get(consts.FEATURES_URL),
+                FeatureToggles.__provisioning_allow_pickle
             )
             """
             Sample output of feature_toggles
@@ -291,51 +590,41 @@ class FeatureToggles:
                 }
             ]
             """
-            if feature_toggles:
-                for feature_toggle in feature_toggles:
-                    full_feature_name = feature_toggle['name']
-                    # split the feature and get compare the cas and environment name
-                    feature = full_feature_name.split('.')
-                    cas_name = feature[0]
-                    environment = feature[1]
-
-                    # Define empty list for empty values
-                    domain_names = []
-                    partner_names = []
-                    business_via_names = []
-                    expert_emails = []
-                    team_ids = []
-
-                    if cas_name == FeatureToggles.__cas_name and environment == FeatureToggles.__environment:
-                        # Strip CAS and ENV name from feature name
-                        active_cas_env_name = f'{cas_name}.{environment}.'
-                        full_feature_name = full_feature_name.replace(active_cas_env_name, '')
-                        if full_feature_name not in response:
-                            response[full_feature_name] = {}
-                        strategies = feature_toggle.get('strategies', [])
-                        for strategy in strategies:
-                            strategy_name = strategy.get('name', '')
-                            parameters = strategy.get('parameters', {})
-                            if strategy_name == 'EnableForPartners':
-                                partner_names = split_and_strip(parameters.get('partner_names', ''))
-                            elif strategy_name == 'EnableForBusinesses':
-                                business_via_names = split_and_strip(parameters.get('business_via_names', ''))
-                            elif strategy_name == 'EnableForDomains':
-                                domain_names = split_and_strip(parameters.get('domain_names', ''))
-                            elif strategy_name == 'EnableForExperts':
-                                expert_emails = split_and_strip(parameters.get('expert_emails', ''))
-                            elif strategy_name == 'EnableForTeams':
-                                team_ids = split_and_strip(parameters.get('team_ids', ''))
-
-                                # Keep updating this list for new strategies which gets added
-
-                        # Assign the strategies data to feature name
-                        response[full_feature_name]['partner_names'] = partner_names
-                        response[full_feature_name]['business_via_names'] = business_via_names
-                        response[full_feature_name]['domain_names'] = domain_names
-                        response[full_feature_name]['expert_emails'] = expert_emails
-                        response[full_feature_name]['team_ids'] = team_ids
+            response = parse_feature_toggles(
+                feature_toggles, FeatureToggles.__cas_name, FeatureToggles.__environment
+            )
+            # Build the inverted index once per refresh rather than on the first lookup
+            FeatureToggles.__get_toggle_index(response)
         except Exception as err:
-            # Handle this exception from where this util gets called
+            # Raised to the cache, which keeps serving the previous toggles and retries at the next revalidation
             LOGGER.error(f'An error occurred while parsing the response: {str(err)}')
+            raise
         return response
+
+    @staticmethod
+    def fetch_feature_toggle(feature_name: str) -> Optional[Dict[str, FrozenSet[str]]]:
+        """
+        Loads a single feature toggle of the initialised cas and environment from Redis, bypassing the cache
+        Args:
+            feature_name(str): Feature name without cas and environment
+        Returns:
+            (dict): Parameter key => frozenset of values, None if the feature doesn't exist
+        """
+        if FeatureToggles.__cache is None:
+            LOGGER.error('To update cache Feature Toggles class needs to be initialised')
+            return None
+
+        try:
+            compiled_toggles = read_provisioning_shard(
+                FeatureToggles.__get_read_cache(), FeatureToggles.__get_shard_key(), [feature_name],
+                FeatureToggles.__provisioning_allow_pickle
+            )
+        except Exception as err:
+            LOGGER.error(f'An error occurred while loading the feature toggle {feature_name}: {str(err)}')
+            compiled_toggles = None
+
+        if compiled_toggles is None:
+            # No up to date shard, fall back to the whole provisioning
+            return FeatureToggles.fetch_feature_toggles().get(feature_name)
+
+        return load_compiled_feature_toggles(compiled_toggles).get(feature_name)
@@ -1,8 +1,30 @@
-from typing import Optional
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
 
 import redis
 from redis.sentinel import Sentinel
 
+from UnleashClient import constants as consts
+from UnleashClient.utils import LOGGER
+
+# Connection parameters => connection, shared by every UnleashClient and FeatureToggles of the process
+_connections = {}  # type: Dict[tuple, Any]
+_connections_lock = threading.Lock()
+
+
+def _hashable(value):
+    """
+    Normalises a connection option to a hashable value, e.g. socket_keepalive_options dicts to sorted tuples
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((key, _hashable(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(item) for item in value)
+    return value
+
 
 class RedisConnector:
     """
@@ -10,7 +32,9 @@ class RedisConnector:
     """
     @staticmethod
     def get_sentinel_connection(sentinels: list, sentinel_service_name: str, redis_db: int,
-                                redis_auth_enabled: Optional[bool] = False, redis_password: Optional[str] = None):
+                                redis_auth_enabled: Optional[bool] = False, redis_password: Optional[str] = None,
+                                client_tracking: Optional[bool] = False, read_from_replicas: Optional[bool] = False,
+                                pool_options: Optional[dict] = None):
         """
             Generates the Redis sentinel connection
         :param sentinels:
@@ -18,7 +42,11 @@ class RedisConnector:
         :param redis_auth_enabled:
         :param redis_password:
         :param redis_db:
-        :return: Redis<SentinelConnectionPool<service=service-name>
+        :param client_tracking: Cache feature provisioning locally, invalidated by Redis (needs Redis 6+)
+        :param read_from_replicas: Connect to the replicas, round robin and falling back to the master when none is
+                                   reachable.  The connection is read-only.
+        :param pool_options: Connection pool arguments overriding consts.REDIS_POOL_OPTIONS
+        :return: Redis<SentinelConnectionPool<service=service-name>, wrapped in TrackingRedis with client_tracking
         """
         if not all([sentinels, sentinel_service_name]):
             raise ValueError(
@@ -28,18 +56,26 @@ class RedisConnector:
         if redis_auth_enabled and not redis_password:
             raise ValueError("[get_sentinel_connection] Redis Auth enabled but Redis Password not provided.")
 
+        pool_options = {**consts.REDIS_POOL_OPTIONS, **(pool_options or {})}
         if redis_auth_enabled and redis_password:
             sentinel = Sentinel(sentinels, sentinel_kwargs={"password": redis_password})
-            sentinel_connection_pool = sentinel.master_for(sentinel_service_name, password=redis_password, db=redis_db)
+            connect = sentinel.slave_for if read_from_replicas else sentinel.master_for
+            sentinel_connection_pool = connect(sentinel_service_name, password=redis_password, db=redis_db,
+                                               **pool_options)
         else:
             sentinel = Sentinel(sentinels)
-            sentinel_connection_pool = sentinel.master_for(sentinel_service_name, db=redis_db)
+            connect = sentinel.slave_for if read_from_replicas else sentinel.master_for
+            sentinel_connection_pool = connect(sentinel_service_name, db=redis_db, **pool_options)
+        if client_tracking:
+            return TrackingRedis(sentinel_connection_pool)
         return sentinel_connection_pool
 
     @staticmethod
     def get_non_sentinel_connection(redis_host: str, redis_port: int, redis_db: int,
                                     redis_auth_enabled: Optional[bool] = False,
-                                    redis_password: Optional[str] = None):
+                                    redis_password: Optional[str] = None,
+                                    client_tracking: Optional[bool] = False,
+                                    pool_options: Optional[dict] = None):
         """
              Generates the Redis non-sentinel connection
         :param redis_host:
@@ -47,22 +83,211 @@ class RedisConnector:
         :param redis_db:
         :param redis_auth_enabled:
         :param redis_password:
-        :return: Redis<ConnectionPool<Connection<host=,port=,db=>>>
+        :param client_tracking: Cache feature provisioning locally, invalidated by Redis (needs Redis 6+)
+        :param pool_options: Connection pool arguments overriding consts.REDIS_POOL_OPTIONS
+        :return: Redis<ConnectionPool<Connection<host=,port=,db=>>>, wrapped in TrackingRedis with client_tracking
         """
         if redis_auth_enabled and not redis_password:
             raise ValueError("[get_non_sentinel_connection] Redis Auth enabled but Redis Password not provided.")
 
+        pool_options = {**consts.REDIS_POOL_OPTIONS, **(pool_options or {})}
         if redis_auth_enabled and redis_password:
             non_sentinel_connection_pool = redis.Redis(
                 host=redis_host,
                 port=redis_port,
                 db=redis_db,
-                password=redis_password
+                password=redis_password,
+                **pool_options
             )
         else:
             non_sentinel_connection_pool = redis.Redis(
                 host=redis_host,
                 port=redis_port,
-                db=redis_db
+                db=redis_db,
+                **pool_options
             )
+        if client_tracking:
+            return TrackingRedis(non_sentinel_connection_pool)
         return non_sentinel_connection_pool
+
+    @staticmethod
+    def get_connection(redis_host: Optional[str], redis_port: Optional[int], redis_db: int,
+                       redis_auth_enabled: Optional[bool] = False, redis_password: Optional[str] = None,
+                       sentinel_enabled: Optional[bool] = False, sentinels: Optional[list] = None,
+                       sentinel_service_name: Optional[str] = None, client_tracking: Optional[bool] = False,
+                       read_from_replicas: Optional[bool] = False, pool_options: Optional[dict] = None):
+        """
+             Returns the connection shared by the whole process for these parameters, creating it on first use
+        :param read_from_replicas: Only with sentinel_enabled, see get_sentinel_connection
+        :param pool_options: Connection pool arguments overriding consts.REDIS_POOL_OPTIONS, e.g. max_connections,
+                             socket_timeout, socket_connect_timeout, retry_on_timeout or health_check_interval
+                             (redis-py 3.3+)
+        :return: Connection from get_sentinel_connection or get_non_sentinel_connection
+        """
+        if sentinel_enabled:
+            key = ('sentinel', tuple(tuple(sentinel) for sentinel in sentinels or ()), sentinel_service_name,
+                   bool(read_from_replicas))  # type: tuple
+        else:
+            key = ('redis', redis_host, redis_port)
+        # Keep the password itself out of the registry
+        password_hash = hashlib.sha256(redis_password.encode()).hexdigest() if redis_password else None
+        key += (redis_db, bool(redis_auth_enabled), password_hash, bool(client_tracking),
+                _hashable(pool_options or {}))
+
+        with _connections_lock:
+            connection = _connections.get(key)
+            if connection is None:
+                if sentinel_enabled:
+                    connection = RedisConnector.get_sentinel_connection(
+                        sentinels, sentinel_service_name, redis_db, redis_auth_enabled, redis_password,
+                        client_tracking, read_from_replicas, pool_options
+                    )
+                else:
+                    connection = RedisConnector.get_non_sentinel_connection(
+                        redis_host, redis_port, redis_db, redis_auth_enabled, redis_password,
+                        client_tracking, pool_options
+                    )
+                _connections[key] = connection
+
+        return connection
+
+
+# pylint: disable=broad-except
+class TrackingRedis:
+    """
+    Wraps a Redis connection, serving GETs of keys under the tracked prefixes from memory
+
+    Relies on Redis 6+ server-assisted client side caching in broadcasting mode: a dedicated connection enables
+    CLIENT TRACKING for the prefixes with invalidations redirected to itself, and a daemon thread listens to them.
+    * A cached value is evicted as soon as the server reports its key changed, and after max_age seconds at the latest.
+    * Values are only cached while that connection is up; the local copy is dropped whenever it's lost.
+    * A forked child doesn't inherit the listener thread, so it drops the parent's copy and starts its own listener.
+    Everything else is passed through to the wrapped connection.
+    """
+    def __init__(self, redis_client: redis.Redis,
+                 prefixes: Iterable[str] = (consts.FEATURES_URL,),
+                 max_age: float = consts.CLIENT_TRACKING_MAX_AGE,
+                 retry_interval: float = consts.FEATURES_SUBSCRIBER_RETRY_INTERVAL) -> None:
+        self.redis = redis_client
+        self.prefixes = tuple(prefixes)
+        self.max_age = max_age
+        self.retry_interval = retry_interval
+        self._values = {}  # type: Dict[Any, Tuple[Any, float]]
+        # Bumped on every invalidation, a GET racing with one doesn't cache its (possibly stale) value
+        self._generation = 0
+        self._tracking = False
+        self._stopped = threading.Event()
+        self._fork_lock = threading.Lock()
+        self._start_listener()
+
+    def _start_listener(self) -> None:
+        self._pid = os.getpid()
+        self._listener = threading.Thread(target=self._listen, name="redis-tracking-invalidations", daemon=True)
+        self._listener.start()
+
+    def _check_pid(self) -> None:
+        """
+        Resets the tracking state inherited from the parent process, like redis-py connection pools do after a fork
+        """
+        if self._pid == os.getpid():
+            return
+
+        with self._fork_lock:
+            if self._pid == os.getpid():
+                return
+            self._tracking = False
+            self._invalidate(None)
+            if not self._stopped.is_set():
+                self._start_listener()
+            else:
+                self._pid = os.getpid()
+
+    def __getattr__(self, name):
+        return getattr(self.redis, name)
+
+    def _is_tracked(self, name) -> bool:
+        if isinstance(name, bytes):
+            name = name.decode()
+        return isinstance(name, str) and name.startswith(self.prefixes)
+
+    def get(self, name):
+        if not self._is_tracked(name):
+            return self.redis.get(name)
+
+        self._check_pid()
+
+        cached = self._values.get(name)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+
+        generation = self._generation
+        value = self.redis.get(name)
+        if self._tracking and generation == self._generation:
+            self._values[name] = (value, time.monotonic() + self.max_age)
+        return value
+
+    def set(self, name, value, *args, **kwargs):
+        self._values.pop(name, None)
+        return self.redis.set(name, value, *args, **kwargs)
+
+    def delete(self, *names):
+        for name in names:
+            self._values.pop(name, None)
+        return self.redis.delete(*names)
+
+    def close(self) -> None:
+        """
+        Stops listening to invalidations and stops caching
+        """
+        self._stopped.set()
+
+    def _invalidate(self, keys) -> None:
+        self._generation += 1
+        if keys is None:
+            # Flushed database
+            self._values.clear()
+            return
+
+        for key in keys:
+            self._values.pop(key.decode() if isinstance(key, bytes) else key, None)
+
+    def _listen(self) -> None:
+        while not self._stopped.is_set():
+            connection = None  # type: Any
+            try:
+                connection = self.redis.connection_pool.make_connection()
+                # Blocks on reads until an invalidation arrives
+                connection.socket_timeout = None
+                connection.send_command('CLIENT', 'ID')
+                client_id = connection.read_response()
+
+                tracking_args = ['CLIENT', 'TRACKING', 'ON', 'REDIRECT', client_id, 'BCAST']
+                for prefix in self.prefixes:
+                    tracking_args += ['PREFIX', prefix]
+                connection.send_command(*tracking_args)
+                try:
+                    connection.read_response()
+                except redis.exceptions.ResponseError as excep:
+                    LOGGER.warning("Redis client side caching isn't supported by the server: %s", excep)
+                    return
+
+                connection.send_command('SUBSCRIBE', consts.CLIENT_TRACKING_INVALIDATE_CHANNEL)
+                connection.read_response()
+                self._tracking = True
+
+                while not self._stopped.is_set():
+                    # Time out regularly to notice close()
+                    if connection.can_read(timeout=1.0):
+                        message = connection.read_response()
+                        if message[0] in (b'message', 'message'):
+                            self._invalidate(message[2])
+            except Exception as excep:
+                LOGGER.warning("Redis client side caching disabled, retrying in %s seconds: %s",
+                               self.retry_interval, excep)
+            finally:
+                self._tracking = False
+                self._invalidate(None)
+                if connection is not None:
+                    connection.disconnect()
+
+            self._stopped.wait(self.retry_interval)
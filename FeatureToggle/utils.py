@@ -1,23 +1,143 @@
+import threading
+import time
+from functools import update_wrapper
+from typing import Any, Callable, NamedTuple, Optional
+
 from UnleashClient.utils import LOGGER
-from datetime import datetime, timedelta
-from functools import lru_cache, wraps
 
 
-def timed_lru_cache(seconds: int, maxsize: int = 128):
-    LOGGER.info(f'timed_lru_cache was called')
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    refreshes: int
+
+
+class VersionedCache:
+    """
+    Caches the result of a function taking no arguments and reloads it when a version changes.
+
+    * Once every revalidate_seconds, a single caller checks version_func() and reloads the value if the version moved
+      (or if version_func() returns None, meaning no version is available).
+    * Other callers keep getting the cached value while that happens instead of waiting for it.
+    * Only the very first load, when there's nothing to serve yet, makes callers wait.
+    * A load raising keeps the previous value and version, and is retried at the next revalidation.  If the first
+      load raises, default is served until then, or the exception is raised if there's no default.
+
+    Counters are updated without locking and are approximate under concurrency.
+    """
+    _MISSING = object()
+
+    def __init__(self,
+                 func: Callable[[], Any],
+                 version_func: Callable[[], Optional[str]],
+                 revalidate_seconds: float,
+                 default: Any = _MISSING) -> None:
+        self.func = func
+        self.version_func = version_func
+        self.revalidate_seconds = revalidate_seconds
+        self.default = default
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self._value = self._MISSING  # type: Any
+        self._version = None  # type: Optional[str]
+        self._revalidate_at = 0.0
+        # Set by invalidate(), so a revalidation already in flight checks the version again before it's done
+        self._invalidated = False
+        self._lock = threading.Lock()
+        update_wrapper(self, func)
+
+    def __call__(self) -> Any:
+        value = self._value
+
+        if value is not self._MISSING:
+            self.hits += 1
+            if time.monotonic() < self._revalidate_at or not self._lock.acquire(blocking=False):
+                return value
+            try:
+                self._revalidate()
+            finally:
+                self._lock.release()
+            return self._value
+
+        with self._lock:
+            if self._value is self._MISSING:
+                self.misses += 1
+                version = self._read_version()
+                self._load(None if version is self._MISSING else version)
+            else:
+                self.hits += 1
+            return self._value
+
+    def _read_version(self) -> Any:
+        try:
+            return self.version_func()
+        except Exception as err:  # pylint: disable=broad-except
+            LOGGER.warning(f'Unable to read the cache version: {str(err)}')
+            return self._MISSING
+
+    def _load(self, version: Optional[str]) -> None:
+        self._revalidate_at = time.monotonic() + self.revalidate_seconds
+        try:
+            value = self.func()
+        except Exception as err:  # pylint: disable=broad-except
+            if self._value is self._MISSING:
+                if self.default is self._MISSING:
+                    raise
+                # Never matches a version, so the next revalidation loads again
+                self._value = self.default
+                self._version = None
+            LOGGER.warning(f'Unable to reload the cache, retrying in {self.revalidate_seconds} seconds: {str(err)}')
+            return
+
+        self._value = value
+        self._version = version
+
+    def _revalidate(self) -> None:
+        while True:
+            self._invalidated = False
+            version = self._read_version()
+
+            if version is self._MISSING:
+                self._revalidate_at = time.monotonic() + self.revalidate_seconds
+            elif version is None or version != self._version:
+                self.refreshes += 1
+                self._load(version)
+            else:
+                self._revalidate_at = time.monotonic() + self.revalidate_seconds
+
+            if not self._invalidated:
+                return
+
+    def invalidate(self) -> None:
+        """
+        Makes the next call check the version, whatever the time since the last check.  A check already in progress
+        in another thread checks again once it's done.
+        """
+        self._invalidated = True
+        self._revalidate_at = 0.0
+
+    def cache_clear(self) -> None:
+        """
+        Drops the cached value and resets counters.
+        """
+        with self._lock:
+            self._value = self._MISSING
+            self._version = None
+            self._revalidate_at = 0.0
+            self._invalidated = False
+            self.hits = self.misses = self.refreshes = 0
+
+    def cache_info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.refreshes)
+
 
+def versioned_cache(version_func: Callable[[], Optional[str]], revalidate_seconds: float,
+                    default: Any = VersionedCache._MISSING):
+    """
+    Decorator wrapping a function taking no arguments in a VersionedCache.
+    """
     def wrapper_cache(func):
-        func = lru_cache(maxsize=maxsize)(func)
-        func.lifetime = timedelta(seconds=seconds)
-        func.expiration = datetime.utcnow() + func.lifetime
-
-        @wraps(func)
-        def wrapped_func(*args, **kwargs):
-            if datetime.utcnow() >= func.expiration:
-                func.cache_clear()
-                func.expiration = datetime.utcnow() + func.lifetime
-            return func(*args, **kwargs)
-
-        return wrapped_func
+        return VersionedCache(func, version_func, revalidate_seconds, default)
 
     return wrapper_cache
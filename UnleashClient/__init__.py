@@ -1,6 +1,15 @@
-from typing import Dict, Callable, Optional
+import os
+import threading
+import weakref
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import IO, Callable, Dict, Iterable, Mapping, Optional
 
-from UnleashClient.periodic_tasks import fetch_and_load_features
+from apscheduler.job import Job
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+from UnleashClient.context import Context
+from UnleashClient.features import Feature
 from UnleashClient.strategies import (
     ApplicationHostname, Default, GradualRolloutRandom, GradualRolloutSessionId, GradualRolloutUserId, UserWithId,
     RemoteAddress, FlexibleRollout, EnableForDomains, EnableForBusinesses, EnableForPartners, EnableForExperts
@@ -8,10 +17,21 @@ from UnleashClient.strategies import (
 from UnleashClient import constants as consts
 from UnleashClient.strategies.EnableForTeamStrategy import EnableForTeams
 from UnleashClient.utils import LOGGER
-from UnleashClient.loader import load_features
+from UnleashClient.loader import load_disk_snapshot, load_feature_snapshot
+from UnleashClient.metrics_flusher import MetricsFlusher, RedisMetricsFlusher
+from UnleashClient.snapshot import try_lock
+from UnleashClient.variants.Variants import _DISABLED_VARIANT
+from UnleashClient.subscriber import ProvisioningSubscriber
 from UnleashClient.deprecation_warnings import strategy_v2xx_deprecation_check, default_value_warning
 
 
+def _restart_in_child(client: "weakref.ReferenceType[UnleashClient]") -> None:
+    unleash_client = client()
+    # Only clients whose tasks were running in the parent, i.e. initialized and not destroyed
+    if unleash_client is not None and unleash_client.scheduler is not None and unleash_client.scheduler.running:
+        unleash_client._restart_after_fork()  # pylint: disable=protected-access
+
+
 # pylint: disable=dangerous-default-value
 class UnleashClient:
     """
@@ -28,7 +48,7 @@ class UnleashClient:
                  instance_id: str = "unleash-client-python",
                  refresh_interval: int = 15,
                  metrics_interval: int = 60,
-                 disable_metrics: bool = False,
+                 disable_metrics: bool = True,
                  disable_registration: bool = False,
                  custom_headers: dict = {},
                  custom_options: dict = {},
@@ -38,7 +58,16 @@ class UnleashClient:
                  sentinels: Optional[list] = None,
                  sentinel_service_name: Optional[str] = None,
                  redis_auth_enabled: bool = False,
-                 redis_password: Optional[str] = None
+                 redis_password: Optional[str] = None,
+                 push_updates: bool = False,
+                 push_refresh_interval: int = consts.FEATURES_PUSH_REFRESH_INTERVAL,
+                 redis_client_tracking: bool = False,
+                 sentinel_read_from_replicas: bool = False,
+                 redis_pool_options: Optional[dict] = None,
+                 shared_snapshot: bool = False,
+                 metrics_queue_size: int = consts.METRICS_QUEUE_SIZE,
+                 metrics_aggregation: bool = False,
+                 provisioning_allow_pickle: bool = True
                  ) -> None:
         """
         A client for the Unleash feature toggle system.
@@ -46,22 +75,41 @@ class UnleashClient:
         :param app_name: Name of the application using the unleash client, required.
         :param environment: Name of the environment using the unleash client, optinal & defaults to "default".
         :param instance_id: Unique identifier for unleash client instance, optional & defaults to "unleash-client-python"
-        :param refresh_interval: Provisioning refresh interval in ms, optional & defaults to 15 seconds
-        :param metrics_interval: Metrics refresh interval in ms, optional & defaults to 60 seconds
-        :param disable_metrics: Disables sending metrics to unleash server, optional & defaults to false.
+        :param refresh_interval: Provisioning refresh interval in seconds, optional & defaults to 15 seconds
+        :param metrics_interval: Metrics refresh interval in seconds, optional & defaults to 60 seconds
+        :param disable_metrics: Disables sending metrics to unleash server, optional & defaults to true.
+        :param metrics_queue_size: Metrics buckets kept while the unleash server is unreachable, optional & defaults to 100.
+        :param metrics_aggregation: Add up the metrics of all processes in Redis and send them from one, optional & defaults to false.
         :param custom_headers: Default headers to send to unleash server, optional & defaults to empty.
         :param custom_options: Default requests parameters, optional & defaults to empty.
         :param custom_strategies: Dictionary of custom strategy names : custom strategy objects
-        :param cache_directory: Location of the cache directory. When unset, FCache will determine the location
+        :param cache_directory: Directory to keep a copy of the last provisioning loaded from Redis in, used at start-up.  Optional, unset disables the copy
+        :param push_updates: Refresh provisioning as soon as an update is published to Redis, optional & defaults to false.
+        :param push_refresh_interval: Provisioning refresh interval in seconds while push updates are received, optional & defaults to 300 seconds
+        :param redis_client_tracking: Cache provisioning locally and let Redis (6+) invalidate it, optional & defaults to false.
+        :param sentinel_read_from_replicas: Read provisioning from the sentinel replicas instead of the master, optional & defaults to false.
+        :param shared_snapshot: Only one process per cache_directory reads Redis, others load its snapshot, optional & defaults to false.
+        :param redis_pool_options: Redis connection pool arguments (e.g. max_connections, socket_timeout), optional & defaults to consts.REDIS_POOL_OPTIONS.
+        :param provisioning_allow_pickle: Decode provisioning written with pickle, optional & defaults to true.  Disable unless every writer to Redis is trusted.
         """
         # Configuration
         self.unleash_url = url.rstrip('\\')
         self.unleash_app_name = app_name
         self.unleash_environment = f'{cas_name}|{environment}'
+        self.unleash_snapshot_path = os.path.join(cache_directory, consts.FEATURES_SNAPSHOT_FILE) \
+            if cache_directory else None
+        if shared_snapshot and not cache_directory:
+            raise ValueError("A cache_directory is required to share the feature snapshot.")
+        self.unleash_shared_snapshot = shared_snapshot
+        self.unleash_provisioning_allow_pickle = provisioning_allow_pickle
         self.unleash_instance_id = instance_id
         self.unleash_refresh_interval = refresh_interval
+        self.unleash_push_updates = push_updates
+        self.unleash_push_refresh_interval = push_refresh_interval
         self.unleash_metrics_interval = metrics_interval
         self.unleash_disable_metrics = disable_metrics
+        self.unleash_metrics_queue_size = metrics_queue_size
+        self.unleash_metrics_aggregation = metrics_aggregation
         self.unleash_disable_registration = disable_registration
         self.unleash_custom_headers = custom_headers
         self.unleash_custom_options = custom_options
@@ -70,14 +118,25 @@ class UnleashClient:
             "environment": self.unleash_environment
         }
         from FeatureToggle.redis_utils import RedisConnector
-        if sentinel_enabled:
-            self.cache = RedisConnector.get_sentinel_connection(sentinels, sentinel_service_name, redis_db,
-                                                                redis_auth_enabled, redis_password)
-        else:
-            self.cache = RedisConnector.get_non_sentinel_connection(redis_host, redis_port, redis_db,
-                                                                    redis_auth_enabled, redis_password)
+        # Shared with FeatureToggles and any other client of the process connecting the same way
+        self.cache = RedisConnector.get_connection(redis_host, redis_port, redis_db, redis_auth_enabled, redis_password,
+                                                   sentinel_enabled, sentinels, sentinel_service_name,
+                                                   redis_client_tracking, sentinel_read_from_replicas,
+                                                   redis_pool_options)
+        # Metrics are written to Redis, so neither through replicas nor a tracking cache
+        self.metrics_cache = RedisConnector.get_connection(redis_host, redis_port, redis_db, redis_auth_enabled,
+                                                           redis_password, sentinel_enabled, sentinels,
+                                                           sentinel_service_name, False, False,
+                                                           redis_pool_options) if metrics_aggregation else None
+        # Subscribers block on reads until an update is published, so their connections don't time out
+        self.subscriber_cache = RedisConnector.get_connection(redis_host, redis_port, redis_db, redis_auth_enabled,
+                                                              redis_password, sentinel_enabled, sentinels,
+                                                              sentinel_service_name, False, sentinel_read_from_replicas,
+                                                              {**(redis_pool_options or {}),
+                                                               **consts.REDIS_SUBSCRIBER_POOL_OPTIONS}) \
+            if push_updates else None
 
-        self.features = {}  # type: Dict
+        self.features = MappingProxyType({})  # type: Mapping[str, Feature]
 
         # Mappings
         default_strategy_mapping = {
@@ -103,6 +162,13 @@ class UnleashClient:
 
         # Client status
         self.is_initialized = False
+        self.scheduler = None  # type: Optional[BackgroundScheduler]
+        self.fl_job = None  # type: Optional[Job]
+        self.features_version = None  # type: Optional[str]
+        self.subscriber = None  # type: Optional[ProvisioningSubscriber]
+        self.metrics_flusher = None  # type: Optional[MetricsFlusher]
+        self._refresh_lock = threading.Lock()
+        self._snapshot_writer_lock = None  # type: Optional[IO]
 
     def initialize_client(self) -> None:
         """
@@ -113,34 +179,192 @@ class UnleashClient:
         * Stats poll
         :return:
         """
-        # Setup
-        fl_args = {
-            "url": self.unleash_url,
-            "app_name": self.unleash_app_name,
-            "instance_id": self.unleash_instance_id,
-            "custom_headers": self.unleash_custom_headers,
-            "custom_options": self.unleash_custom_options,
-            "cache": self.cache,
-            "features": self.features,
-            "strategy_mapping": self.strategy_mapping
-        }
-
-        # Disabling the first API call
-        # fetch_and_load_features(**fl_args)
-        load_features(self.cache, self.features, self.strategy_mapping)
+        # Start from the copy on disk if there is one and catch up with Redis in the background.
+        job_args = {}
+        if self._load_disk_snapshot():
+            job_args["next_run_time"] = datetime.now(timezone.utc)
+        else:
+            self._refresh_features()
 
+        self._start_background_tasks(job_args)
         self.is_initialized = True
 
+        # Threads aren't carried into forked processes, e.g. gunicorn workers of a --preload app
+        if hasattr(os, "register_at_fork"):
+            client = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: _restart_in_child(client))
+
+    def _start_background_tasks(self, job_args: dict) -> None:
+        """
+        Starts the provisioning refresh, the provisioning subscriber and the metrics flusher.
+        """
+        # Keep re-reading provisioning from Redis in the background.
+        self.scheduler = BackgroundScheduler()
+        self.fl_job = self.scheduler.add_job(self._refresh_features,
+                                             trigger=IntervalTrigger(seconds=int(self.unleash_refresh_interval)),
+                                             **job_args)
+        self.scheduler.start()
+
+        # Refresh as soon as provisioning is updated, polling above is slowed down while subscribed.
+        if self.unleash_push_updates:
+            self.subscriber = ProvisioningSubscriber(self.subscriber_cache,
+                                                     on_update=self._on_features_update,
+                                                     on_subscribe=self._on_features_subscribe,
+                                                     on_unsubscribe=self._on_features_unsubscribe)
+            self.subscriber.start()
+
+        # Send metrics from a thread of their own, evaluations only update counters.
+        if not self.unleash_disable_metrics:
+            if self.unleash_metrics_aggregation:
+                self.metrics_flusher = RedisMetricsFlusher(self.metrics_cache,
+                                                           url=self.unleash_url,
+                                                           app_name=self.unleash_app_name,
+                                                           instance_id=self.unleash_instance_id,
+                                                           custom_headers=self.unleash_custom_headers,
+                                                           custom_options=self.unleash_custom_options,
+                                                           get_features=lambda: self.features,
+                                                           interval=int(self.unleash_metrics_interval),
+                                                           queue_size=self.unleash_metrics_queue_size)
+            else:
+                self.metrics_flusher = MetricsFlusher(url=self.unleash_url,
+                                                      app_name=self.unleash_app_name,
+                                                      instance_id=self.unleash_instance_id,
+                                                      custom_headers=self.unleash_custom_headers,
+                                                      custom_options=self.unleash_custom_options,
+                                                      get_features=lambda: self.features,
+                                                      interval=int(self.unleash_metrics_interval),
+                                                      queue_size=self.unleash_metrics_queue_size)
+            self.metrics_flusher.start()
+
+    def _restart_after_fork(self) -> None:
+        """
+        Restarts the background tasks in a forked process, which only inherits the thread that forked.
+        """
+        # Any lock held by a thread of the parent would never be released
+        self._refresh_lock = threading.Lock()
+        if self._snapshot_writer_lock is not None:
+            # Closing the inherited descriptor leaves the lock to the parent, the child competes for it again
+            self._snapshot_writer_lock.close()
+            self._snapshot_writer_lock = None
+
+        for task in (self.subscriber, self.metrics_flusher):
+            if task is not None:
+                task.stop()
+        try:
+            self.scheduler.shutdown(wait=False)
+        except Exception as excep:  # pylint: disable=broad-except
+            LOGGER.warning("Unable to shut down the scheduler inherited from the parent process: %s", excep)
+
+        self.subscriber = None
+        self.metrics_flusher = None
+        self._start_background_tasks({"next_run_time": datetime.now(timezone.utc)})
+
+    # pylint: disable=broad-except
+    def _refresh_features(self) -> None:
+        """
+        Builds a new feature map from Redis (or the snapshot shared by another process) and swaps it in.
+
+        The map in use is never modified, so threads calling is_enabled() see either the old or the new provisioning.
+        :return:
+        """
+        with self._refresh_lock:
+            try:
+                if self._reads_shared_snapshot():
+                    snapshot = load_disk_snapshot(self.unleash_snapshot_path, self.strategy_mapping, self.features,
+                                                  self.features_version, self.unleash_provisioning_allow_pickle)
+                else:
+                    snapshot = load_feature_snapshot(self.cache, self.strategy_mapping, self.features,
+                                                     self.features_version, self.unleash_snapshot_path,
+                                                     self.unleash_provisioning_allow_pickle)
+            except Exception as excep:
+                LOGGER.warning("Unable to refresh features, using previous provisioning: %s", excep)
+                return
+
+            if snapshot is not None:
+                self.features, self.features_version = snapshot
+
+    def _load_disk_snapshot(self) -> bool:
+        """
+        Loads the provisioning saved in cache_directory, if any.
+        :return: Whether features were loaded.
+        """
+        if not self.unleash_snapshot_path:
+            return False
+
+        with self._refresh_lock:
+            snapshot = load_disk_snapshot(self.unleash_snapshot_path, self.strategy_mapping, self.features,
+                                          self.features_version, self.unleash_provisioning_allow_pickle)
+            if snapshot is None:
+                return False
+
+            self.features, self.features_version = snapshot
+        return True
+
+    def _reads_shared_snapshot(self) -> bool:
+        """
+        With shared_snapshot, whether another process refreshes the snapshot from Redis.
+
+        The first process to lock the snapshot does, and keeps doing so until it exits.  The others retry on every
+        refresh, so one of them takes over.
+        """
+        if not self.unleash_shared_snapshot or self._snapshot_writer_lock is not None:
+            return False
+
+        self._snapshot_writer_lock = try_lock(self.unleash_snapshot_path + ".lock")
+        return self._snapshot_writer_lock is None
+
+    def _on_features_update(self, version: Optional[str]) -> None:
+        if version is None or version != self.features_version:
+            self._refresh_features()
+
+    def _on_features_subscribe(self) -> None:
+        # Snapshot readers only see an update once the writer has saved it, so they keep polling the snapshot
+        if not self._reads_shared_snapshot():
+            self._reschedule_refresh(self.unleash_push_refresh_interval)
+        # Catch up with updates published while not subscribed
+        self._refresh_features()
+
+    def _on_features_unsubscribe(self) -> None:
+        self._reschedule_refresh(self.unleash_refresh_interval)
+
+    def _reschedule_refresh(self, interval: int) -> None:
+        try:
+            self.fl_job.reschedule(trigger=IntervalTrigger(seconds=int(interval)))
+        except Exception as excep:
+            LOGGER.warning("Unable to reschedule provisioning refresh: %s", excep)
+
     def destroy(self):
         """
         Gracefully shuts down the Unleash client by stopping jobs, stopping the scheduler, and deleting the cache.
         You shouldn't need this too much!
         :return:
         """
+        if self.subscriber:
+            self.subscriber.stop()
+        if self.metrics_flusher:
+            # Sends the last metrics
+            self.metrics_flusher.stop()
+            self.metrics_flusher.join(consts.METRICS_REQUEST_TIMEOUT)
+        if self.scheduler and self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
+        if self._snapshot_writer_lock is not None:
+            self._snapshot_writer_lock.close()
+            self._snapshot_writer_lock = None
         self.cache.delete()
 
+    def create_context(self, context: Optional[Mapping] = None) -> Context:
+        """
+        Builds a read-only Context layering this client's static context (appName, environment) over context.
+
+        The result can be passed to any number of is_enabled()/get_variant() calls for the same request, which then
+        skip building it again.
+        :param context: Dictionary (or Context) with context (e.g. IPs, email) for feature toggles.  Not copied.
+        :return: Context
+        """
+        return Context.create(context, self.unleash_static_context)
+
     @staticmethod
-    def _get_fallback_value(fallback_function: Callable, feature_name: str, context: dict) -> bool:
+    def _get_fallback_value(fallback_function: Callable, feature_name: str, context: Mapping) -> bool:
         if fallback_function:
             fallback_value = fallback_function(feature_name, context)
         else:
@@ -151,7 +375,7 @@ class UnleashClient:
     # pylint: disable=broad-except
     def is_enabled(self,
                    feature_name: str,
-                   context: dict = {},
+                   context: Optional[Mapping] = None,
                    default_value: bool = False,
                    fallback_function: Callable = None) -> bool:
         """
@@ -159,12 +383,12 @@ class UnleashClient:
         Notes:
         * If client hasn't been initialized yet or an error occurs, flat will default to false.
         :param feature_name: Name of the feature
-        :param context: Dictionary with context (e.g. IPs, email) for feature toggle.
+        :param context: Dictionary or Context with context (e.g. IPs, email) for feature toggle.  Not modified.
         :param default_value: Allows override of default value. (DEPRECIATED, used fallback_function instead!)
         :param fallback_function: Allows users to provide a custom function to set default value.
         :return: True/False
         """
-        context.update(self.unleash_static_context)
+        context = self.create_context(context)
 
         if default_value:
             default_value_warning()
@@ -184,16 +408,16 @@ class UnleashClient:
     # pylint: disable=broad-except
     def get_variant(self,
                     feature_name: str,
-                    context: dict = {}) -> dict:
+                    context: Optional[Mapping] = None) -> Mapping:
         """
         Checks if a feature toggle is enabled.  If so, return variant.
         Notes:
         * If client hasn't been initialized yet or an error occurs, flat will default to false.
         :param feature_name: Name of the feature
-        :param context: Dictionary with context (e.g. IPs, email) for feature toggle.
+        :param context: Dictionary or Context with context (e.g. IPs, email) for feature toggle.  Not modified.
         :return: Dict with variant and feature flag status.
         """
-        context.update(self.unleash_static_context)
+        context = self.create_context(context)
 
         if self.is_initialized:
             try:
@@ -201,8 +425,81 @@ class UnleashClient:
             except Exception as excep:
                 LOGGER.warning("Returning default flag/variation for feature: %s", feature_name)
                 LOGGER.warning("Error checking feature flag variant: %s", excep)
-                return consts.DISABLED_VARIATION
+                return _DISABLED_VARIANT
         else:
             LOGGER.warning("Returning default flag/variation for feature: %s", feature_name)
             LOGGER.warning("Attempted to get feature flag/variation %s, but client wasn't initialized!", feature_name)
-            return consts.DISABLED_VARIATION
+            return _DISABLED_VARIANT
+
+    # pylint: disable=broad-except
+    def is_enabled_many(self,
+                        feature_names: Optional[Iterable[str]] = None,
+                        context: Optional[Mapping] = None,
+                        fallback_function: Callable = None) -> Dict[str, bool]:
+        """
+        Checks several feature toggles against the same context.
+        Notes:
+        * The context is layered over the static context once, without modifying the one passed in.
+        * All features are evaluated against the same provisioning, even if it is refreshed mid-batch.
+        :param feature_names: Names of the features, all loaded features if None.
+        :param context: Dictionary or Context with context (e.g. IPs, email) for feature toggles.
+        :param fallback_function: Allows users to provide a custom function to set default value.
+        :return: Dict of feature name to True/False
+        """
+        batch_context = self.create_context(context)
+        features = self.features
+
+        if feature_names is None:
+            feature_names = features.keys()
+
+        if not self.is_initialized:
+            LOGGER.warning("Attempted to get feature flags, but client wasn't initialized!  Returning default values.")
+            return {
+                feature_name: self._get_fallback_value(fallback_function, feature_name, batch_context)
+                for feature_name in feature_names
+            }
+
+        results = {}
+        for feature_name in feature_names:
+            try:
+                results[feature_name] = features[feature_name].is_enabled(batch_context)
+            except Exception as excep:
+                LOGGER.warning("Returning default value for feature: %s", feature_name)
+                LOGGER.warning("Error checking feature flag: %s", excep)
+                results[feature_name] = self._get_fallback_value(fallback_function, feature_name, batch_context)
+
+        return results
+
+    # pylint: disable=broad-except
+    def get_variants_many(self,
+                          feature_names: Optional[Iterable[str]] = None,
+                          context: Optional[Mapping] = None) -> Dict[str, Mapping]:
+        """
+        Gets the variants of several feature toggles for the same context.
+        Notes:
+        * The context is layered over the static context once, without modifying the one passed in.
+        * All features are evaluated against the same provisioning, even if it is refreshed mid-batch.
+        :param feature_names: Names of the features, all loaded features if None.
+        :param context: Dictionary or Context with context (e.g. IPs, email) for feature toggles.
+        :return: Dict of feature name to dict with variant and feature flag status.
+        """
+        batch_context = self.create_context(context)
+        features = self.features
+
+        if feature_names is None:
+            feature_names = features.keys()
+
+        if not self.is_initialized:
+            LOGGER.warning("Attempted to get feature flag variations, but client wasn't initialized!  Returning defaults.")
+            return {feature_name: _DISABLED_VARIANT for feature_name in feature_names}
+
+        results = {}
+        for feature_name in feature_names:
+            try:
+                results[feature_name] = features[feature_name].get_variant(batch_context)
+            except Exception as excep:
+                LOGGER.warning("Returning default flag/variation for feature: %s", feature_name)
+                LOGGER.warning("Error checking feature flag variant: %s", excep)
+                results[feature_name] = _DISABLED_VARIANT
+
+        return results
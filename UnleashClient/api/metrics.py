@@ -1,3 +1,4 @@
+import gzip
 import json
 import requests
 from UnleashClient.constants import REQUEST_TIMEOUT, APPLICATION_HEADERS, METRICS_URL
@@ -8,7 +9,9 @@ from UnleashClient.utils import LOGGER, log_resp_info
 def send_metrics(url: str,
                  request_body: dict,
                  custom_headers: dict,
-                 custom_options: dict) -> bool:
+                 custom_options: dict,
+                 timeout: float = REQUEST_TIMEOUT,
+                 compress: bool = False) -> bool:
     """
     Attempts to send metrics to Unleash server
 
@@ -21,16 +24,24 @@ def send_metrics(url: str,
     :param metrics_interval:
     :param custom_headers:
     :param custom_options:
+    :param timeout: Request timeout in seconds
+    :param compress: Gzip the request body
     :return: true if registration successful, false if registration unsuccessful or exception.
     """
     try:
         LOGGER.info("Sending messages to with unleash @ %s", url)
         LOGGER.info("unleash metrics information: %s", request_body)
 
+        data = json.dumps(request_body).encode()
+        headers = {**custom_headers, **APPLICATION_HEADERS}
+        if compress:
+            data = gzip.compress(data)
+            headers["Content-Encoding"] = "gzip"
+
         resp = requests.post(url + METRICS_URL,
-                             data=json.dumps(request_body),
-                             headers={**custom_headers, **APPLICATION_HEADERS},
-                             timeout=REQUEST_TIMEOUT, **custom_options)
+                             data=data,
+                             headers=headers,
+                             timeout=timeout, **custom_options)
 
         if resp.status_code != 202:
             log_resp_info(resp)
@@ -3,6 +3,34 @@ SDK_NAME = "unleash-client-python"
 SDK_VERSION = "3.5.0"
 REQUEST_TIMEOUT = 30
 METRIC_LAST_SENT_TIME = "mlst"
+# Background metrics flusher: buckets kept while the server is unreachable, request timeout and longest retry delay
+METRICS_QUEUE_SIZE = 100
+METRICS_REQUEST_TIMEOUT = 5
+METRICS_MAX_BACKOFF = 600
+# Metrics added up in Redis: seconds a bucket stays open to late writes, and intervals buckets are kept for
+METRICS_AGGREGATION_GRACE = 10
+METRICS_AGGREGATION_RETENTION = 10
+HASH_CACHE_SIZE = 16384
+# Codec used to write provisioning to Redis, see UnleashClient.serialization.  Older readers only decode pickle.
+PROVISIONING_CODEC = "pickle"
+# Seconds between provisioning polls while updates are pushed, and between subscription attempts
+FEATURES_PUSH_REFRESH_INTERVAL = 300
+FEATURES_SUBSCRIBER_RETRY_INTERVAL = 5
+# Last provisioning loaded from Redis, kept in cache_directory
+FEATURES_SNAPSHOT_FILE = "features.snapshot"
+# Default connection pool arguments, redis-py 2.10 compatible
+REDIS_POOL_OPTIONS = {
+    "socket_timeout": 5,
+    "socket_connect_timeout": 5,
+    "socket_keepalive": True
+}
+# Overrides for connections blocking on reads until something is published (pub/sub, client tracking invalidations)
+REDIS_SUBSCRIBER_POOL_OPTIONS = {
+    "socket_timeout": None
+}
+# Redis client side caching
+CLIENT_TRACKING_MAX_AGE = 60
+CLIENT_TRACKING_INVALIDATE_CHANNEL = "__redis__:invalidate"
 
 # =Unleash=
 APPLICATION_HEADERS = {"Content-Type": "application/json"}
@@ -14,7 +42,18 @@ DISABLED_VARIATION = {
 # Paths
 REGISTER_URL = "/client/register"
 FEATURES_URL = "/client/features"
+FEATURES_VERSION_KEY = "/client/features/version"
+# Hash field holding the provisioning version of a shard, can't clash with a feature name
+FEATURES_SHARD_VERSION_FIELD = "/version"
+# Set of the shard keys written with the stored provisioning
+FEATURES_SHARDS_KEY = "/client/features/shard-keys"
+# Pub/sub channel announcing the version of newly stored provisioning
+FEATURES_CHANNEL = "/client/features/updates"
 METRICS_URL = "/client/metrics"
+# Metrics added up in Redis, per app name: hash of counts per bucket start, leader lock, start of the last bucket sent
+METRICS_BUCKET_KEY = "/client/metrics/{}/buckets/{}"
+METRICS_LEADER_KEY = "/client/metrics/{}/leader"
+METRICS_SENT_KEY = "/client/metrics/{}/sent"
 
 
 FEATURE_TOGGLES_BASE_URL = "http://128.199.29.137:4242/api"
@@ -22,6 +61,9 @@ FEATURE_TOGGLES_APP_NAME = "feature-toggles-poc"
 FEATURE_TOGGLES_INSTANCE_ID = "haptik-development-dev-parvez-vm-1"
 FEATURE_TOGGLES_ENABLED = False
 FEATURE_TOGGLES_CACHE_KEY = "/client/features"
+FEATURE_TOGGLES_REVALIDATE_INTERVAL = 15
+# Hash of feature name => toggle for one "<cas>.<env>", already parsed by update_cache
+FEATURE_TOGGLES_SHARD_KEY = "/client/features/shards/{}"
 FEATURE_TOGGLES_API_RESPONSE = {
     "haptik.development.enable_smart_skills": {
         "domain_names": ["test_pvz_superman", "priyanshisupermandefault"],
@@ -1,4 +1,6 @@
-from UnleashClient.utils import LOGGER, get_identifier
+from typing import Any, Callable, Mapping
+from UnleashClient.utils import LOGGER, get_identifier, freeze_values, is_member
+
 
 class Constraint:
     def __init__(self, constraint_dict: dict) -> None:
@@ -11,7 +13,7 @@ class Constraint:
         self.operator = constraint_dict['operator']
         self.values = constraint_dict['values']
 
-    def apply(self, context: dict = None) -> bool:
+    def apply(self, context: Mapping[str, Any] = None) -> bool:
         """
         Returns true/false depending on constraint provisioning and context.
 
@@ -28,7 +30,36 @@ class Constraint:
                     constraint_check = value in self.values
                 elif self.operator.upper() == "NOT_IN":
                     constraint_check = value not in self.values
-        except Exception as excep:  #pylint: disable=W0703
+        except Exception as excep:  # pylint: disable=W0703
             LOGGER.info("Could not evaluate context %s!  Error: %s", self.context_name, excep)
 
         return constraint_check
+
+    def compile(self) -> Callable[[Mapping[str, Any]], bool]:
+        """
+        Builds a predicate equivalent to apply() with the operator resolved, the values turned into a set and the
+        context lookup bound to this constraint's context name.
+
+        :return: Function taking the context and returning True/False.
+        """
+        context_name = self.context_name
+        operator = self.operator.upper()
+        values = self.values
+        frozen_values = freeze_values(values)
+
+        if operator not in ("IN", "NOT_IN"):
+            return lambda context: False
+
+        negate = operator == "NOT_IN"
+
+        def check(context: Mapping[str, Any]) -> bool:
+            try:
+                value = get_identifier(context_name, context)
+                if not value:
+                    return False
+                return is_member(value, frozen_values, values) != negate
+            except Exception as excep:  # pylint: disable=W0703
+                LOGGER.info("Could not evaluate context %s!  Error: %s", context_name, excep)
+                return False
+
+        return check
@@ -0,0 +1,99 @@
+from collections.abc import Mapping
+from typing import Any, Iterator, Optional
+
+
+class Context(Mapping):
+    """
+    Read-only evaluation context.
+
+    Keys are looked up in the static context first, then in the caller's fields; resolve() also falls back to the
+    fields' 'properties', the same way utils.get_identifier() does for plain dicts.  Neither mapping is copied, so they
+    shouldn't be modified while the context is in use.  A context can be reused for any number of evaluations.
+    """
+    __slots__ = ('_static', '_fields', '_resolved', '_hashes')
+
+    _EMPTY = {}  # type: dict
+
+    def __init__(self, fields: Optional[Mapping] = None, static: Optional[Mapping] = None) -> None:
+        """
+        :param fields: Caller provided context (e.g. userId, sessionId, properties)
+        :param static: Context shared by all evaluations (e.g. appName, environment), takes precedence over fields
+        """
+        self._static = static if static is not None else self._EMPTY
+        self._fields = fields if fields is not None else self._EMPTY
+        self._resolved = {}  # type: dict
+        self._hashes = {}  # type: dict
+
+    @classmethod
+    def create(cls, context: Optional[Mapping], static: Mapping) -> 'Context':
+        """
+        Returns context if it already is a Context with the given static context, else a Context layering static over it.
+        """
+        if isinstance(context, Context):
+            return context.with_static(static)
+        return cls(context, static)
+
+    def with_static(self, static: Mapping) -> 'Context':
+        """
+        Returns this context if its static context is static, else a Context layering static over its fields.
+        """
+        if self._static is static:
+            return self
+        return type(self)(self._fields, static)
+
+    @property
+    def static(self) -> Mapping:
+        return self._static
+
+    @property
+    def fields(self) -> Mapping:
+        return self._fields
+
+    @property
+    def hashes(self) -> dict:
+        """
+        Memo of stickiness hashes computed for this context, see utils.cached_normalized_hash().
+        """
+        return self._hashes
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._static:
+            return self._static[key]
+        return self._fields[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._static or key in self._fields
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._static
+        for key in self._fields:
+            if key not in self._static:
+                yield key
+
+    def __len__(self) -> int:
+        return len(self._static) + sum(1 for key in self._fields if key not in self._static)
+
+    def __repr__(self) -> str:
+        return "Context({!r})".format(dict(self))
+
+    def resolve(self, key: str) -> Any:
+        """
+        Looks up key in the static context, the fields, then the fields' properties.  Results are cached.
+
+        :param key: Context field name
+        :return: Value or None if key isn't set
+        """
+        resolved = self._resolved
+        if key in resolved:
+            return resolved[key]
+
+        if key in self._static:
+            value = self._static[key]
+        elif key in self._fields:
+            value = self._fields[key]
+        else:
+            properties = self._fields.get('properties')
+            value = properties.get(key) if properties else None
+
+        resolved[key] = value
+        return value
@@ -0,0 +1 @@
+from .Context import Context
@@ -1,6 +1,13 @@
+from functools import partial
+from typing import Any, Callable, Dict, Mapping, Tuple
 from UnleashClient.variants import Variants
+from UnleashClient.variants.Variants import _DISABLED_VARIANT
 from UnleashClient.utils import LOGGER
-from UnleashClient.constants import DISABLED_VARIATION
+from UnleashClient.instrumentation import EVALUATION_STATS, ShardedCounter
+
+
+def _execute_strategy(strategy, context: Mapping[str, Any]) -> bool:
+    return strategy.execute(context)
 
 
 # pylint: disable=dangerous-default-value, broad-except
@@ -22,10 +29,46 @@ class Feature:
         self.enabled = enabled
         self.strategies = strategies
         self.variations = variants
+        self.compiled_strategies = ()  # type: Tuple[Callable[[Mapping[str, Any]], bool], ...]
+        self.compile()
+
+        # Stats tracking, keyed by evaluation result (True/False) and by variant name (str) for get_variant()
+        self.stats = ShardedCounter()
+
+    @staticmethod
+    def _compile_strategy(strategy) -> Callable[[Mapping[str, Any]], bool]:
+        try:
+            return strategy.compile()
+        except Exception as compile_exception:
+            LOGGER.warning("Could not compile strategy, falling back to execute(): %s", compile_exception)
+            # Looked up when evaluated, so a broken strategy fails like it does in execute()
+            return partial(_execute_strategy, strategy)
+
+    def compile(self) -> None:
+        """
+        Builds the evaluation plan for is_enabled() from the current strategies.
+
+        Needs to be called again whenever self.strategies is replaced.
+
+        :return:
+        """
+        self.compiled_strategies = tuple(self._compile_strategy(x) for x in self.strategies)
+
+    @property
+    def yes_count(self) -> int:
+        return self.stats.pending(True)
+
+    @yes_count.setter
+    def yes_count(self, value: int) -> None:
+        self.stats.set_pending(True, value)
 
-        # Stats tracking
-        self.yes_count = 0
-        self.no_count = 0
+    @property
+    def no_count(self) -> int:
+        return self.stats.pending(False)
+
+    @no_count.setter
+    def no_count(self, value: int) -> None:
+        self.stats.set_pending(False, value)
 
     def reset_stats(self) -> None:
         """
@@ -33,8 +76,18 @@ class Feature:
 
         :return:
         """
-        self.yes_count = 0
-        self.no_count = 0
+        self.stats.reset()
+
+    def collect_stats(self) -> Tuple[int, int, Dict[str, int]]:
+        """
+        Reads and resets stats in one go, so evaluations racing with metrics reporting are never lost.
+
+        :return: Yes and no counts, and variant name => count, since the previous collect or reset.
+        """
+        counts = self.stats.collect()
+        # Evaluations are counted under True/False and variants under their name
+        variant_counts = {key: count for key, count in counts.items() if isinstance(key, str)}  # type: Dict[str, int]
+        return counts.get(True, 0), counts.get(False, 0), variant_counts
 
     def increment_stats(self, result: bool) -> None:
         """
@@ -43,13 +96,10 @@ class Feature:
         :param result:
         :return:
         """
-        if result:
-            self.yes_count += 1
-        else:
-            self.no_count += 1
+        self.stats.increment(bool(result))
 
     def is_enabled(self,
-                   context: dict = None,
+                   context: Mapping[str, Any] = None,
                    default_value: bool = False) -> bool:  # pylint: disable=W0613
         """
         Checks if feature is enabled.
@@ -62,8 +112,12 @@ class Feature:
 
         if self.enabled:
             try:
-                if self.strategies:
-                    strategy_result = any([x.execute(context) for x in self.strategies])
+                if self.compiled_strategies:
+                    strategy_result = False
+                    for evaluate in self.compiled_strategies:
+                        if evaluate(context):
+                            strategy_result = True
+                            break
                 else:
                     # If no strategies are present, should default to true.  This isn't possible via UI.
                     strategy_result = True
@@ -74,27 +128,29 @@ class Feature:
 
         self.increment_stats(flag_value)
 
-        LOGGER.info("Feature toggle status for feature %s: %s", self.name, flag_value)
+        EVALUATION_STATS.record("is_enabled", "Feature toggle status for feature %s: %s", self.name, flag_value)
 
         return flag_value
 
     def get_variant(self,
-                    context: dict = None) -> dict:
+                    context: Mapping[str, Any] = None) -> Mapping:
         """
         Checks if feature is enabled and, if so, get the variant.
 
         :param context: Context information
-        :return:
+        :return: Variant, read-only if selected by Variants.
         """
         is_feature_enabled = self.is_enabled(context)
 
         if is_feature_enabled and self.variations is not None:
             try:
                 variant = self.variations.get_variant(context)
-                variant['enabled'] = is_feature_enabled
             except Exception as variant_exception:
                 LOGGER.warning("Error selecting variant: %s", variant_exception)
+                variant = _DISABLED_VARIANT
         else:
-            variant = DISABLED_VARIATION
+            variant = _DISABLED_VARIANT
+
+        self.stats.increment(variant['name'])
 
         return variant
@@ -0,0 +1,96 @@
+import threading
+from collections.abc import Mapping
+from typing import Callable, Dict, Iterator, Optional
+
+from UnleashClient.features.Feature import Feature
+
+
+class LazyFeatureMap(Mapping):
+    """
+    Read-only feature map building each Feature from its provisioning the first time it's looked up.
+
+    Membership, iteration and len() only use the provisioning, so features are only built for flags that are
+    evaluated.  Replacements of features built from the provisioning being replaced share their stats.  Features of
+    the replaced map that aren't rebuilt, e.g. because they were deleted, are kept until their stats are collected.
+    """
+    __slots__ = ('_provisioning', '_factory', '_features', '_previous_features', '_lock')
+
+    def __init__(self,
+                 provisioning: Mapping,
+                 factory: Callable[[dict], Feature],
+                 previous_features: Optional[Mapping] = None) -> None:
+        """
+        :param provisioning: Feature name => provisioning dict, e.g. a dict or a FeatureSnapshot
+        :param factory: Builds a Feature from its provisioning dict
+        :param previous_features: Feature map being replaced, if any
+        """
+        self._provisioning = provisioning
+        self._factory = factory
+        self._features = {}  # type: Dict[str, Feature]
+        # Only keep what was built, so maps don't hold on to every map they replaced
+        if isinstance(previous_features, LazyFeatureMap):
+            self._previous_features = previous_features._carry_over()  # type: Dict[str, Feature]
+        else:
+            self._previous_features = dict(previous_features or {})
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name: str) -> Feature:
+        feature = self._features.get(name)
+        if feature is not None:
+            return feature
+
+        with self._lock:
+            feature = self._features.get(name)
+            if feature is None:
+                provisioning = self._provisioning.get(name)
+                if provisioning is None:
+                    raise KeyError(name)
+
+                feature = self._factory(provisioning)
+                previous_feature = self._previous_features.pop(name, None)
+                if previous_feature is not None:
+                    # Share the counter, so increments racing with the swap still get reported
+                    feature.stats = previous_feature.stats
+                self._features[name] = feature
+
+        return feature
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._provisioning
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._provisioning)
+
+    def __len__(self) -> int:
+        return len(self._provisioning)
+
+    def __repr__(self) -> str:
+        return f"LazyFeatureMap({len(self._features)}/{len(self._provisioning)} features built)"
+
+    def materialised(self) -> Mapping:
+        """
+        Features built so far, along with the features of replaced maps that weren't rebuilt.
+        """
+        with self._lock:
+            return {**self._previous_features, **self._features}
+
+    def _carry_over(self) -> Dict[str, Feature]:
+        """
+        Features whose stats the map replacing this one reports: those built so far, and those carried over from
+        replaced maps until nothing is left to collect from them.
+        """
+        with self._lock:
+            features = {
+                name: feature for name, feature in self._previous_features.items() if feature.stats.has_pending()
+            }
+            features.update(self._features)
+        return features
+
+
+def materialised_features(features: Mapping) -> Mapping:
+    """
+    Features of a feature map that have been built, i.e. all of them unless it's a LazyFeatureMap.
+    """
+    if isinstance(features, LazyFeatureMap):
+        return features.materialised()
+    return features
@@ -1 +1,2 @@
 from .Feature import Feature
+from .LazyFeatureMap import LazyFeatureMap, materialised_features
@@ -0,0 +1,154 @@
+import itertools
+import logging
+import threading
+import weakref
+from collections import Counter
+from typing import Dict, Hashable, List
+from UnleashClient.utils import LOGGER
+
+
+class LookupStats:
+    """
+    Counters for hot-path lookups, plus an optional sampler logging one in every debug_sample_rate lookups at DEBUG.
+
+    Sampling is off with a rate of 0 (the default), and log arguments are only formatted for sampled lookups when
+    DEBUG is enabled.  Counters are updated without locking and are approximate under concurrency.
+    """
+    def __init__(self, debug_sample_rate: int = 0) -> None:
+        self.debug_sample_rate = debug_sample_rate
+        self.counts = Counter()  # type: Counter
+        self._sequence = itertools.count()
+
+    def record(self, name: str, message: str, *args) -> None:
+        """
+        Counts a lookup under name and, if it is sampled, logs message % args at DEBUG.
+
+        :param name: Counter name
+        :param message: Log message, formatted with args only when logged
+        :return:
+        """
+        self.counts[name] += 1
+
+        if self.debug_sample_rate and next(self._sequence) % self.debug_sample_rate == 0 \
+                and LOGGER.isEnabledFor(logging.DEBUG):
+            LOGGER.debug(message, *args)
+
+    def snapshot(self) -> Dict[str, int]:
+        return dict(self.counts)
+
+    def reset(self) -> None:
+        self.counts = Counter()
+
+
+class _CounterShard:
+    __slots__ = ('thread', 'counts', 'collected')
+
+    def __init__(self, thread: threading.Thread) -> None:
+        self.thread = weakref.ref(thread)
+        self.counts = {}  # type: Dict[Hashable, int]
+        self.collected = {}  # type: Dict[Hashable, int]
+
+    def is_alive(self) -> bool:
+        thread = self.thread()
+        return thread is not None and thread.is_alive()
+
+
+class ShardedCounter:
+    """
+    Exact counters for hot paths, with one shard per thread so increments never take a lock or contend.
+
+    * Only the owning thread writes to a shard and its counts only ever go up.
+    * collect() copies each shard (a single atomic dict copy) and returns what was counted since the previous
+      collect(), so nothing is lost or counted twice, however increments and collects interleave.
+    * Shards of threads that have exited are merged into the next collect() and dropped.
+    """
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._shards = []  # type: List[_CounterShard]
+        self._offsets = {}  # type: Dict[Hashable, int]
+        self._lock = threading.Lock()
+
+    def increment(self, key: Hashable, amount: int = 1) -> None:
+        """
+        Adds amount to key in the calling thread's shard.
+
+        :param key: Counter name
+        :param amount: Amount to add, must not be negative
+        :return:
+        """
+        try:
+            counts = self._local.counts
+        except AttributeError:
+            counts = self._add_shard()
+        counts[key] = counts.get(key, 0) + amount
+
+    def _add_shard(self) -> Dict[Hashable, int]:
+        shard = _CounterShard(threading.current_thread())
+        with self._lock:
+            self._shards.append(shard)
+        self._local.counts = shard.counts
+        return shard.counts
+
+    def collect(self) -> Dict[Hashable, int]:
+        """
+        Counts since the previous collect() or reset(), keys with nothing counted are left out.
+        """
+        with self._lock:
+            totals = self._offsets
+            self._offsets = {}
+            shards = []
+
+            for shard in self._shards:
+                # Checked before the copy: once the thread has exited, the copy is final
+                alive = shard.is_alive()
+                counts = shard.counts.copy()
+                for key, value in counts.items():
+                    delta = value - shard.collected.get(key, 0)
+                    if delta:
+                        totals[key] = totals.get(key, 0) + delta
+                shard.collected = counts
+                if alive:
+                    shards.append(shard)
+
+            self._shards = shards
+
+        return {key: value for key, value in totals.items() if value}
+
+    def reset(self) -> None:
+        self.collect()
+
+    def pending(self, key: Hashable) -> int:
+        """
+        Count of key since the previous collect() or reset().
+        """
+        with self._lock:
+            total = self._offsets.get(key, 0)
+            for shard in self._shards:
+                total += shard.counts.get(key, 0) - shard.collected.get(key, 0)
+        return total
+
+    def has_pending(self) -> bool:
+        """
+        Whether anything was counted since the previous collect() or reset().
+        """
+        with self._lock:
+            if any(self._offsets.values()):
+                return True
+            return any(
+                value != shard.collected.get(key, 0)
+                for shard in self._shards
+                for key, value in shard.counts.copy().items()
+            )
+
+    def set_pending(self, key: Hashable, value: int) -> None:
+        """
+        Makes the count of key since the previous collect() equal to value, e.g. to carry counts over.  Increments
+        racing with this call may or may not be included.
+        """
+        delta = value - self.pending(key)
+        with self._lock:
+            self._offsets[key] = self._offsets.get(key, 0) + delta
+
+
+# Feature evaluations, shared by all UnleashClient instances.
+EVALUATION_STATS = LookupStats()
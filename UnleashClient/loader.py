@@ -1,8 +1,15 @@
+import hashlib
 import redis
-import pickle
+from typing import Any, Dict, List, Mapping, Optional, Tuple, cast
+from UnleashClient.features.LazyFeatureMap import LazyFeatureMap
 from UnleashClient.features.Feature import Feature
 from UnleashClient.variants.Variants import Variants
-from UnleashClient.constants import FEATURES_URL
+from UnleashClient import serialization
+from UnleashClient.snapshot import FeatureSnapshot, read_snapshot_version, write_snapshot
+from UnleashClient.constants import (
+    FEATURES_URL, FEATURES_VERSION_KEY, FEATURES_SHARD_VERSION_FIELD, FEATURES_SHARDS_KEY, FEATURES_CHANNEL,
+    PROVISIONING_CODEC
+)
 from UnleashClient.utils import LOGGER
 
 
@@ -52,55 +59,216 @@ def _create_feature(provisioning: dict,
                    )
 
 
-def load_features(cache: redis.Redis,
-                  feature_toggles: dict,
-                  strategy_mapping: dict) -> None:
+def _decode_provisioning(raw_provisioning: bytes, allow_pickle: bool = True) -> list:
     """
-    Caching
+    Decodes the cached feature provisioning.
 
-    :param cache: Should be the cache class variable from UnleashClient
-    :param feature_toggles: Should be the features class variable from UnleashClient
+    Accepts both a bare list of features and an /api/client/features response body, written by any codec.
+
+    :param allow_pickle: Whether to decode provisioning written with pickle
+    :return: List of feature provisioning dicts.
+    """
+    feature_provisioning = serialization.decode(raw_provisioning, allow_pickle)
+
+    if isinstance(feature_provisioning, dict):
+        feature_provisioning = feature_provisioning.get("features", [])
+
+    return feature_provisioning
+
+
+def provisioning_version(raw_provisioning: bytes) -> str:
+    """
+    Content hash identifying a cached provisioning blob.
+    """
+    return hashlib.sha1(raw_provisioning).hexdigest()
+
+
+def read_provisioning_version(cache: redis.Redis) -> Optional[str]:
+    """
+    Reads the version stored next to the provisioning blob.
+
+    :return: Version or None if the writer didn't store one.
+    """
+    return _decode_str(cache.get(FEATURES_VERSION_KEY))
+
+
+def _decode_str(value):
+    if isinstance(value, bytes):
+        return value.decode()
+
+    return value
+
+
+def store_provisioning(cache: redis.Redis,
+                       feature_provisioning,
+                       codec: str = PROVISIONING_CODEC,
+                       shards: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+    """
+    Writes feature provisioning and its version to cache in a single transaction, then announces the version on
+    FEATURES_CHANNEL.
+
+    :param cache: Redis connection
+    :param feature_provisioning: List of features or an /api/client/features response body
+    :param codec: Name of the codec to encode provisioning with, see UnleashClient.serialization.CODECS
+    :param shards: Cache key => field => value derived from feature_provisioning.  Each is written as a Redis hash
+                   tagged with the provisioning version, read them back with read_provisioning_shard().  Shards
+                   stored with earlier provisioning but missing here are deleted.
+    :return: Version of the stored provisioning.
+    """
+    shards = shards or {}
+    raw_provisioning = serialization.encode(feature_provisioning, codec)
+    version = provisioning_version(raw_provisioning)
+    stale_shards = {_decode_str(key) for key in cache.smembers(FEATURES_SHARDS_KEY)} - set(shards)
+
+    pipeline = cache.pipeline()
+    pipeline.set(FEATURES_URL, raw_provisioning)
+    pipeline.set(FEATURES_VERSION_KEY, version)
+    pipeline.delete(FEATURES_SHARDS_KEY, *stale_shards)
+    if shards:
+        pipeline.sadd(FEATURES_SHARDS_KEY, *shards)
+    for key, fields in shards.items():
+        pipeline.delete(key)
+        pipeline.hset(key, FEATURES_SHARD_VERSION_FIELD, version)
+        for field, value in fields.items():
+            pipeline.hset(key, field, serialization.encode(value, codec))
+    pipeline.publish(FEATURES_CHANNEL, version)
+    pipeline.execute()
+
+    return version
+
+
+def read_provisioning_shard(cache: redis.Redis,
+                            key: str,
+                            fields: Optional[List[str]] = None,
+                            allow_pickle: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Reads a shard stored with store_provisioning(shards=...), along with the current version in one round trip.
+
+    :param cache: Redis connection
+    :param key: Cache key of the shard
+    :param fields: Fields to read, all of them when unset
+    :param allow_pickle: Whether to decode fields written with pickle
+    :return: Field => value for the fields found, or None if the shard is missing or was derived from another version
+             of the provisioning.
+    """
+    pipeline = cache.pipeline(transaction=False)
+    pipeline.get(FEATURES_VERSION_KEY)
+    if fields is None:
+        pipeline.hgetall(key)
+    else:
+        pipeline.hmget(key, [FEATURES_SHARD_VERSION_FIELD] + list(fields))
+    version, raw_shard = pipeline.execute()
+
+    if fields is None:
+        raw_shard = {_decode_str(field): value for field, value in (raw_shard or {}).items()}
+        shard_version = raw_shard.pop(FEATURES_SHARD_VERSION_FIELD, None)
+    else:
+        shard_version = raw_shard[0]
+        raw_shard = {field: value for field, value in zip(fields, raw_shard[1:]) if value is not None}
+
+    if version is None or _decode_str(shard_version) != _decode_str(version):
+        return None
+
+    return {field: serialization.decode(value, allow_pickle) for field, value in raw_shard.items()}
+
+
+def build_features(feature_provisioning: list,
+                   strategy_mapping: dict,
+                   previous_features: Mapping[str, Feature] = None) -> Mapping[str, Feature]:
+    """
+    Builds a read-only feature map from raw provisioning, creating each feature when it's first looked up.
+
+    Stats accumulated on features in previous_features are carried over to their replacements.
+
+    :param feature_provisioning: List of feature provisioning dicts
+    :param strategy_mapping: Strategy name to strategy class mapping
+    :param previous_features: Feature map being replaced, if any
     :return:
     """
-    # Pull raw provisioning from cache.
-    try:
-        feature_provisioning = pickle.loads(cache.get(FEATURES_URL))
-
-        # Parse provisioning
-        parsed_features = {}
-        feature_names = [
-            d["name"] for d in feature_provisioning
-        ]
-
-        for provisioning in feature_provisioning:
-            parsed_features[provisioning["name"]] = provisioning
-
-        # Delete old features/cache
-        for feature in list(feature_toggles.keys()):
-            if feature not in feature_names:
-                del feature_toggles[feature]
-
-        # Update existing objects
-        for feature in feature_toggles.keys():
-            feature_for_update = feature_toggles[feature]
-            strategies = parsed_features[feature]["strategies"]
-
-            feature_for_update.enabled = parsed_features[feature]["enabled"]
-            if strategies:
-                parsed_strategies = _create_strategies(parsed_features[feature], strategy_mapping)
-                feature_for_update.strategies = parsed_strategies
-
-            if 'variants' in parsed_features[feature]:
-                feature_for_update.variants = Variants(
-                    parsed_features[feature]['variants'],
-                    parsed_features[feature]['name']
-                )
-
-        # Handle creation or deletions
-        new_features = list(set(feature_names) - set(feature_toggles.keys()))
-
-        for feature in new_features:
-            feature_toggles[feature] = _create_feature(parsed_features[feature], strategy_mapping)
-    except KeyError as cache_exception:
-        LOGGER.warning("Cache Exception: %s", cache_exception)
+    provisioning_by_name = {provisioning["name"]: provisioning for provisioning in feature_provisioning}
+
+    return LazyFeatureMap(provisioning_by_name,
+                          lambda provisioning: _create_feature(provisioning, strategy_mapping),
+                          previous_features)
+
+
+def load_feature_snapshot(cache: redis.Redis,
+                          strategy_mapping: dict,
+                          previous_features: Mapping[str, Feature] = None,
+                          known_version: str = None,
+                          snapshot_path: Optional[str] = None,
+                          allow_pickle: bool = True) -> Optional[Tuple[Mapping[str, Feature], str]]:
+    """
+    Builds a new feature map from the cached provisioning without touching the one currently in use.
+
+    Callers publish the result by replacing their reference to the old map, so readers never see a partial update.
+    If the cached version matches known_version, the blob isn't downloaded or decoded.  Blobs written without a
+    version are hashed after download, which still skips the rebuild.
+
+    :param cache: Should be the cache class variable from UnleashClient
+    :param strategy_mapping: Strategy name to strategy class mapping
+    :param previous_features: Feature map being replaced, if any
+    :param known_version: Version of previous_features
+    :param snapshot_path: File to keep a copy of new provisioning in, for load_disk_snapshot()
+    :param allow_pickle: Whether to decode provisioning written with pickle
+    :return: Tuple of new feature map and its version, or None if provisioning is unchanged or not cached.
+    """
+    version = read_provisioning_version(cache)
+
+    if version is not None and version == known_version:
+        return None
+
+    # Provisioning is binary, read with a connection that doesn't decode responses
+    raw_provisioning = cast(Optional[bytes], cache.get(FEATURES_URL))
+
+    if raw_provisioning is None:
         LOGGER.warning("Unleash client does not have cached features.  Please make sure client can communicate with Unleash server!")
+        return None
+
+    if version is None:
+        version = provisioning_version(raw_provisioning)
+        if version == known_version:
+            return None
+
+    feature_provisioning = _decode_provisioning(raw_provisioning, allow_pickle)
+    features = build_features(feature_provisioning, strategy_mapping, previous_features)
+
+    if snapshot_path:
+        try:
+            write_snapshot(snapshot_path, feature_provisioning, version)
+        except Exception as excep:
+            LOGGER.warning("Unable to write the feature snapshot %s: %s", snapshot_path, excep)
+
+    return features, version
+
+
+def load_disk_snapshot(snapshot_path: str,
+                       strategy_mapping: dict,
+                       previous_features: Mapping[str, Feature] = None,
+                       known_version: str = None,
+                       allow_pickle: bool = True) -> Optional[Tuple[Mapping[str, Feature], str]]:
+    """
+    Builds a feature map from the provisioning last saved by load_feature_snapshot(), possibly by another process.
+
+    :param snapshot_path: Snapshot file
+    :param strategy_mapping: Strategy name to strategy class mapping
+    :param previous_features: Feature map being replaced, if any
+    :param known_version: Version of previous_features
+    :param allow_pickle: Whether to decode features written with pickle
+    :return: Tuple of feature map and its version, or None if the snapshot is unchanged or unusable.
+    """
+    try:
+        if known_version is not None and read_snapshot_version(snapshot_path) == known_version:
+            return None
+
+        snapshot = FeatureSnapshot(snapshot_path, allow_pickle)
+    except FileNotFoundError:
+        return None
+    except Exception as excep:
+        LOGGER.warning("Unable to read the feature snapshot %s: %s", snapshot_path, excep)
+        return None
+
+    # Features are decoded from the snapshot as they're looked up, it's unmapped once the map is garbage collected.
+    return LazyFeatureMap(snapshot,
+                          lambda provisioning: _create_feature(provisioning, strategy_mapping),
+                          previous_features), snapshot.version
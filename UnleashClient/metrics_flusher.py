@@ -0,0 +1,323 @@
+import json
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Deque, Dict, Iterable, List, Mapping, NamedTuple, Optional
+
+from UnleashClient.api import send_metrics
+from UnleashClient.constants import (
+    METRICS_QUEUE_SIZE, METRICS_REQUEST_TIMEOUT, METRICS_MAX_BACKOFF, METRICS_AGGREGATION_GRACE,
+    METRICS_AGGREGATION_RETENTION, METRICS_BUCKET_KEY, METRICS_LEADER_KEY, METRICS_SENT_KEY
+)
+from UnleashClient.periodic_tasks import collect_feature_stats
+from UnleashClient.utils import LOGGER
+
+
+class MetricsBucket(NamedTuple):
+    start: datetime
+    stop: datetime
+    # Feature name => {"yes": count, "no": count, "variants": {variant name: count}}
+    toggles: Dict[str, dict]
+
+    def payload(self) -> dict:
+        return {
+            "start": self.start.isoformat(),
+            "stop": self.stop.isoformat(),
+            "toggles": self.toggles
+        }
+
+
+def coalesce_buckets(buckets: Iterable[MetricsBucket]) -> MetricsBucket:
+    """
+    Merges buckets into one spanning all of them, adding up their counts.
+
+    :param buckets: At least one bucket
+    :return: Merged bucket
+    """
+    buckets = list(buckets)
+    toggles = {}  # type: Dict[str, dict]
+
+    for bucket in buckets:
+        for feature_name, counts in bucket.toggles.items():
+            _add_counts(toggles.setdefault(feature_name, {}), counts)
+
+    return MetricsBucket(min(bucket.start for bucket in buckets), max(bucket.stop for bucket in buckets), toggles)
+
+
+def _add_counts(total: dict, counts: Mapping) -> None:
+    for key, count in counts.items():
+        if isinstance(count, Mapping):
+            _add_counts(total.setdefault(key, {}), count)
+        else:
+            total[key] = total.get(key, 0) + count
+
+
+# pylint: disable=broad-except
+class MetricsFlusher(threading.Thread):
+    """
+    Daemon thread sending feature evaluation metrics to the Unleash server, so evaluations never wait on HTTP.
+
+    * Every interval seconds, the stats of the features returned by get_features() are collected into a bucket and
+      queued.  At most queue_size buckets are kept, the oldest are dropped first.
+    * Queued buckets are merged and sent as one gzipped request.  When that fails, the merged bucket is queued again
+      and sending is retried with an exponential backoff (with jitter), up to max_backoff seconds.
+    * stop() collects and sends what's left one last time.
+    """
+    def __init__(self,
+                 url: str,
+                 app_name: str,
+                 instance_id: str,
+                 custom_headers: dict,
+                 custom_options: dict,
+                 get_features: Callable[[], Mapping],
+                 interval: float = 60,
+                 queue_size: int = METRICS_QUEUE_SIZE,
+                 timeout: float = METRICS_REQUEST_TIMEOUT,
+                 max_backoff: float = METRICS_MAX_BACKOFF,
+                 compress: bool = True) -> None:
+        super().__init__(name="unleash-metrics-flusher", daemon=True)
+        self.url = url
+        self.app_name = app_name
+        self.instance_id = instance_id
+        self.custom_headers = custom_headers
+        self.custom_options = custom_options
+        self.get_features = get_features
+        self.interval = interval
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.compress = compress
+        self.queue = deque(maxlen=queue_size)  # type: Deque[MetricsBucket]
+        self.failures = 0
+        self._bucket_start = datetime.now(timezone.utc)
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.flush()
+
+        self.flush(force=True)
+
+    def collect(self) -> None:
+        """
+        Queues a bucket with the stats collected since the previous one, if any feature was evaluated.
+        """
+        bucket = self._collect_bucket()
+        if bucket is not None:
+            self.enqueue(bucket)
+
+    def _collect_bucket(self) -> Optional[MetricsBucket]:
+        stop = datetime.now(timezone.utc)
+        try:
+            toggles = collect_feature_stats(self.get_features())
+        except Exception as excep:
+            LOGGER.warning("Unable to collect metrics: %s", excep)
+            return None
+
+        bucket = MetricsBucket(self._bucket_start, stop, toggles)
+        self._bucket_start = stop
+        return bucket if toggles else None
+
+    def enqueue(self, bucket: MetricsBucket) -> None:
+        with self._lock:
+            if len(self.queue) == self.queue.maxlen:
+                LOGGER.warning("Metrics queue full, dropping the bucket started at %s", self.queue[0].start)
+            self.queue.append(bucket)
+
+    def flush(self, force: bool = False) -> bool:
+        """
+        Collects a bucket and sends the queued ones, unless waiting to retry.
+
+        :param force: Send even while waiting to retry
+        :return: Whether nothing is left to send.
+        """
+        self.collect()
+
+        if not force and time.monotonic() < self._retry_at:
+            return False
+
+        with self._lock:
+            if not self.queue:
+                return True
+            bucket = coalesce_buckets(self.queue)
+            self.queue.clear()
+
+        metrics_request = {
+            "appName": self.app_name,
+            "instanceId": self.instance_id,
+            "bucket": bucket.payload()
+        }
+
+        if send_metrics(self.url, metrics_request, self.custom_headers, self.custom_options, self.timeout,
+                        self.compress):
+            self.failures = 0
+            self._retry_at = 0.0
+            return True
+
+        with self._lock:
+            self.queue.appendleft(bucket)
+        self.failures += 1
+        backoff = min(self.max_backoff, self.interval * 2 ** (self.failures - 1))
+        self._retry_at = time.monotonic() + backoff * random.uniform(0.5, 1)
+        return False
+
+    def stop(self) -> None:
+        """
+        Stops the thread, which sends the remaining metrics first.  join() to wait for it.
+        """
+        self._stopped.set()
+
+
+def _count_field(path: List[str]) -> str:
+    """
+    Hash field for a count in an aggregated bucket, e.g. ["feature", "yes"] or ["feature", "variants", "blue"].  JSON keeps any feature name unambiguous.
+    """
+    return json.dumps(path, separators=(',', ':'))
+
+
+def _parse_bucket_hash(fields: Mapping) -> Dict[str, dict]:
+    toggles = {}  # type: Dict[str, dict]
+
+    for field, value in fields.items():
+        feature_name, *path = json.loads(field)
+        counts = toggles.setdefault(feature_name, {"yes": 0, "no": 0})
+        for key in path[:-1]:
+            counts = counts.setdefault(key, {})
+        counts[path[-1]] = counts.get(path[-1], 0) + int(value)
+
+    return toggles
+
+
+def _count_paths(counts: Mapping, prefix: List[str]) -> Iterable[tuple]:
+    for key, value in counts.items():
+        if isinstance(value, Mapping):
+            yield from _count_paths(value, prefix + [key])
+        elif value:
+            yield prefix + [key], value
+
+
+# pylint: disable=broad-except
+class RedisMetricsFlusher(MetricsFlusher):
+    """
+    MetricsFlusher adding up the metrics of every process of an app in Redis, so that only one of them sends them.
+
+    * Every interval, each process adds its counts to the Redis hash of the current time bucket (interval seconds
+      long, aligned on the epoch) with pipelined HINCRBY.
+    * The process holding the app's leader lock then reads and deletes the buckets closed for at least grace seconds,
+      and sends them like MetricsFlusher does.  The lock expires when its holder stops renewing it, e.g. because it
+      exited, and another process takes over.
+    * Counts that can't be added up in Redis are queued and sent by the process itself.
+
+    Buckets are kept in Redis for METRICS_AGGREGATION_RETENTION intervals at most, e.g. while no process leads.
+    """
+    def __init__(self,
+                 cache,
+                 url: str,
+                 app_name: str,
+                 instance_id: str,
+                 custom_headers: dict,
+                 custom_options: dict,
+                 get_features: Callable[[], Mapping],
+                 interval: int = 60,
+                 grace: float = METRICS_AGGREGATION_GRACE,
+                 **kwargs) -> None:
+        # Buckets are aligned on whole seconds
+        bucket_interval = max(1, int(interval))
+        super().__init__(url, app_name, instance_id, custom_headers, custom_options, get_features,
+                         interval=bucket_interval, **kwargs)
+        self.bucket_interval = bucket_interval  # type: int
+        self.cache = cache
+        self.grace = grace
+        self.leader_lock = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self.leader_lock is not None
+
+    def run(self) -> None:
+        super().run()
+        self._step_down()
+
+    def collect(self) -> None:
+        bucket = self._collect_bucket()
+        if bucket is not None:
+            self._add_to_redis(bucket)
+
+        self._elect()
+        if self.is_leader:
+            self._load_closed_buckets()
+
+    def _add_to_redis(self, bucket: MetricsBucket) -> None:
+        key = METRICS_BUCKET_KEY.format(self.app_name, int(time.time()) // self.bucket_interval * self.bucket_interval)
+        try:
+            pipeline = self.cache.pipeline(transaction=False)
+            for feature_name, counts in bucket.toggles.items():
+                for path, count in _count_paths(counts, [feature_name]):
+                    pipeline.hincrby(key, _count_field(path), count)
+            pipeline.expire(key, self.bucket_interval * METRICS_AGGREGATION_RETENTION)
+            pipeline.execute()
+        except Exception as excep:
+            LOGGER.warning("Unable to add up metrics in Redis, sending them from this process: %s", excep)
+            self.enqueue(bucket)
+
+    def _elect(self) -> None:
+        """
+        Takes the leader lock if it's free, or renews it if held.
+        """
+        try:
+            if self.leader_lock is None:
+                lock = self.cache.lock(METRICS_LEADER_KEY.format(self.app_name), timeout=self.bucket_interval * 3)
+                if lock.acquire(blocking=False):
+                    self.leader_lock = lock
+                    LOGGER.info("Sending the metrics of app %s", self.app_name)
+            else:
+                self.leader_lock.extend(self.bucket_interval)
+        except Exception as excep:
+            LOGGER.warning("Lost or unable to take the metrics leader lock: %s", excep)
+            self.leader_lock = None
+
+    def _step_down(self) -> None:
+        if self.leader_lock is not None:
+            try:
+                self.leader_lock.release()
+            except Exception:
+                pass
+            self.leader_lock = None
+
+    def _load_closed_buckets(self) -> None:
+        """
+        Moves the buckets closed since the last call from Redis to the queue.
+        """
+        interval = self.bucket_interval
+        # Start of the oldest bucket still open to writes
+        open_start = int(time.time() - self.grace) // interval * interval
+        oldest_start = open_start - interval * METRICS_AGGREGATION_RETENTION
+
+        try:
+            sent_start = self.cache.get(METRICS_SENT_KEY.format(self.app_name))
+            if sent_start is not None:
+                oldest_start = max(oldest_start, int(sent_start) + interval)
+
+            starts = range(oldest_start, open_start, interval)
+            if not starts:
+                return
+
+            pipeline = self.cache.pipeline()
+            for start in starts:
+                key = METRICS_BUCKET_KEY.format(self.app_name, start)
+                pipeline.hgetall(key)
+                pipeline.delete(key)
+            pipeline.set(METRICS_SENT_KEY.format(self.app_name), starts[-1])
+            results = pipeline.execute()
+        except Exception as excep:
+            LOGGER.warning("Unable to read metrics from Redis: %s", excep)
+            return
+
+        for start, fields in zip(starts, results[::2]):
+            if fields:
+                self.enqueue(MetricsBucket(datetime.fromtimestamp(start, timezone.utc),
+                                           datetime.fromtimestamp(start + interval, timezone.utc),
+                                           _parse_bucket_hash(fields)))
@@ -1,2 +1,2 @@
 from .fetch_and_load import fetch_and_load_features
-from .send_metrics import aggregate_and_send_metrics
+from .send_metrics import aggregate_and_send_metrics, collect_feature_stats
@@ -1,8 +1,9 @@
+from typing import Mapping, Optional, Tuple
 import redis
-import pickle
 from UnleashClient.api import get_feature_toggles
-from UnleashClient.loader import load_features
-from UnleashClient.constants import FEATURES_URL
+from UnleashClient.constants import PROVISIONING_CODEC
+from UnleashClient.features.Feature import Feature
+from UnleashClient.loader import load_feature_snapshot, store_provisioning
 from UnleashClient.utils import LOGGER
 
 
@@ -12,16 +13,25 @@ def fetch_and_load_features(url: str,
                             custom_headers: dict,
                             custom_options: dict,
                             cache: redis.Redis,
-                            features: dict,
-                            strategy_mapping: dict) -> None:
+                            features: Optional[Mapping[str, Feature]],
+                            strategy_mapping: dict,
+                            codec: str = PROVISIONING_CODEC,
+                            known_version: Optional[str] = None) -> Optional[Tuple[Mapping[str, Feature], str]]:
+    """
+    Stores the provisioning of the unleash server in cache and builds a new feature map from it.
+
+    :param features: Feature map being replaced, if any.  Not modified.
+    :param known_version: Version of features
+    :return: Tuple of new feature map and its version, or None if provisioning is unchanged or not cached.
+    """
     feature_provisioning = get_feature_toggles(
         url, app_name, instance_id,
         custom_headers, custom_options
     )
 
     if feature_provisioning:
-        cache.set(FEATURES_URL, pickle.dumps(feature_provisioning))
+        store_provisioning(cache, feature_provisioning, codec)
     else:
         LOGGER.warning("Unable to get feature flag toggles, using cached provisioning.")
 
-    load_features(cache, features, strategy_mapping)
+    return load_feature_snapshot(cache, strategy_mapping, features, known_version)
@@ -1,9 +1,31 @@
 import redis
 import pickle
-from collections import ChainMap
 from datetime import datetime, timezone
+from typing import Dict, Mapping
 from UnleashClient.api import send_metrics
 from UnleashClient.constants import METRIC_LAST_SENT_TIME
+from UnleashClient.features import materialised_features
+
+
+def collect_feature_stats(features: Mapping) -> Dict[str, dict]:
+    """
+    Reads and resets the stats of every feature evaluated since the last call.
+
+    :param features: Feature map
+    :return: Feature name => {"yes": count, "no": count, "variants": {variant name: count}}, for features with
+             evaluations only.  "variants" is left out if get_variant() wasn't called.
+    """
+    toggles = {}
+
+    # Features that were never looked up weren't evaluated either
+    for feature in materialised_features(features).values():
+        yes_count, no_count, variant_counts = feature.collect_stats()
+        if yes_count or no_count:
+            toggles[feature.name] = {"yes": yes_count, "no": no_count}
+            if variant_counts:
+                toggles[feature.name]["variants"] = variant_counts
+
+    return toggles
 
 
 def aggregate_and_send_metrics(url: str,
@@ -14,19 +36,6 @@ def aggregate_and_send_metrics(url: str,
                                features: dict,
                                ondisk_cache: redis.Redis
                                ) -> None:
-    feature_stats_list = []
-
-    for feature_name in features.keys():
-        feature_stats = {
-            features[feature_name].name: {
-                "yes": features[feature_name].yes_count,
-                "no": features[feature_name].no_count
-            }
-        }
-
-        features[feature_name].reset_stats()
-        feature_stats_list.append(feature_stats)
-
     metric_last_seen_time = pickle.loads(
         ondisk_cache.get(
             METRIC_LAST_SENT_TIME
@@ -39,7 +48,7 @@ def aggregate_and_send_metrics(url: str,
         "bucket": {
             "start": metric_last_seen_time.isoformat(),
             "stop": datetime.now(timezone.utc).isoformat(),
-            "toggles": dict(ChainMap(*feature_stats_list))
+            "toggles": collect_feature_stats(features)
         }
     }
 
@@ -0,0 +1,136 @@
+"""
+Codecs for the feature provisioning stored in Redis.
+
+Every encoded blob starts with a header byte naming its codec, so a reader can decode blobs written by any codec
+and writers can be switched over once all readers understand the new format.  Pickle needs no header of its own:
+pickle protocol 2+ output already starts with 0x80, which also covers blobs written before codecs existed.
+
+Decoding pickle runs whatever code the blob asks for, so readers that don't trust every writer of their Redis should
+pass allow_pickle=False.
+"""
+import json
+import pickle
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Union
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+
+class Codec(ABC):
+    """
+    Encodes a JSON-like value to bytes prefixed with the codec's header byte and back.
+    """
+    name = ""
+    header = b""
+
+    @abstractmethod
+    def encode(self, value: Any) -> bytes:
+        pass
+
+    @abstractmethod
+    def decode(self, raw: Union[bytes, memoryview]) -> Any:
+        pass
+
+
+class PickleCodec(Codec):
+    """
+    Kept to read blobs written by older clients.  Don't decode pickle from a Redis you don't trust, see decode().
+    """
+    name = "pickle"
+    header = b"\x80"
+
+    def encode(self, value: Any) -> bytes:
+        return pickle.dumps(value, protocol=4)
+
+    def decode(self, raw: Union[bytes, memoryview]) -> Any:
+        return pickle.loads(raw)
+
+
+class ZlibJsonCodec(Codec):
+    name = "zlib-json"
+    header = b"\x01"
+
+    def __init__(self, level: int = 6) -> None:
+        self.level = level
+
+    def encode(self, value: Any) -> bytes:
+        payload = json.dumps(value, separators=(',', ':')).encode()
+        return self.header + zlib.compress(payload, self.level)
+
+    def decode(self, raw: Union[bytes, memoryview]) -> Any:
+        return json.loads(zlib.decompress(memoryview(raw)[1:]))
+
+
+class MsgpackCodec(Codec):
+    """
+    Needs the optional msgpack package.
+    """
+    name = "msgpack"
+    header = b"\x02"
+
+    def encode(self, value: Any) -> bytes:
+        if msgpack is None:
+            raise ImportError("The msgpack codec needs the msgpack package to be installed.")
+
+        return self.header + msgpack.packb(value, use_bin_type=True)
+
+    def decode(self, raw: Union[bytes, memoryview]) -> Any:
+        if msgpack is None:
+            raise ImportError("The msgpack codec needs the msgpack package to be installed.")
+
+        return msgpack.unpackb(memoryview(raw)[1:], raw=False)
+
+
+CODECS = {
+    codec.name: codec for codec in (PickleCodec(), ZlibJsonCodec(), MsgpackCodec())
+}  # type: Dict[str, Codec]
+
+_CODECS_BY_HEADER = {codec.header: codec for codec in CODECS.values()}  # type: Dict[bytes, Codec]
+
+
+def get_codec(name: str) -> Codec:
+    """
+    Looks up a codec by name.
+
+    :param name: One of CODECS
+    :return: Codec
+    """
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError(f"Unknown codec {name}, expected one of: {', '.join(CODECS)}") from None
+
+
+def encode(value: Any, codec: str) -> bytes:
+    """
+    Encodes a value with the named codec.
+
+    :param value: JSON-like value
+    :param codec: One of CODECS
+    :return: Encoded value, starting with the codec's header byte.
+    """
+    return get_codec(codec).encode(value)
+
+
+def decode(raw: Union[bytes, memoryview], allow_pickle: bool = True) -> Any:
+    """
+    Decodes a value written by any codec, picking the codec from the header byte.
+
+    :param raw: Encoded value, bytes or any bytes-like object
+    :param allow_pickle: Whether to decode pickle, which can run arbitrary code
+    :return: Decoded value
+    """
+    header = bytes(raw[:1])
+    try:
+        codec = _CODECS_BY_HEADER[header]
+    except KeyError:
+        raise ValueError(f"Unknown codec header {header!r}") from None
+
+    if not allow_pickle and isinstance(codec, PickleCodec):
+        raise ValueError("Refusing to decode pickle, write provisioning with another codec")
+
+    return codec.decode(raw)
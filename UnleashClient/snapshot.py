@@ -0,0 +1,175 @@
+"""
+On-disk copy of the last provisioning loaded from Redis, shared by the processes of a host.
+
+A snapshot file holds a header, the provisioning version, an index of feature names and each feature's provisioning
+encoded on its own.  Files are replaced atomically and read through mmap, so the processes reading a snapshot share
+its pages and only decode the features they look up.
+"""
+import mmap
+import os
+import struct
+import tempfile
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from UnleashClient import serialization
+from UnleashClient.constants import PROVISIONING_CODEC
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+_MAGIC = b"UNLS"
+_FORMAT_VERSION = 2
+# Magic, format version, length of the provisioning version, number of features
+_HEADER = struct.Struct("!4sBHI")
+# Offset and length of the feature name, offset and length of its encoded provisioning
+_INDEX_ENTRY = struct.Struct("!IIII")
+
+
+def write_snapshot(path: str, feature_provisioning: List[dict], version: str, codec: str = PROVISIONING_CODEC) -> None:
+    """
+    Atomically replaces the snapshot at path.
+
+    :param path: Snapshot file, its directory is created if needed
+    :param feature_provisioning: List of feature provisioning dicts
+    :param version: Version of the provisioning
+    :param codec: Name of the codec to encode each feature with, see UnleashClient.serialization.CODECS
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+
+    encoded_version = version.encode()
+    names = [provisioning["name"].encode() for provisioning in feature_provisioning]
+    values = [serialization.encode(provisioning, codec) for provisioning in feature_provisioning]
+
+    offset = _HEADER.size + len(encoded_version) + _INDEX_ENTRY.size * len(names)
+    index = []
+    for data in names + values:
+        index.append((offset, len(data)))
+        offset += len(data)
+
+    file_descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix='.snapshot-')
+    try:
+        with os.fdopen(file_descriptor, 'wb') as snapshot_file:
+            snapshot_file.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, len(encoded_version), len(names)))
+            snapshot_file.write(encoded_version)
+            for position in range(len(names)):
+                snapshot_file.write(_INDEX_ENTRY.pack(*index[position], *index[len(names) + position]))
+            for data in names + values:
+                snapshot_file.write(data)
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class FeatureSnapshot(Mapping):
+    """
+    Read-only view of a snapshot file, decoding the provisioning of a feature when it's looked up.
+
+    The file stays mapped until close(); replacing it on disk doesn't affect an open snapshot.
+    """
+    def __init__(self, path: str, allow_pickle: bool = True) -> None:
+        self._allow_pickle = allow_pickle
+
+        with open(path, 'rb') as snapshot_file:
+            if os.fstat(snapshot_file.fileno()).st_size < _HEADER.size:
+                raise ValueError(f"Truncated feature snapshot {path}")
+            self._mmap = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, format_version, version_length, count = _HEADER.unpack_from(self._mmap)
+            if magic != _MAGIC or format_version != _FORMAT_VERSION:
+                raise ValueError(f"Unsupported feature snapshot {path}")
+
+            self.version = self._mmap[_HEADER.size:_HEADER.size + version_length].decode()
+
+            index_start = _HEADER.size + version_length
+            self._index = {}  # type: Dict[str, Tuple[int, int]]
+            for position in range(count):
+                name_offset, name_length, value_offset, value_length = _INDEX_ENTRY.unpack_from(
+                    self._mmap, index_start + position * _INDEX_ENTRY.size
+                )
+                name = self._mmap[name_offset:name_offset + name_length].decode()
+                self._index[name] = (value_offset, value_length)
+        except Exception:
+            self._mmap.close()
+            raise
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __getitem__(self, name: str) -> Dict[str, Any]:
+        """
+        Decodes the provisioning of one feature, get() returns None instead of raising KeyError if it's missing.
+        """
+        offset, length = self._index[name]
+
+        with memoryview(self._mmap) as view, view[offset:offset + length] as raw_provisioning:
+            return serialization.decode(raw_provisioning, self._allow_pickle)
+
+    def provisioning(self) -> List[Dict[str, Any]]:
+        """
+        Decodes the provisioning of every feature.
+        """
+        return [self[name] for name in self._index]
+
+    def close(self) -> None:
+        self._mmap.close()
+
+
+def read_snapshot_version(path: str) -> Optional[str]:
+    """
+    Reads only the provisioning version of the snapshot at path.
+
+    :return: Version or None if there's no snapshot.
+    """
+    try:
+        with open(path, 'rb') as snapshot_file:
+            header = snapshot_file.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return None
+            magic, format_version, version_length, _ = _HEADER.unpack(header)
+            if magic != _MAGIC or format_version != _FORMAT_VERSION:
+                return None
+            return snapshot_file.read(version_length).decode()
+    except FileNotFoundError:
+        return None
+
+
+def try_lock(path: str):
+    """
+    Tries to take an exclusive lock on path without waiting, e.g. to elect the process refreshing the snapshot.
+
+    The lock is held until the returned file is closed or the process exits.  Without fcntl (Windows), every caller
+    gets the lock.
+
+    :return: Open lock file or None if another process holds the lock.
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    lock_file = open(path, 'a')
+
+    if fcntl is None:
+        return lock_file
+
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+
+    return lock_file
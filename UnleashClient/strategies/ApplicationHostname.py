@@ -1,4 +1,5 @@
 import platform
+from typing import Any, Callable, Mapping
 from UnleashClient.strategies.Strategy import Strategy
 
 
@@ -6,10 +7,14 @@ class ApplicationHostname(Strategy):
     def load_provisioning(self) -> list:
         return [x.strip() for x in self.parameters["hostNames"].split(',')]
 
-    def apply(self, context: dict = None) -> bool:
+    def apply(self, context: Mapping[str, Any] = None) -> bool:
         """
         Returns true if userId is a member of id list.
 
         :return:
         """
         return platform.node() in self.parsed_provisioning
+
+    def compile_apply(self) -> Callable[[Mapping[str, Any]], bool]:
+        hostname_match = platform.node() in self.parsed_provisioning
+        return lambda context: hostname_match
@@ -1,8 +1,9 @@
+from typing import Any, Mapping
 from UnleashClient.strategies.Strategy import Strategy
 
 
 class Default(Strategy):
-    def apply(self, context: dict = None) -> bool:
+    def apply(self, context: Mapping[str, Any] = None) -> bool:
         """
         Return true if enabled.
 
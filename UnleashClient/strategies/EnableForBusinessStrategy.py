@@ -1,4 +1,6 @@
+from typing import Any, Callable, Mapping
 from UnleashClient.strategies import Strategy
+from UnleashClient.utils import membership_check
 
 
 class EnableForBusinesses(Strategy):
@@ -7,7 +9,7 @@ class EnableForBusinesses(Strategy):
             x.strip() for x in self.parameters["business_via_names"].split(',')
         ]
 
-    def apply(self, context: dict = None) -> bool:
+    def apply(self, context: Mapping[str, Any] = None) -> bool:
         """
         Check if feature is enabled for given business or not
         
@@ -20,3 +22,6 @@ class EnableForBusinesses(Strategy):
             default_value = context["business_via_names"] in self.parsed_provisioning
 
         return default_value
+
+    def compile_apply(self) -> Callable[[Mapping[str, Any]], bool]:
+        return membership_check("business_via_names", self.parsed_provisioning)
@@ -1,11 +1,13 @@
+from typing import Any, Callable, Mapping
 from UnleashClient.strategies import Strategy
+from UnleashClient.utils import membership_check
 
 
 class EnableForExperts(Strategy):
     def load_provisioning(self) -> list:
         return [x.strip() for x in self.parameters["expert_emails"].split(',')]
 
-    def apply(self, context: dict = None) -> bool:
+    def apply(self, context: Mapping[str, Any] = None) -> bool:
         """
         Check if feature is enabled for expert or not
         
@@ -18,3 +20,6 @@ class EnableForExperts(Strategy):
             default_value = context["expert_emails"] in self.parsed_provisioning
 
         return default_value
+
+    def compile_apply(self) -> Callable[[Mapping[str, Any]], bool]:
+        return membership_check("expert_emails", self.parsed_provisioning)
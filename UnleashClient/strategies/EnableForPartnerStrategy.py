@@ -1,5 +1,6 @@
-
+from typing import Any, Callable, Mapping
 from UnleashClient.strategies import Strategy
+from UnleashClient.utils import membership_check
 
 
 class EnableForPartners(Strategy):
@@ -8,7 +9,7 @@ class EnableForPartners(Strategy):
             x.strip() for x in self.parameters["partner_names"].split(',')
         ]
 
-    def apply(self, context: dict = None) -> bool:
+    def apply(self, context: Mapping[str, Any] = None) -> bool:
         """
         Check if feature is enabled for given partner or not
         
@@ -21,3 +22,6 @@ class EnableForPartners(Strategy):
             default_value = context["partner_names"] in self.parsed_provisioning
 
         return default_value
+
+    def compile_apply(self) -> Callable[[Mapping[str, Any]], bool]:
+        return membership_check("partner_names", self.parsed_provisioning)
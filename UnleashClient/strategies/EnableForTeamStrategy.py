@@ -1,4 +1,6 @@
+from typing import Any, Callable, Mapping
 from UnleashClient.strategies import Strategy
+from UnleashClient.utils import membership_check
 
 
 class EnableForTeams(Strategy):
@@ -7,7 +9,7 @@ class EnableForTeams(Strategy):
             x.strip() for x in self.parameters["team_ids"].split(',')
         ]
 
-    def apply(self, context: dict = None) -> bool:
+    def apply(self, context: Mapping[str, Any] = None) -> bool:
         """
         Check if feature is enabled for given team or not
         
@@ -20,3 +22,6 @@ class EnableForTeams(Strategy):
             default_value = context["team_ids"] in self.parsed_provisioning
 
         return default_value
+
+    def compile_apply(self) -> Callable[[Mapping[str, Any]], bool]:
+        return membership_check("team_ids", self.parsed_provisioning)
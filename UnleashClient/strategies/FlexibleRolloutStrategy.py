@@ -1,6 +1,7 @@
 import random
+from typing import Any, Callable, Mapping
 from UnleashClient.strategies.Strategy import Strategy
-from UnleashClient.utils import normalized_hash
+from UnleashClient.utils import cached_normalized_hash
 
 
 class FlexibleRollout(Strategy):
@@ -8,7 +9,7 @@ class FlexibleRollout(Strategy):
     def random_hash() -> int:
         return random.randint(1, 100)
 
-    def apply(self, context: dict = None) -> bool:
+    def apply(self, context: Mapping[str, Any] = None) -> bool:
         """
         If constraints are satisfied, return a percentage rollout on provisioned.
 
@@ -20,15 +21,41 @@ class FlexibleRollout(Strategy):
 
         if stickiness == 'default':
             if 'userId' in context.keys():
-                calculated_percentage = normalized_hash(context['userId'], activation_group)
+                calculated_percentage = cached_normalized_hash(context['userId'], activation_group, context=context)
             elif 'sessionId' in context.keys():
-                calculated_percentage = normalized_hash(context['sessionId'], activation_group)
+                calculated_percentage = cached_normalized_hash(context['sessionId'], activation_group, context=context)
             else:
                 calculated_percentage = self.random_hash()
         elif stickiness in ['userId', 'sessionId']:
-            calculated_percentage = normalized_hash(context[stickiness], activation_group)
+            calculated_percentage = cached_normalized_hash(context[stickiness], activation_group, context=context)
         else:
             # This also handles the stickiness == random scenario.
             calculated_percentage = self.random_hash()
 
         return percentage > 0 and calculated_percentage <= percentage
+
+    def compile_apply(self) -> Callable[[Mapping[str, Any]], bool]:
+        percentage = int(self.parameters['rollout'])
+        activation_group = self.parameters['groupId']
+        stickiness = self.parameters['stickiness']
+        random_hash = self.random_hash
+
+        if percentage <= 0:
+            return lambda context: False
+
+        if stickiness == 'default':
+            def default_stickiness(context: Mapping[str, Any]) -> bool:
+                if 'userId' in context:
+                    calculated_percentage = cached_normalized_hash(context['userId'], activation_group, context=context)
+                elif 'sessionId' in context:
+                    calculated_percentage = cached_normalized_hash(context['sessionId'], activation_group, context=context)
+                else:
+                    calculated_percentage = random_hash()
+                return calculated_percentage <= percentage
+
+            return default_stickiness
+
+        if stickiness in ['userId', 'sessionId']:
+            return lambda context: cached_normalized_hash(context[stickiness], activation_group, context=context) <= percentage
+
+        return lambda context: random_hash() <= percentage
@@ -1,9 +1,10 @@
 import random
+from typing import Any, Callable, Mapping
 from UnleashClient.strategies.Strategy import Strategy
 
 
 class GradualRolloutRandom(Strategy):
-    def apply(self, context: dict = None) -> bool:
+    def apply(self, context: Mapping[str, Any] = None) -> bool:
         """
         Returns random assignment.
 
@@ -12,3 +13,12 @@ class GradualRolloutRandom(Strategy):
         percentage = int(self.parameters["percentage"])
 
         return percentage > 0 and random.randint(1, 100) <= percentage
+
+    def compile_apply(self) -> Callable[[Mapping[str, Any]], bool]:
+        percentage = int(self.parameters["percentage"])
+        randint = random.randint
+
+        if percentage <= 0:
+            return lambda context: False
+
+        return lambda context: randint(1, 100) <= percentage
@@ -1,9 +1,10 @@
-from UnleashClient.utils import normalized_hash
+from typing import Any, Callable, Mapping
+from UnleashClient.utils import cached_normalized_hash
 from UnleashClient.strategies.Strategy import Strategy
 
 
 class GradualRolloutUserId(Strategy):
-    def apply(self, context: dict = None) -> bool:
+    def apply(self, context: Mapping[str, Any] = None) -> bool:
         """
         Returns true if userId is a member of id list.
 
@@ -12,4 +13,13 @@ class GradualRolloutUserId(Strategy):
         percentage = int(self.parameters["percentage"])
         activation_group = self.parameters["groupId"]
 
-        return percentage > 0 and normalized_hash(context["userId"], activation_group) <= percentage
+        return percentage > 0 and cached_normalized_hash(context["userId"], activation_group, context=context) <= percentage
+
+    def compile_apply(self) -> Callable[[Mapping[str, Any]], bool]:
+        percentage = int(self.parameters["percentage"])
+        activation_group = self.parameters["groupId"]
+
+        if percentage <= 0:
+            return lambda context: False
+
+        return lambda context: cached_normalized_hash(context["userId"], activation_group, context=context) <= percentage
@@ -1,4 +1,5 @@
 import ipaddress
+from typing import Any, Callable, Mapping
 from UnleashClient.strategies.Strategy import Strategy
 from UnleashClient.utils import LOGGER
 
@@ -22,7 +23,7 @@ class RemoteAddress(Strategy):
 
         return parsed_ips
 
-    def apply(self, context: dict = None) -> bool:
+    def apply(self, context: Mapping[str, Any] = None) -> bool:
         """
         Returns true if IP is in list of IPs
 
@@ -48,3 +49,24 @@ class RemoteAddress(Strategy):
                         break
 
         return return_value
+
+    def compile_apply(self) -> Callable[[Mapping[str, Any]], bool]:
+        addresses = frozenset(
+            value for value in self.parsed_provisioning
+            if isinstance(value, (ipaddress.IPv4Address, ipaddress.IPv6Address))
+        )
+        networks = tuple(value for value in self.parsed_provisioning if value not in addresses)
+
+        def check(context: Mapping[str, Any]) -> bool:
+            try:
+                context_ip = ipaddress.ip_address(context["remoteAddress"])
+            except (ipaddress.AddressValueError, ipaddress.NetmaskValueError, ValueError) as parsing_error:
+                LOGGER.warning("Error parsing IP : %s", parsing_error)
+                return False
+
+            if context_ip in addresses:
+                return True
+
+            return any(context_ip in network for network in networks if network.version == context_ip.version)
+
+        return check
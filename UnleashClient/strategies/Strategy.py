@@ -1,5 +1,6 @@
 # pylint: disable=dangerous-default-value
 import warnings
+from typing import Any, Callable, Mapping
 from UnleashClient.constraints import Constraint
 
 
@@ -28,13 +29,13 @@ class Strategy:
         self.parsed_constraints = self.load_constraints(constraints)
         self.parsed_provisioning = self.load_provisioning()
 
-    def __call__(self, context: dict = None):
+    def __call__(self, context: Mapping[str, Any] = None):
         warnings.warn(
             "unleash-client-python v3.x.x requires overriding the execute() method instead of the __call__() method.",
             DeprecationWarning
         )
 
-    def execute(self, context: dict = None) -> bool:
+    def execute(self, context: Mapping[str, Any] = None) -> bool:
         """
         Executes the strategies by:
         - Checking constraints
@@ -50,6 +51,42 @@ class Strategy:
 
         return flag_state
 
+    def compile(self) -> Callable[[Mapping[str, Any]], bool]:
+        """
+        Builds the function Feature uses to evaluate this strategy.
+
+        The result behaves like execute(), but constraints are pre-compiled and checked in order until one fails.
+        Strategies that override execute() are evaluated through it unchanged.
+
+        :return: Function taking the context and returning True/False.
+        """
+        if type(self).execute is not Strategy.execute:
+            return self.execute
+
+        compiled_constraints = tuple(constraint.compile() for constraint in self.parsed_constraints)
+        compiled_apply = self.compile_apply()
+
+        if not compiled_constraints:
+            return compiled_apply
+
+        def evaluate(context: Mapping[str, Any]) -> bool:
+            for constraint in compiled_constraints:
+                if not constraint(context):
+                    return False
+            return compiled_apply(context)
+
+        return evaluate
+
+    def compile_apply(self) -> Callable[[Mapping[str, Any]], bool]:
+        """
+        Returns the function compile() uses in place of apply().
+
+        Override to do once, at load time, the parsing apply() would otherwise repeat on every call.
+
+        :return: Function taking the context and returning True/False.
+        """
+        return self.apply
+
     def load_constraints(self, constraints_list: list) -> list:  #pylint: disable=R0201
         """
         Loads constraints from provisioning.
@@ -72,7 +109,7 @@ class Strategy:
         """
         return []
 
-    def apply(self, context: dict = None) -> bool:  #pylint: disable=W0613,R0201
+    def apply(self, context: Mapping[str, Any] = None) -> bool:  #pylint: disable=W0613,R0201
         """
         Strategy implementation goes here.
 
@@ -1,11 +1,13 @@
+from typing import Any, Callable, Mapping
 from UnleashClient.strategies.Strategy import Strategy
+from UnleashClient.utils import membership_check
 
 
 class UserWithId(Strategy):
     def load_provisioning(self) -> list:
         return [x.strip() for x in self.parameters["userIds"].split(',')]
 
-    def apply(self, context: dict = None) -> bool:
+    def apply(self, context: Mapping[str, Any] = None) -> bool:
         """
         Returns true if userId is a member of id list.
 
@@ -17,3 +19,6 @@ class UserWithId(Strategy):
             return_value = context["userId"] in self.parsed_provisioning
 
         return return_value
+
+    def compile_apply(self) -> Callable[[Mapping[str, Any]], bool]:
+        return membership_check("userId", self.parsed_provisioning)
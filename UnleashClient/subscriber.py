@@ -0,0 +1,79 @@
+import threading
+from typing import Callable, Optional
+
+import redis
+
+from UnleashClient.constants import FEATURES_CHANNEL, FEATURES_SUBSCRIBER_RETRY_INTERVAL
+from UnleashClient.utils import LOGGER
+
+
+def _noop() -> None:
+    pass
+
+
+# pylint: disable=broad-except
+class ProvisioningSubscriber(threading.Thread):
+    """
+    Daemon thread listening for the provisioning updates published by store_provisioning().
+
+    * on_update(version) is called for every update.
+    * on_subscribe() is called once subscribed, including after a reconnect.  Updates published while unsubscribed
+      are lost, so this is the place to catch up.
+    * on_unsubscribe() is called when the subscription drops; it's retried every retry_interval seconds.
+
+    Callbacks run on this thread and must not raise.
+    """
+    def __init__(self,
+                 cache: redis.Redis,
+                 on_update: Callable[[Optional[str]], None],
+                 on_subscribe: Callable[[], None] = _noop,
+                 on_unsubscribe: Callable[[], None] = _noop,
+                 channel: str = FEATURES_CHANNEL,
+                 retry_interval: float = FEATURES_SUBSCRIBER_RETRY_INTERVAL) -> None:
+        super().__init__(name="unleash-provisioning-subscriber", daemon=True)
+        self.cache = cache
+        self.on_update = on_update
+        self.on_subscribe = on_subscribe
+        self.on_unsubscribe = on_unsubscribe
+        self.channel = channel
+        self.retry_interval = retry_interval
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.is_set():
+            pubsub = None
+            subscribed = False
+            try:
+                pubsub = self.cache.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                subscribed = True
+                self.on_subscribe()
+                self._listen(pubsub)
+            except Exception as excep:
+                LOGGER.warning("Provisioning subscription dropped, retrying in %s seconds: %s",
+                               self.retry_interval, excep)
+            finally:
+                if subscribed:
+                    self.on_unsubscribe()
+                if pubsub is not None:
+                    try:
+                        pubsub.reset()
+                    except Exception:
+                        pass
+
+            self._stopped.wait(self.retry_interval)
+
+    def _listen(self, pubsub) -> None:
+        while not self._stopped.is_set():
+            # Time out regularly to notice stop()
+            message = pubsub.get_message(timeout=1.0)
+
+            if message is not None and message['type'] == 'message':
+                version = message['data']
+                self.on_update(version.decode() if isinstance(version, bytes) else version)
+
+    def stop(self) -> None:
+        """
+        Stops listening within a second.
+        """
+        self._stopped.set()
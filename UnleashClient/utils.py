@@ -1,6 +1,10 @@
 import logging
+from functools import lru_cache
+from typing import Any, Callable, Collection, Mapping
 import mmh3  # pylint: disable=import-error
 from requests import Response
+from UnleashClient.constants import HASH_CACHE_SIZE
+from UnleashClient.context import Context
 
 LOGGER = logging.getLogger("mogambo")
 
@@ -11,7 +15,36 @@ def normalized_hash(identifier: str,
     return mmh3.hash("{}:{}".format(activation_group, identifier), signed=False) % normalizer + 1
 
 
-def get_identifier(context_key_name: str, context: dict) -> str:
+_lru_normalized_hash = lru_cache(maxsize=HASH_CACHE_SIZE)(normalized_hash)
+
+
+def cached_normalized_hash(identifier: Any,
+                           activation_group: str,
+                           normalizer: int = 100,
+                           context: Any = None) -> int:
+    """
+    normalized_hash() memoised per Context (when context is one) and in a bounded, process-wide LRU cache.
+
+    Only use for identifiers taken from the context: random seeds would just evict useful entries.
+    """
+    # Keyed on the identifier as normalized_hash() formats it: 1, 1.0 and True are equal but hash differently
+    key = ("{}".format(identifier), activation_group, normalizer)
+    memo = context.hashes if isinstance(context, Context) else None
+
+    if memo is not None and key in memo:
+        return memo[key]
+    value = _lru_normalized_hash(*key)
+
+    if memo is not None:
+        memo[key] = value
+
+    return value
+
+
+def get_identifier(context_key_name: str, context: Mapping[str, Any]) -> str:
+    if isinstance(context, Context):
+        return context.resolve(context_key_name)
+
     if context_key_name in context.keys():
         value = context[context_key_name]
     elif 'properties' in context.keys() and context_key_name in context['properties'].keys():
@@ -22,6 +55,39 @@ def get_identifier(context_key_name: str, context: dict) -> str:
     return value
 
 
+def freeze_values(values: Collection) -> Collection:
+    """
+    Returns values as a frozenset for O(1) membership checks, or as a tuple if a value isn't hashable.
+    """
+    try:
+        return frozenset(values)
+    except TypeError:
+        return tuple(values)
+
+
+def is_member(value: Any, frozen_values: Collection, values: Collection) -> bool:
+    """
+    Checks value in frozen_values, as returned by freeze_values(values), falling back to scanning values when value
+    isn't hashable.
+    """
+    try:
+        return value in frozen_values
+    except TypeError:
+        return value in values
+
+
+def membership_check(context_key_name: str, values: Collection) -> Callable[[Mapping[str, Any]], bool]:
+    """
+    Builds a check that returns True if the top-level context value for context_key_name is one of values.
+    """
+    frozen_values = freeze_values(values)
+
+    def check(context: Mapping[str, Any]) -> bool:
+        return context_key_name in context and is_member(context[context_key_name], frozen_values, values)
+
+    return check
+
+
 def log_resp_info(resp: Response) -> None:
     LOGGER.debug("HTTP status code: %s", resp.status_code)
     LOGGER.debug("HTTP headers: %s", resp.headers)
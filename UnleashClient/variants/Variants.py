@@ -1,44 +1,82 @@
 import random
-import copy
-from typing import Dict
+from bisect import bisect_left
+from itertools import accumulate
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
 from UnleashClient import utils
 from UnleashClient.constants import DISABLED_VARIATION
 
 
+def _freeze(value: Any) -> Any:
+    """
+    Read-only copy of a JSON-like value: dicts become MappingProxyType and lists tuples.
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+_DISABLED_VARIANT = _freeze(DISABLED_VARIATION)
+
+
 class Variants():
     def __init__(self, variants_list: list, feature_name: str) -> None:
         """
         Represents an A/B test
 
+        Everything get_variant() needs is precomputed here, so changes to variants_list afterwards are ignored.
+
         variants_list = From the strategy document.
         """
         self.variants = variants_list
         self.feature_name = feature_name
-
-    def _apply_overrides(self, context: dict) -> dict:
+        # Provisioning may hold "variants": null, which selects the disabled variant
+        variants_list = variants_list or []
+
+        # Results of get_variant(), shared by all callers and so read-only
+        self.formatted_variants = tuple(
+            _freeze({**self._format_variation(variant), 'enabled': True}) for variant in variants_list
+        )  # type: Tuple[Mapping, ...]
+        self.cumulative_weights = tuple(accumulate(variant['weight'] for variant in variants_list))
+        self.total_weight = self.cumulative_weights[-1] if self.cumulative_weights else 0
+
+        # contextName => value => (position of the variant, variant), the last variant wins as values can repeat
+        self.overrides = {}  # type: Dict[str, Dict[Any, Tuple[int, Mapping]]]
+        for position, variant in enumerate(variants_list):
+            for override in variant.get('overrides', []):
+                values = self.overrides.setdefault(override['contextName'], {})
+                for value in override['values']:
+                    values[value] = (position, self.formatted_variants[position])
+
+    def _apply_overrides(self, context: Mapping[str, Any]) -> Optional[Mapping]:
         """
         Figures out if an override should be applied based on a context.
 
         Notes:
-            - This matches only the first variant found.
+            - If several variants match, the last one (in provisioning order) is applied.
         """
-        variants_with_overrides = [x for x in self.variants if 'overrides' in x.keys()]
-        override_variant = {}  # type: Dict
+        override = None  # type: Optional[Mapping]
+        override_position = -1
 
-        for variant in variants_with_overrides:
-            for override in variant['overrides']:
-                identifier = utils.get_identifier(override['contextName'], context)
-                if identifier in override["values"]:
-                    override_variant = variant
+        for context_name, values in self.overrides.items():
+            try:
+                match = values.get(utils.get_identifier(context_name, context))
+            except TypeError:
+                # Unhashable context value, can't match
+                continue
+            if match is not None and match[0] > override_position:
+                override_position, override = match
 
-        return override_variant
+        return override
 
     @staticmethod
-    def _get_seed(context: dict) -> str:
+    def _get_sticky_seed(context: Mapping[str, Any]) -> Optional[str]:
         """
-        Grabs seed value from context.
+        Grabs seed value from context, None if the context doesn't have one.
         """
-        seed = str(random.random() * 10000)
+        seed = None
 
         if 'userId' in context:
             seed = context['userId']
@@ -49,39 +87,47 @@ class Variants():
 
         return seed
 
+    @staticmethod
+    def _get_seed(context: Mapping[str, Any]) -> str:
+        """
+        Grabs seed value from context, falls back to a random one.
+        """
+        seed = Variants._get_sticky_seed(context)
+
+        if seed is None:
+            seed = str(random.random() * 10000)
+
+        return seed
+
     @staticmethod
     def _format_variation(variation: dict) -> dict:
-        formatted_variation = copy.deepcopy(variation)
-        del formatted_variation['weight']
-        if 'overrides' in formatted_variation:
-            del formatted_variation['overrides']
-        return formatted_variation
+        return {key: value for key, value in variation.items() if key not in ('weight', 'overrides')}
 
-    def get_variant(self, context: dict) -> dict:
+    def get_variant(self, context: Mapping[str, Any]) -> Mapping:
         """
         Determines what variation a user is in.
 
         :param context:
-        :return:
+        :return: Read-only variant, with 'enabled' set.
         """
-        fallback_variant = copy.deepcopy(DISABLED_VARIATION)
-
-        if self.variants:
+        if self.overrides:
             override_variant = self._apply_overrides(context)
-            if override_variant:
-                return self._format_variation(override_variant)
+            if override_variant is not None:
+                return override_variant
 
-            total_weight = sum([x['weight'] for x in self.variants])
-            if total_weight <= 0:
-                return fallback_variant
+        if self.total_weight <= 0:
+            return _DISABLED_VARIANT
 
-            target = utils.normalized_hash(self._get_seed(context), self.feature_name, total_weight)
-            counter = 0
-            for variation in self.variants:
-                counter += variation['weight']
+        seed = self._get_sticky_seed(context)
+        if seed is None:
+            target = utils.normalized_hash(self._get_seed(context), self.feature_name, self.total_weight)
+        else:
+            target = utils.cached_normalized_hash(seed, self.feature_name, self.total_weight, context=context)
 
-                if counter >= target:
-                    return self._format_variation(variation)
+        # First variant whose cumulative weight reaches the target
+        position = bisect_left(self.cumulative_weights, target)
+        if position < len(self.formatted_variants):
+            return self.formatted_variants[position]
 
         # Catch all return.
-        return fallback_variant
+        return _DISABLED_VARIANT
@@ -0,0 +1,56 @@
+"""
+Measures feature evaluation throughput while the metrics flusher sends to a local stub server, slow or failing.
+
+Usage: python benchmarks/metrics_flusher.py [number of threads] [evaluations per thread]
+"""
+import sys
+import threading
+import time
+
+from tests.utilities.metrics_server import MetricsServer
+from UnleashClient.features import Feature
+from UnleashClient.metrics_flusher import MetricsFlusher
+from UnleashClient.strategies import Default
+
+
+def evaluate(features: dict, thread_count: int, evaluations: int) -> float:
+    """
+    Evaluates every feature evaluations times from each of thread_count threads.
+
+    :return: Evaluations per second
+    """
+    def run() -> None:
+        for _ in range(evaluations):
+            for feature in features.values():
+                feature.is_enabled({})
+
+    threads = [threading.Thread(target=run) for _ in range(thread_count)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return thread_count * evaluations * len(features) / (time.perf_counter() - start)
+
+
+def main(thread_count: int = 8, evaluations: int = 20000) -> None:
+    features = {f"feature_{index}": Feature(f"feature_{index}", True, [Default()]) for index in range(10)}
+    print(f"{thread_count} threads, {evaluations} evaluations of {len(features)} features each")
+    print(f"{'scenario':<24}{'evaluations/s':>16}{'requests':>10}")
+
+    print(f"{'no flusher':<24}{evaluate(features, thread_count, evaluations):>16,.0f}{0:>10}")
+
+    for name, server in (("slow server (1s)", MetricsServer(delay=1)),
+                         ("failing server", MetricsServer(statuses=[500] * 1000))):
+        with server:
+            flusher = MetricsFlusher(server.url, "benchmark", "benchmark", {}, {}, lambda: features, interval=0.1)
+            flusher.start()
+            throughput = evaluate(features, thread_count, evaluations)
+            flusher.stop()
+            flusher.join()
+        print(f"{name:<24}{throughput:>16,.0f}{len(server.requests):>10}")
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
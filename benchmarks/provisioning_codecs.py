@@ -0,0 +1,68 @@
+"""
+Compares the provisioning codecs on blob size and encode/decode time.
+
+Usage: python benchmarks/provisioning_codecs.py [number of features] [number of runs]
+"""
+import random
+import string
+import sys
+import timeit
+
+from UnleashClient import serialization
+
+
+def _random_name(length: int = 12) -> str:
+    return ''.join(random.choice(string.ascii_lowercase) for _ in range(length))
+
+
+def build_provisioning(feature_count: int) -> dict:
+    """
+    Builds an /api/client/features response body shaped like what FeatureToggles stores.
+    """
+    features = []
+
+    for index in range(feature_count):
+        features.append({
+            "name": f"cas.production.feature_{index}",
+            "description": "",
+            "enabled": True,
+            "strategies": [
+                {
+                    "name": "EnableForDomains",
+                    "parameters": {"domain_names": ",".join(_random_name() for _ in range(20))}
+                },
+                {
+                    "name": "flexibleRollout",
+                    "parameters": {"rollout": "50", "stickiness": "default", "groupId": f"feature_{index}"},
+                    "constraints": [{"contextName": "environment", "operator": "IN", "values": ["production"]}]
+                }
+            ],
+            "variants": [
+                {"name": "a", "weight": 500, "payload": {"type": "string", "value": "a"}, "overrides": []},
+                {"name": "b", "weight": 500, "payload": {"type": "string", "value": "b"}, "overrides": []}
+            ],
+            "createdAt": "2020-11-20T10:00:00.000Z"
+        })
+
+    return {"version": 1, "features": features}
+
+
+def main(feature_count: int = 1000, runs: int = 50) -> None:
+    provisioning = build_provisioning(feature_count)
+    print(f"{feature_count} features, best of {runs} runs")
+    print(f"{'codec':<12}{'size (bytes)':>14}{'encode (ms)':>14}{'decode (ms)':>14}")
+
+    for name, codec in serialization.CODECS.items():
+        try:
+            raw = codec.encode(provisioning)
+        except ImportError as excep:
+            print(f"{name:<12}skipped: {excep}")
+            continue
+
+        encode_time = min(timeit.repeat(lambda: codec.encode(provisioning), number=1, repeat=runs))
+        decode_time = min(timeit.repeat(lambda: serialization.decode(raw), number=1, repeat=runs))
+        print(f"{name:<12}{len(raw):>14}{encode_time * 1000:>14.3f}{decode_time * 1000:>14.3f}")
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -23,6 +23,7 @@ setup(
                       "fcache==0.4.7",
                       "mmh3==2.5.1",
                       "apscheduler==3.6.3"],
+    extras_require={"msgpack": ["msgpack"]},
     tests_require=['pytest', "mimesis", "responses", 'pytest-mock'],
     zip_safe=False,
     include_package_data=True,
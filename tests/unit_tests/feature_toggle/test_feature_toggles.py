@@ -0,0 +1,181 @@
+import pytest
+from FeatureToggle import FeatureToggles, FeatureToggleIndex, compile_feature_toggles, parse_feature_toggles
+from UnleashClient import constants as consts
+from UnleashClient.loader import store_provisioning
+from tests.utilities.mocks import MockRedis
+
+FEATURE_TOGGLES = [
+    {
+        "name": "haptik.production.enable_smart_skills",
+        "strategies": [
+            {"name": "EnableForDomains", "parameters": {"domain_names": "domain_a, domain_b"}},
+            {"name": "EnableForPartners", "parameters": {"partner_names": "Platform Demo"}}
+        ]
+    },
+    {
+        "name": "haptik.production.enable_language_support",
+        "strategies": [
+            {"name": "EnableForDomains", "parameters": {"domain_names": "domain_b"}},
+            {"name": "EnableForTeams", "parameters": {"team_ids": "1,2"}}
+        ]
+    },
+    {
+        "name": "haptik.staging.enable_smart_skills",
+        "strategies": [
+            {"name": "EnableForDomains", "parameters": {"domain_names": "domain_c"}}
+        ]
+    },
+    {
+        "name": "malformed",
+        "strategies": []
+    }
+]
+
+
+@pytest.fixture()
+def toggles_cache(mocker):
+    cache = MockRedis()
+    mocker.patch.object(FeatureToggles, "_FeatureToggles__cache", cache)
+    mocker.patch.object(FeatureToggles, "_FeatureToggles__cas_name", "haptik")
+    mocker.patch.object(FeatureToggles, "_FeatureToggles__environment", "production")
+    FeatureToggles.fetch_feature_toggles.cache_clear()
+    yield cache
+    FeatureToggles.fetch_feature_toggles.cache_clear()
+
+
+def test_parse_feature_toggles():
+    feature_toggles = parse_feature_toggles(FEATURE_TOGGLES, "haptik", "production")
+
+    assert set(feature_toggles.keys()) == {"enable_smart_skills", "enable_language_support"}
+    assert feature_toggles["enable_smart_skills"]["domain_names"] == frozenset({"domain_a", "domain_b"})
+    assert feature_toggles["enable_smart_skills"]["partner_names"] == frozenset({"Platform Demo"})
+    assert feature_toggles["enable_smart_skills"]["team_ids"] == frozenset()
+    assert feature_toggles["enable_language_support"]["team_ids"] == frozenset({"1", "2"})
+
+
+def test_enabled_features_for(mocker):
+    mocker.patch.object(FeatureToggles, "fetch_feature_toggles",
+                        return_value=parse_feature_toggles(FEATURE_TOGGLES, "haptik", "production"))
+
+    assert FeatureToggles.is_enabled_for_domain("enable_smart_skills", "domain_a")
+    assert not FeatureToggles.is_enabled_for_domain("enable_language_support", "domain_a")
+    assert FeatureToggles.enabled_features_for(domain_name="domain_b") == {
+        "enable_smart_skills", "enable_language_support"
+    }
+    assert FeatureToggles.enabled_features_for(domain_name="domain_a", team_id="2") == {
+        "enable_smart_skills", "enable_language_support"
+    }
+    assert FeatureToggles.enabled_features_for(domain_name="domain_c") == set()
+    assert FeatureToggles.enabled_features_for() == set()
+
+
+def test_feature_toggle_index():
+    toggle_index = FeatureToggleIndex(parse_feature_toggles(FEATURE_TOGGLES, "haptik", "production"))
+
+    assert toggle_index.features_for("domain_names", "domain_b") == {"enable_smart_skills", "enable_language_support"}
+    assert toggle_index.features_for("partner_names", "Platform Demo") == {"enable_smart_skills"}
+    assert toggle_index.features_for("team_ids", "3") == frozenset()
+    assert toggle_index.features_for("unknown", "domain_b") == frozenset()
+
+
+def test_parse_and_compile_feature_names():
+    feature_toggles = [
+        {"name": "haptik.production.haptik.production.nested", "strategies": []},
+        {"name": "haptik.production.dotted.name", "strategies": []}
+    ]
+
+    parsed = parse_feature_toggles(feature_toggles, "haptik", "production")
+    compiled = compile_feature_toggles(feature_toggles)["haptik.production"]
+
+    assert set(parsed.keys()) == set(compiled.keys()) == {"haptik.production.nested", "dotted.name"}
+
+
+def test_compile_feature_toggles():
+    compiled = compile_feature_toggles(FEATURE_TOGGLES)
+
+    assert set(compiled.keys()) == {"haptik.production", "haptik.staging"}
+    assert compiled["haptik.production"]["enable_smart_skills"]["domain_names"] == ["domain_a", "domain_b"]
+    assert compiled["haptik.staging"]["enable_smart_skills"]["domain_names"] == ["domain_c"]
+
+
+def test_fetch_feature_toggles_compiled(toggles_cache):
+    FeatureToggles.update_cache(FEATURE_TOGGLES)
+    toggles_cache.calls = []
+
+    assert FeatureToggles.fetch_feature_toggles() == parse_feature_toggles(FEATURE_TOGGLES, "haptik", "production")
+    assert ('get', consts.FEATURES_URL) not in toggles_cache.calls
+
+
+def test_fetch_feature_toggles_outdated_compiled(toggles_cache):
+    FeatureToggles.update_cache(FEATURE_TOGGLES)
+    # Written without compiled toggles, e.g. by an older client
+    store_provisioning(toggles_cache, FEATURE_TOGGLES[1:])
+
+    assert FeatureToggles.fetch_feature_toggles() == parse_feature_toggles(FEATURE_TOGGLES[1:], "haptik", "production")
+    assert ('get', consts.FEATURES_URL) in toggles_cache.calls
+
+
+def test_fetch_feature_toggle(toggles_cache):
+    FeatureToggles.update_cache(FEATURE_TOGGLES)
+    toggles_cache.calls = []
+
+    assert FeatureToggles.fetch_feature_toggle("enable_language_support")["team_ids"] == frozenset({"1", "2"})
+    assert FeatureToggles.fetch_feature_toggle("unknown") is None
+    assert ('get', consts.FEATURES_URL) not in toggles_cache.calls
+
+    # Shard out of date, served from the whole provisioning
+    store_provisioning(toggles_cache, FEATURE_TOGGLES[1:])
+    assert FeatureToggles.fetch_feature_toggle("enable_smart_skills") is None
+    assert FeatureToggles.fetch_feature_toggle("enable_language_support")["domain_names"] == frozenset({"domain_b"})
+
+
+def test_update_cache_deletes_removed_shards(toggles_cache, mocker):
+    staging_shard = consts.FEATURE_TOGGLES_SHARD_KEY.format("haptik.staging")
+    FeatureToggles.update_cache(FEATURE_TOGGLES)
+    assert staging_shard in toggles_cache.data
+
+    # Last staging toggle removed
+    FeatureToggles.update_cache(FEATURE_TOGGLES[:2])
+    assert staging_shard not in toggles_cache.data
+    assert toggles_cache.smembers(consts.FEATURES_SHARDS_KEY) == {
+        consts.FEATURE_TOGGLES_SHARD_KEY.format("haptik.production")
+    }
+
+    mocker.patch.object(FeatureToggles, "_FeatureToggles__environment", "staging")
+    FeatureToggles.fetch_feature_toggles.cache_clear()
+    assert FeatureToggles.fetch_feature_toggles() == {}
+
+    # Written without shards, e.g. by an older client
+    store_provisioning(toggles_cache, FEATURE_TOGGLES)
+    assert consts.FEATURES_SHARDS_KEY not in toggles_cache.data
+    assert consts.FEATURE_TOGGLES_SHARD_KEY.format("haptik.production") not in toggles_cache.data
+
+
+def test_feature_toggles_read_cache(toggles_cache, mocker):
+    read_cache = MockRedis()
+    mocker.patch.object(FeatureToggles, "_FeatureToggles__read_cache", read_cache)
+
+    FeatureToggles.update_cache(FEATURE_TOGGLES)
+    assert read_cache.calls == []
+
+    # Replica caught up
+    read_cache.data = dict(toggles_cache.data)
+    toggles_cache.calls = []
+    assert FeatureToggles.fetch_feature_toggles() == parse_feature_toggles(FEATURE_TOGGLES, "haptik", "production")
+    assert toggles_cache.calls == []
+
+
+def test_fetch_feature_toggles_reload_error(toggles_cache, mocker):
+    FeatureToggles.update_cache(FEATURE_TOGGLES)
+    toggles = FeatureToggles.fetch_feature_toggles()
+
+    FeatureToggles.update_cache(FEATURE_TOGGLES[1:])
+    read_shard = mocker.patch("FeatureToggle.read_provisioning_shard", side_effect=ConnectionError("Redis is down"))
+    FeatureToggles.fetch_feature_toggles.invalidate()
+    assert FeatureToggles.fetch_feature_toggles() == toggles
+
+    # Retried at the next revalidation
+    read_shard.side_effect = None
+    read_shard.return_value = compile_feature_toggles(FEATURE_TOGGLES[1:])["haptik.production"]
+    FeatureToggles.fetch_feature_toggles.invalidate()
+    assert FeatureToggles.fetch_feature_toggles() == parse_feature_toggles(FEATURE_TOGGLES[1:], "haptik", "production")
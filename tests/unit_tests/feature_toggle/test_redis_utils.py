@@ -0,0 +1,53 @@
+from FeatureToggle.redis_utils import RedisConnector
+from UnleashClient.constants import REDIS_POOL_OPTIONS, REDIS_SUBSCRIBER_POOL_OPTIONS
+
+
+def test_sentinel_connection_master(mocker):
+    sentinel = mocker.patch("FeatureToggle.redis_utils.Sentinel")
+
+    connection = RedisConnector.get_sentinel_connection([("localhost", 26379)], "mymaster", 0)
+    assert connection is sentinel.return_value.master_for.return_value
+    sentinel.return_value.master_for.assert_called_once_with("mymaster", db=0, **REDIS_POOL_OPTIONS)
+    sentinel.return_value.slave_for.assert_not_called()
+
+
+def test_sentinel_connection_replicas(mocker):
+    sentinel = mocker.patch("FeatureToggle.redis_utils.Sentinel")
+
+    connection = RedisConnector.get_sentinel_connection([("localhost", 26379)], "mymaster", 0, True, "secret",
+                                                        read_from_replicas=True)
+    assert connection is sentinel.return_value.slave_for.return_value
+    sentinel.return_value.slave_for.assert_called_once_with("mymaster", password="secret", db=0,
+                                                            **REDIS_POOL_OPTIONS)
+    sentinel.return_value.master_for.assert_not_called()
+
+
+def test_get_connection_shared(mocker):
+    mocker.patch.dict("FeatureToggle.redis_utils._connections", clear=True)
+
+    connection = RedisConnector.get_connection("localhost", 6379, 0)
+    assert RedisConnector.get_connection("localhost", 6379, 0) is connection
+    assert RedisConnector.get_connection("localhost", 6379, 1) is not connection
+    assert connection.connection_pool.connection_kwargs["socket_timeout"] == 5
+
+    tuned = RedisConnector.get_connection("localhost", 6379, 0, pool_options={"max_connections": 10,
+                                                                              "socket_timeout": 1})
+    assert tuned is not connection
+    assert tuned.connection_pool.max_connections == 10
+    assert tuned.connection_pool.connection_kwargs["socket_timeout"] == 1
+
+
+def test_get_connection_registry_key(mocker):
+    connections = mocker.patch.dict("FeatureToggle.redis_utils._connections", clear=True)
+
+    options = {"socket_keepalive_options": {1: 5}}
+    connection = RedisConnector.get_connection("localhost", 6379, 0, True, "secret", pool_options=options)
+    assert RedisConnector.get_connection("localhost", 6379, 0, True, "secret",
+                                         pool_options={"socket_keepalive_options": {1: 5}}) is connection
+    assert "secret" not in repr(list(connections))
+
+    subscriber = RedisConnector.get_connection("localhost", 6379, 0, True, "secret",
+                                               pool_options={**options, **REDIS_SUBSCRIBER_POOL_OPTIONS})
+    assert subscriber is not connection
+    assert len(connections) == 2
+    assert subscriber.connection_pool.connection_kwargs["socket_timeout"] is None
@@ -0,0 +1,122 @@
+import queue
+import time
+import redis
+from FeatureToggle.redis_utils import TrackingRedis
+from UnleashClient.constants import FEATURES_URL, FEATURES_VERSION_KEY
+from tests.utilities.mocks import MockRedis
+
+
+class MockTrackingConnection:
+    def __init__(self, tracking_response=b'OK'):
+        self.commands = []
+        self.responses = queue.Queue()
+        self.tracking_response = tracking_response
+        self.disconnected = False
+
+    def send_command(self, *args):
+        self.commands.append(args)
+        if args[0] == 'CLIENT' and args[1] == 'ID':
+            self.responses.put(7)
+        elif args[0] == 'CLIENT':
+            self.responses.put(self.tracking_response)
+        else:
+            self.responses.put([b'subscribe', args[1].encode(), 1])
+
+    def can_read(self, timeout=0):
+        return not self.responses.empty()
+
+    def read_response(self):
+        response = self.responses.get_nowait()
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def disconnect(self):
+        self.disconnected = True
+
+
+class MockPool:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def make_connection(self):
+        return self.connection
+
+
+def tracking_cache(connection):
+    cache = MockRedis({FEATURES_VERSION_KEY: b'1', "other": b'x'})
+    cache.connection_pool = MockPool(connection)
+    tracking = TrackingRedis(cache, retry_interval=60)
+
+    deadline = time.monotonic() + 5
+    while not tracking._tracking and tracking._listener.is_alive() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return cache, tracking
+
+
+def test_tracking_redis_caches_until_invalidated():
+    connection = MockTrackingConnection()
+    cache, tracking = tracking_cache(connection)
+
+    assert connection.commands[1] == ('CLIENT', 'TRACKING', 'ON', 'REDIRECT', 7, 'BCAST', 'PREFIX', FEATURES_URL)
+    assert tracking.get(FEATURES_VERSION_KEY) == b'1'
+    assert tracking.get(FEATURES_VERSION_KEY) == b'1'
+    assert tracking.get("other") == b'x'
+    assert tracking.get("other") == b'x'
+    assert cache.calls == [('get', FEATURES_VERSION_KEY), ('get', "other"), ('get', "other")]
+
+    cache.data[FEATURES_VERSION_KEY] = b'2'
+    connection.responses.put([b'message', b'__redis__:invalidate', [FEATURES_VERSION_KEY.encode()]])
+    deadline = time.monotonic() + 5
+    while FEATURES_VERSION_KEY in tracking._values and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert tracking.get(FEATURES_VERSION_KEY) == b'2'
+
+    tracking.close()
+
+
+def test_tracking_redis_drops_cache_on_disconnect():
+    connection = MockTrackingConnection()
+    cache, tracking = tracking_cache(connection)
+    tracking.get(FEATURES_VERSION_KEY)
+
+    connection.responses.put(redis.exceptions.ConnectionError("Connection closed by server."))
+    deadline = time.monotonic() + 5
+    while not connection.disconnected and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert not tracking._tracking
+    assert tracking._values == {}
+    tracking.get(FEATURES_VERSION_KEY)
+    assert tracking._values == {}
+    tracking.close()
+
+
+def test_tracking_redis_unsupported():
+    connection = MockTrackingConnection(tracking_response=redis.exceptions.ResponseError("unknown subcommand"))
+    cache, tracking = tracking_cache(connection)
+    tracking._listener.join(5)
+
+    assert not tracking._listener.is_alive()
+    tracking.get(FEATURES_VERSION_KEY)
+    tracking.get(FEATURES_VERSION_KEY)
+    assert cache.calls == [('get', FEATURES_VERSION_KEY), ('get', FEATURES_VERSION_KEY)]
+
+
+def test_tracking_redis_resets_after_fork(mocker):
+    connection = MockTrackingConnection()
+    cache, tracking = tracking_cache(connection)
+    tracking.get(FEATURES_VERSION_KEY)
+    cache.data[FEATURES_VERSION_KEY] = b'2'
+
+    child_pid = tracking._pid + 1
+    mocker.patch("FeatureToggle.redis_utils.os.getpid", return_value=child_pid)
+    start_listener = mocker.patch.object(tracking, "_start_listener",
+                                         side_effect=lambda: setattr(tracking, "_pid", child_pid))
+
+    assert tracking.get(FEATURES_VERSION_KEY) == b'2'
+    assert not tracking._tracking
+    assert tracking._values == {}
+    tracking.get(FEATURES_VERSION_KEY)
+    start_listener.assert_called_once_with()
+    tracking.close()
@@ -0,0 +1,157 @@
+import threading
+import time
+import pytest
+from FeatureToggle.utils import versioned_cache
+
+
+class VersionSource:
+    def __init__(self):
+        self.version = "1"
+        self.loads = 0
+
+    def get_version(self):
+        return self.version
+
+    def load(self):
+        self.loads += 1
+        return {"version": self.version}
+
+
+def test_versioned_cache_revalidates_on_version_change():
+    source = VersionSource()
+    cached = versioned_cache(source.get_version, revalidate_seconds=0)(source.load)
+
+    assert cached() == {"version": "1"}
+    assert cached() == {"version": "1"}
+    assert source.loads == 1
+
+    source.version = "2"
+    assert cached() == {"version": "2"}
+    assert source.loads == 2
+    assert cached.cache_info() == (2, 1, 1)
+
+
+def test_versioned_cache_within_interval():
+    source = VersionSource()
+    cached = versioned_cache(source.get_version, revalidate_seconds=60)(source.load)
+
+    cached()
+    source.version = "2"
+    assert cached() == {"version": "1"}
+
+    cached.invalidate()
+    assert cached() == {"version": "2"}
+
+
+def test_versioned_cache_version_error_serves_stale():
+    source = VersionSource()
+    cached = versioned_cache(source.get_version, revalidate_seconds=0)(source.load)
+    cached()
+
+    def broken_version():
+        raise ConnectionError("Redis is down")
+
+    cached.version_func = broken_version
+    assert cached() == {"version": "1"}
+    assert source.loads == 1
+
+
+def test_versioned_cache_load_error_keeps_previous():
+    source = VersionSource()
+    calls = []
+
+    def flaky_load():
+        calls.append(1)
+        if len(calls) == 2:
+            raise ConnectionError("Redis is down")
+        return source.load()
+
+    cached = versioned_cache(source.get_version, revalidate_seconds=0)(flaky_load)
+    cached()
+
+    source.version = "2"
+    assert cached() == {"version": "1"}
+    assert cached._version == "1"
+
+    # Retried at the next revalidation
+    assert cached() == {"version": "2"}
+    assert source.loads == 2
+
+
+def test_versioned_cache_first_load_error():
+    source = VersionSource()
+    calls = []
+
+    def flaky_load():
+        calls.append(1)
+        if len(calls) == 1:
+            raise ConnectionError("Redis is down")
+        return source.load()
+
+    with pytest.raises(ConnectionError):
+        versioned_cache(source.get_version, revalidate_seconds=0)(flaky_load)()
+
+    calls.clear()
+    cached = versioned_cache(source.get_version, revalidate_seconds=0, default={})(flaky_load)
+    assert cached() == {}
+    assert cached() == {"version": "1"}
+
+
+def test_versioned_cache_single_flight():
+    source = VersionSource()
+    release = threading.Event()
+
+    def slow_load():
+        release.wait(5)
+        return source.load()
+
+    cached = versioned_cache(source.get_version, revalidate_seconds=0)(slow_load)
+    release.set()
+    cached()
+
+    release.clear()
+    source.version = "2"
+    refresher = threading.Thread(target=cached)
+    refresher.start()
+    time.sleep(0.1)
+
+    # Served stale while the refresh is in flight.
+    assert cached() == {"version": "1"}
+    release.set()
+    refresher.join()
+    assert cached() == {"version": "2"}
+    assert source.loads == 2
+
+
+def test_versioned_cache_invalidate_during_revalidation():
+    source = VersionSource()
+    reading = threading.Event()
+    release = threading.Event()
+
+    def slow_version():
+        version = source.version
+        if release.is_set():
+            return version
+        reading.set()
+        release.wait(5)
+        return version
+
+    cached = versioned_cache(slow_version, revalidate_seconds=60)(source.load)
+    release.set()
+    cached()
+
+    release.clear()
+    cached.invalidate()
+    refresher = threading.Thread(target=cached)
+    refresher.start()
+    reading.wait(5)
+
+    # Pushed while the refresher holds the lock with the old version
+    source.version = "2"
+    cached.invalidate()
+    assert cached() == {"version": "1"}
+    release.set()
+    refresher.join()
+
+    assert cached._version == "2"
+    assert cached() == {"version": "2"}
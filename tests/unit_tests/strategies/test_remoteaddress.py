@@ -38,3 +38,10 @@ def test_ipv6_value(strategy):
 
 def test_garbage_value(strategy):
     assert not strategy.execute(context={"remoteAddress": "WTFISTHISURCRAZY"})
+
+
+def test_compiled_matches_execute(strategy):
+    compiled = strategy.compile()
+    for address in ["69.208.0.1", "70.208.1.1", "2001:db8:1234::1", "2002:db8:1234::1", "1.1.1.1", "garbage"]:
+        context = {"remoteAddress": address}
+        assert compiled(context) == strategy.execute(context)
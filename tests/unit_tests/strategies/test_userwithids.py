@@ -16,3 +16,11 @@ def test_userwithid(strategy):
 
 def test_userwithid_missing_parameter(strategy):
     assert not strategy.execute(context={})
+
+
+def test_userwithid_compiled(strategy):
+    compiled = strategy.compile()
+    assert compiled(CONTEXT)
+    assert not compiled({})
+    assert not compiled({"userId": "random@random.com"})
+    assert not compiled({"userId": ["random@random.com"]})
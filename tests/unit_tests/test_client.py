@@ -1,14 +1,19 @@
+import os
 import time
 import json
+import pickle
 import pytest
 import responses
 from UnleashClient import UnleashClient
 from UnleashClient.strategies import Strategy
 from tests.utilities.testing_constants import URL, ENVIRONMENT, APP_NAME, INSTANCE_ID, REFRESH_INTERVAL, \
-    METRICS_INTERVAL, DISABLE_METRICS, DISABLE_REGISTRATION, CUSTOM_HEADERS, CUSTOM_OPTIONS
+    METRICS_INTERVAL, DISABLE_METRICS, DISABLE_REGISTRATION, CUSTOM_HEADERS, CUSTOM_OPTIONS, CAS_NAME, REDIS_HOST, \
+    REDIS_PORT, REDIS_DB
 from tests.utilities.mocks.mock_features import MOCK_FEATURE_RESPONSE
 from tests.utilities.mocks.mock_all_features import MOCK_ALL_FEATURES
+from tests.utilities.mocks.mock_redis import MockRedis
 from UnleashClient.constants import REGISTER_URL, FEATURES_URL, METRICS_URL
+from UnleashClient.loader import store_provisioning
 
 
 class EnvironmentStrategy(Strategy):
@@ -74,6 +79,7 @@ def test_UC_initialize_default():
     assert client.unleash_url == URL
     assert client.unleash_app_name == APP_NAME
     assert client.unleash_metrics_interval == 60
+    assert client.unleash_disable_metrics
 
 
 def test_UC_initialize_full():
@@ -333,3 +339,183 @@ def test_uc_server_error_recovery(unleash_client):
     responses.add(responses.GET, URL + FEATURES_URL, json=MOCK_FEATURE_RESPONSE, status=200)
     time.sleep(20)
     assert unleash_client.is_enabled("testFlag")
+
+
+@pytest.fixture()
+def unleash_client_redis():
+    unleash_client = UnleashClient(URL, APP_NAME, ENVIRONMENT, CAS_NAME, REDIS_HOST, REDIS_PORT, REDIS_DB,
+                                   refresh_interval=1)
+    unleash_client.cache = MockRedis({FEATURES_URL: pickle.dumps(MOCK_FEATURE_RESPONSE)})
+    yield unleash_client
+    unleash_client.destroy()
+
+
+def test_uc_background_refresh(unleash_client_redis):
+    unleash_client = unleash_client_redis
+    unleash_client.initialize_client()
+    assert unleash_client.is_enabled("testFlag")
+    assert "Default" not in unleash_client.features
+
+    initial_features = unleash_client.features
+    with pytest.raises(TypeError):
+        initial_features["Default"] = initial_features["testFlag"]
+
+    # Simulate provisioning change
+    unleash_client.cache.set(FEATURES_URL, pickle.dumps(MOCK_ALL_FEATURES))
+    time.sleep(2)
+    assert unleash_client.is_enabled("Default")
+    assert "testFlag" not in unleash_client.features
+    assert "testFlag" in initial_features
+
+
+def test_uc_refresh_keeps_features_on_error(unleash_client_redis, mocker):
+    unleash_client = unleash_client_redis
+    unleash_client.initialize_client()
+    mocker.patch.object(unleash_client.cache, "get", side_effect=ConnectionError("Redis is down"))
+
+    unleash_client._refresh_features()
+    assert unleash_client.is_enabled("testFlag")
+
+
+def test_uc_push_update(unleash_client_redis):
+    unleash_client = unleash_client_redis
+    unleash_client.initialize_client()
+
+    unleash_client._on_features_subscribe()
+    assert unleash_client.fl_job.trigger.interval.total_seconds() == unleash_client.unleash_push_refresh_interval
+
+    version = store_provisioning(unleash_client.cache, MOCK_ALL_FEATURES)
+    unleash_client._on_features_update(version)
+    assert unleash_client.features_version == version
+    assert unleash_client.is_enabled("Default")
+
+    unleash_client._on_features_unsubscribe()
+    assert unleash_client.fl_job.trigger.interval.total_seconds() == 1
+
+
+def test_uc_starts_from_disk_snapshot(tmp_path, mocker):
+    cache = MockRedis()
+    store_provisioning(cache, MOCK_ALL_FEATURES)
+    first_client = UnleashClient(URL, APP_NAME, ENVIRONMENT, CAS_NAME, REDIS_HOST, REDIS_PORT, REDIS_DB,
+                                 cache_directory=str(tmp_path))
+    first_client.cache = cache
+    first_client.initialize_client()
+    first_client.destroy()
+
+    # Redis is down when the next client starts
+    unleash_client = UnleashClient(URL, APP_NAME, ENVIRONMENT, CAS_NAME, REDIS_HOST, REDIS_PORT, REDIS_DB,
+                                   cache_directory=str(tmp_path))
+    unleash_client.cache = MockRedis()
+    mocker.patch.object(unleash_client.cache, "get", side_effect=ConnectionError("Redis is down"))
+    unleash_client.initialize_client()
+
+    assert unleash_client.is_enabled("Default")
+    assert unleash_client.features_version == first_client.features_version
+    unleash_client.destroy()
+
+
+def test_uc_shared_snapshot(tmp_path, mocker):
+    cache = MockRedis()
+    version = store_provisioning(cache, MOCK_ALL_FEATURES)
+    writer = UnleashClient(URL, APP_NAME, ENVIRONMENT, CAS_NAME, REDIS_HOST, REDIS_PORT, REDIS_DB,
+                           cache_directory=str(tmp_path), shared_snapshot=True)
+    writer.cache = cache
+    writer.initialize_client()
+
+    reader = UnleashClient(URL, APP_NAME, ENVIRONMENT, CAS_NAME, REDIS_HOST, REDIS_PORT, REDIS_DB,
+                           cache_directory=str(tmp_path), shared_snapshot=True)
+    reader.cache = MockRedis()
+    mocker.patch.object(reader.cache, "get", side_effect=ConnectionError("Only the writer reads Redis"))
+    reader.initialize_client()
+    assert reader.features_version == version
+
+    new_version = store_provisioning(cache, MOCK_FEATURE_RESPONSE)
+    writer._refresh_features()
+    reader._refresh_features()
+    assert reader.features_version == new_version
+    assert reader.is_enabled("testFlag")
+    reader.cache.get.assert_not_called()
+
+    # Updates are pushed before the writer saves them, the reader keeps polling the snapshot
+    reader._on_features_subscribe()
+    assert reader.fl_job.trigger.interval.total_seconds() == reader.unleash_refresh_interval
+
+    # The reader takes over once the writer is gone
+    writer.destroy()
+    reader._refresh_features()
+    assert reader._snapshot_writer_lock is not None
+    reader.destroy()
+
+
+@pytest.mark.skipif(not hasattr(os, "register_at_fork"), reason="Needs os.fork and os.register_at_fork")
+def test_uc_restarts_after_fork(tmp_path):
+    cache = MockRedis()
+    store_provisioning(cache, MOCK_ALL_FEATURES)
+    unleash_client = UnleashClient(URL, APP_NAME, ENVIRONMENT, CAS_NAME, REDIS_HOST, REDIS_PORT, REDIS_DB,
+                                   cache_directory=str(tmp_path), shared_snapshot=True)
+    unleash_client.cache = cache
+    unleash_client.initialize_client()
+    parent_scheduler = unleash_client.scheduler
+    assert unleash_client._snapshot_writer_lock is not None
+
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            # The parent keeps the snapshot lock, the child refreshes as a reader with threads of its own
+            time.sleep(0.5)
+            if unleash_client.scheduler is not parent_scheduler and unleash_client.scheduler.running \
+                    and unleash_client._snapshot_writer_lock is None and unleash_client.is_enabled("Default"):
+                status = 0
+        finally:
+            os._exit(status)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    assert unleash_client.scheduler is parent_scheduler
+    assert unleash_client._snapshot_writer_lock is not None
+    unleash_client.destroy()
+
+
+def test_uc_is_enabled_many(unleash_client_redis):
+    unleash_client = unleash_client_redis
+    unleash_client.initialize_client()
+    context = {'userId': '2'}
+
+    results = unleash_client.is_enabled_many(["testFlag", "testVariations", "notFoundTestFlag"], context,
+                                             fallback_function=lambda x, y: True)
+    assert results == {"testFlag": True, "testVariations": True, "notFoundTestFlag": True}
+    assert context == {'userId': '2'}
+
+    assert set(unleash_client.is_enabled_many(context=context).keys()) == set(unleash_client.features.keys())
+
+
+def test_uc_get_variants_many(unleash_client_redis):
+    unleash_client = unleash_client_redis
+    unleash_client.initialize_client()
+
+    variants = unleash_client.get_variants_many(["testVariations", "testFlag", "notFoundTestFlag"], {'userId': '2'})
+    assert variants["testVariations"]['name'] == 'VarA'
+    assert variants["testVariations"]['enabled']
+    assert variants["testFlag"]['name'] == 'disabled'
+    assert variants["notFoundTestFlag"]['name'] == 'disabled'
+
+
+def test_uc_not_initialized_many(unleash_client_redis):
+    unleash_client = unleash_client_redis
+    assert unleash_client.is_enabled_many(["testFlag"]) == {"testFlag": False}
+    assert unleash_client.get_variants_many(["testFlag"])["testFlag"]['name'] == 'disabled'
+
+
+def test_uc_context_not_modified(unleash_client_redis):
+    unleash_client = unleash_client_redis
+    unleash_client.initialize_client()
+    context = {'userId': '2'}
+
+    assert unleash_client.is_enabled("testVariations", context)
+    assert unleash_client.get_variant("testVariations", context)['name'] == 'VarA'
+    assert context == {'userId': '2'}
+
+    request_context = unleash_client.create_context(context)
+    assert request_context["appName"] == APP_NAME
+    assert unleash_client.is_enabled("testVariations", request_context)
@@ -73,3 +73,22 @@ def test_constraint_NOTIN_not_match(constraint_NOTIN):
     }
 
     assert constraint.apply(context)
+
+
+def test_constraint_compiled_matches_apply(constraint_IN, constraint_NOTIN):
+    contexts = [{'appName': 'test'}, {'appName': 'test3'}, {}, {'properties': {'appName': 'test2'}}, {'appName': ['test']}]
+
+    for constraint in [constraint_IN, constraint_NOTIN]:
+        compiled = constraint.compile()
+        for context in contexts:
+            assert compiled(context) == constraint.apply(context)
+
+
+def test_constraint_compiled_unknown_operator():
+    constraint = Constraint({"contextName": "appName", "operator": "STR_CONTAINS", "values": ["test"]})
+    assert not constraint.compile()({'appName': 'test'})
+
+
+def test_constraint_compiled_unhashable_value(constraint_NOTIN):
+    # Not in the values, like the list scan of apply() says
+    assert constraint_NOTIN.compile()({'appName': ['test']})
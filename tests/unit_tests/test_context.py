@@ -0,0 +1,79 @@
+import pytest
+from UnleashClient import utils
+from UnleashClient.context import Context
+from UnleashClient.utils import get_identifier
+from UnleashClient.strategies import GradualRolloutUserId, UserWithId
+
+STATIC_CONTEXT = {"appName": "pytest", "environment": "haptik|unit"}
+
+
+@pytest.fixture()
+def context():
+    yield Context({"userId": "2", "appName": "other", "properties": {"country": "norway"}}, STATIC_CONTEXT)
+
+
+def test_context_layering(context):
+    assert context["appName"] == "pytest"
+    assert context["userId"] == "2"
+    assert "environment" in context.keys()
+    assert "country" not in context
+    assert set(context) == {"appName", "environment", "userId", "properties"}
+    assert len(context) == 4
+
+
+def test_context_resolve(context):
+    assert context.resolve("appName") == "pytest"
+    assert context.resolve("country") == "norway"
+    assert context.resolve("missing") is None
+    assert get_identifier("country", context) == get_identifier("country", {"properties": {"country": "norway"}})
+
+
+def test_context_immutable(context):
+    with pytest.raises(TypeError):
+        context["userId"] = "3"
+
+
+def test_context_does_not_copy_or_modify_fields():
+    fields = {"userId": "2"}
+    context = Context(fields, STATIC_CONTEXT)
+    assert context.fields is fields
+    assert fields == {"userId": "2"}
+
+
+def test_context_create(context):
+    assert Context.create(context, STATIC_CONTEXT) is context
+
+    other_static = {"appName": "other-app"}
+    recreated = Context.create(context, other_static)
+    assert recreated["appName"] == "other-app"
+    assert recreated["userId"] == "2"
+    assert Context.create(None, STATIC_CONTEXT)["environment"] == "haptik|unit"
+
+
+def test_context_strategy(context):
+    strategy = UserWithId(parameters={"userIds": "1,2"})
+    assert strategy.execute(context)
+    assert strategy.compile()(context)
+
+
+def test_context_hash_memo(context, mocker):
+    hash_spy = mocker.spy(utils, "_lru_normalized_hash")
+    strategy = GradualRolloutUserId(parameters={"percentage": 50, "groupId": "test"})
+    compiled = strategy.compile()
+
+    result = compiled(context)
+    assert compiled(context) == result
+    assert strategy.execute(context) == result
+    assert hash_spy.call_count == 1
+    assert context.hashes == {("2", "test", 100): utils.normalized_hash("2", "test")}
+
+
+def test_cached_normalized_hash():
+    assert utils.cached_normalized_hash("2", "test") == utils.normalized_hash("2", "test")
+    assert utils.cached_normalized_hash(["unhashable"], "test") == utils.normalized_hash(["unhashable"], "test")
+
+
+def test_cached_normalized_hash_equal_identifiers():
+    # Equal as keys, but formatted (and so hashed) differently
+    for identifier in [1, 1.0, True]:
+        assert utils.cached_normalized_hash(identifier, "test", 1000) == utils.normalized_hash(identifier, "test", 1000)
@@ -1,3 +1,4 @@
+from collections.abc import Mapping
 import pytest
 from UnleashClient.features import Feature
 from UnleashClient.strategies import RemoteAddress, UserWithId, Default
@@ -64,11 +65,43 @@ def test_create_feature_exception(test_feature):
 
 def test_select_variation_novariation(test_feature):
     selected_variant = test_feature.get_variant()
-    assert type(selected_variant) == dict
+    assert isinstance(selected_variant, Mapping)
     assert selected_variant['name'] == 'disabled'
 
+    with pytest.raises(TypeError):
+        selected_variant['enabled'] = True
+
 
 def test_select_variation_variation(test_feature_variants):
     selected_variant = test_feature_variants.get_variant({'userId': '2'})
     assert selected_variant['enabled']
     assert selected_variant['name'] == 'VarB'
+
+
+def test_variant_stats(test_feature, test_feature_variants):
+    variant = test_feature_variants.get_variant({'userId': '2'})
+    test_feature_variants.get_variant({'userId': '2'})
+    test_feature.get_variant()
+
+    assert test_feature_variants.collect_stats() == (2, 0, {variant['name']: 2})
+    assert test_feature_variants.collect_stats() == (0, 0, {})
+    assert test_feature.collect_stats() == (0, 1, {'disabled': 1})
+
+
+def test_feature_compiled_short_circuit(mocker):
+    first = Default()
+    second = UserWithId(parameters={"userIds": EMAIL_LIST})
+    second_spy = mocker.patch.object(second, "compile", return_value=mocker.Mock(return_value=False))
+    my_feature = Feature("My Feature", True, [first, second])
+
+    assert second_spy.call_count == 1
+    assert my_feature.is_enabled({})
+    assert second_spy.return_value.call_count == 0
+
+
+def test_feature_recompile(test_feature):
+    my_feature = test_feature
+    my_feature.strategies = [Default()]
+    my_feature.compile()
+
+    assert my_feature.is_enabled({})
@@ -0,0 +1,84 @@
+import logging
+import threading
+from collections import Counter
+from UnleashClient.instrumentation import LookupStats, ShardedCounter
+
+
+def test_lookup_stats_counts():
+    stats = LookupStats()
+    stats.record("is_enabled", "%s", "a")
+    stats.record("is_enabled", "%s", "b")
+    stats.record("is_enabled_for_domain", "%s", "c")
+
+    assert stats.snapshot() == {"is_enabled": 2, "is_enabled_for_domain": 1}
+    stats.reset()
+    assert stats.snapshot() == {}
+
+
+def test_lookup_stats_sampling(caplog):
+    stats = LookupStats(debug_sample_rate=10)
+
+    with caplog.at_level(logging.DEBUG, logger="mogambo"):
+        for x in range(30):
+            stats.record("is_enabled", "Lookup %s", x)
+
+    assert [record.getMessage() for record in caplog.records] == ["Lookup 0", "Lookup 10", "Lookup 20"]
+
+
+def test_lookup_stats_sampling_disabled(caplog):
+    stats = LookupStats()
+
+    with caplog.at_level(logging.DEBUG, logger="mogambo"):
+        stats.record("is_enabled", "Lookup %s", 1)
+
+    assert not caplog.records
+
+
+def test_sharded_counter_collect():
+    counter = ShardedCounter()
+    counter.increment("yes")
+    counter.increment("yes")
+    counter.increment("no", 3)
+
+    assert counter.pending("yes") == 2
+    assert counter.collect() == {"yes": 2, "no": 3}
+    assert counter.collect() == {}
+
+    counter.increment("yes")
+    assert counter.collect() == {"yes": 1}
+
+
+def test_sharded_counter_set_pending():
+    counter = ShardedCounter()
+    counter.increment("yes")
+    counter.set_pending("yes", 5)
+
+    assert counter.pending("yes") == 5
+    counter.reset()
+    assert counter.pending("yes") == 0
+
+
+def test_sharded_counter_threads():
+    counter = ShardedCounter()
+    collected = Counter()
+    start = threading.Barrier(9)
+
+    def increment():
+        start.wait()
+        for _ in range(10000):
+            counter.increment("yes")
+
+    threads = [threading.Thread(target=increment) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    # Collect while the threads are counting: every increment is reported exactly once
+    while any(thread.is_alive() for thread in threads):
+        collected.update(counter.collect())
+    for thread in threads:
+        thread.join()
+    collected.update(counter.collect())
+
+    assert collected["yes"] == 80000
+    # Shards of exited threads are dropped once collected
+    assert not counter._shards
@@ -1,24 +1,27 @@
 import copy
-from UnleashClient.loader import load_features
-from UnleashClient.features import Feature
+from UnleashClient import loader
+import pickle
+import pytest
+from UnleashClient.loader import build_features, load_feature_snapshot, store_provisioning
+from UnleashClient.features import Feature, materialised_features
+from UnleashClient.periodic_tasks import collect_feature_stats
 from UnleashClient.strategies import GradualRolloutUserId, FlexibleRollout, UserWithId
 from UnleashClient.variants import Variants
-from UnleashClient.constants import FEATURES_URL
-from tests.utilities.mocks import MOCK_ALL_FEATURES
+from UnleashClient.constants import FEATURES_URL, FEATURES_VERSION_KEY
+from tests.utilities.mocks import MOCK_ALL_FEATURES, MOCK_CUSTOM_STRATEGY, MockRedis
 from tests.utilities.testing_constants import DEFAULT_STRATEGY_MAPPING
-from tests.utilities.decorators import cache_full, cache_custom  # noqa: F401
 
 MOCK_UPDATED = copy.deepcopy(MOCK_ALL_FEATURES)
 MOCK_UPDATED["features"][4]["strategies"][0]["parameters"]["percentage"] = 60
 
 
-def test_loader_initialization(cache_full):  # noqa: F811
+def test_loader_initialization():
     # Set up variables
-    in_memory_features = {}
-    temp_cache = cache_full
+    temp_cache = MockRedis()
+    store_provisioning(temp_cache, MOCK_ALL_FEATURES)
 
     # Tests
-    load_features(temp_cache, in_memory_features, DEFAULT_STRATEGY_MAPPING)
+    in_memory_features, _ = load_feature_snapshot(temp_cache, DEFAULT_STRATEGY_MAPPING)
     assert isinstance(in_memory_features["GradualRolloutUserID"], Feature)
     assert isinstance(in_memory_features["GradualRolloutUserID"].strategies[0], GradualRolloutUserId)
 
@@ -38,27 +41,94 @@ def test_loader_initialization(cache_full):  # noqa: F811
             assert strategy.variants
 
 
-def test_loader_refresh(cache_full):  # noqa: F811
-    # Set up variables
-    in_memory_features = {}
-    temp_cache = cache_full
+def test_loader_initialization_custom_strategy():
+    temp_cache = MockRedis()
+    store_provisioning(temp_cache, MOCK_CUSTOM_STRATEGY)
 
-    load_features(temp_cache, in_memory_features, DEFAULT_STRATEGY_MAPPING)
+    in_memory_features, _ = load_feature_snapshot(temp_cache, DEFAULT_STRATEGY_MAPPING)
+    assert isinstance(in_memory_features["UserWithId"], Feature)
 
-    # Simulate update mutation
-    temp_cache[FEATURES_URL] = MOCK_UPDATED
-    temp_cache.sync()
 
-    load_features(temp_cache, in_memory_features, DEFAULT_STRATEGY_MAPPING)
+def test_load_feature_snapshot_versioned():
+    cache = MockRedis()
+    version = store_provisioning(cache, MOCK_ALL_FEATURES)
+    assert cache.get(FEATURES_VERSION_KEY) == version
 
-    assert in_memory_features["GradualRolloutUserID"].strategies[0].parameters["percentage"] == 60
+    features, loaded_version = load_feature_snapshot(cache, DEFAULT_STRATEGY_MAPPING)
+    assert loaded_version == version
+    assert isinstance(features["GradualRolloutUserID"], Feature)
 
+    # Unchanged provisioning isn't downloaded again.
+    cache.calls = []
+    assert load_feature_snapshot(cache, DEFAULT_STRATEGY_MAPPING, features, version) is None
+    assert ('get', FEATURES_URL) not in cache.calls
 
-def test_loader_initialization_failure(cache_custom):  # noqa: F811
-    # Set up variables
-    in_memory_features = {}
-    temp_cache = cache_custom
+    new_version = store_provisioning(cache, MOCK_UPDATED)
+    features, loaded_version = load_feature_snapshot(cache, DEFAULT_STRATEGY_MAPPING, features, version)
+    assert loaded_version == new_version != version
+    assert features["GradualRolloutUserID"].strategies[0].parameters["percentage"] == 60
 
-    # Tests
-    load_features(temp_cache, in_memory_features, DEFAULT_STRATEGY_MAPPING)
-    assert isinstance(in_memory_features["UserWithId"], Feature)
+
+def test_load_feature_snapshot_unversioned():
+    cache = MockRedis({FEATURES_URL: pickle.dumps(MOCK_ALL_FEATURES["features"])})
+
+    features, version = load_feature_snapshot(cache, DEFAULT_STRATEGY_MAPPING)
+    assert "Default" in features
+    assert load_feature_snapshot(cache, DEFAULT_STRATEGY_MAPPING, features, version) is None
+
+
+def test_load_feature_snapshot_zlib_json():
+    cache = MockRedis()
+    version = store_provisioning(cache, MOCK_ALL_FEATURES, codec="zlib-json")
+    assert cache.get(FEATURES_URL)[:1] == b"\x01"
+
+    features, loaded_version = load_feature_snapshot(cache, DEFAULT_STRATEGY_MAPPING)
+    assert loaded_version == version
+    assert isinstance(features["GradualRolloutUserID"], Feature)
+
+
+def test_load_feature_snapshot_refuses_pickle():
+    cache = MockRedis({FEATURES_URL: pickle.dumps(MOCK_ALL_FEATURES["features"])})
+
+    with pytest.raises(ValueError):
+        load_feature_snapshot(cache, DEFAULT_STRATEGY_MAPPING, allow_pickle=False)
+
+
+def test_load_feature_snapshot_empty_cache():
+    assert load_feature_snapshot(MockRedis(), DEFAULT_STRATEGY_MAPPING) is None
+
+
+def test_build_features_lazily(mocker):
+    create_feature = mocker.spy(loader, "_create_feature")
+    features = build_features(MOCK_ALL_FEATURES["features"], DEFAULT_STRATEGY_MAPPING)
+
+    assert "Default" in features
+    assert len(features) == len(MOCK_ALL_FEATURES["features"])
+    assert create_feature.call_count == 0
+
+    assert features["Default"] is features["Default"]
+    assert create_feature.call_count == 1
+    assert list(materialised_features(features)) == ["Default"]
+
+    features["Default"].yes_count = 3
+    new_features = build_features(MOCK_ALL_FEATURES["features"], DEFAULT_STRATEGY_MAPPING, features)
+    assert new_features["Default"].yes_count == 3
+    assert new_features["GradualRolloutUserID"].yes_count == 0
+
+
+def test_build_features_keeps_stats_of_features_not_rebuilt():
+    features = build_features(MOCK_ALL_FEATURES["features"], DEFAULT_STRATEGY_MAPPING)
+    features["Default"].increment_stats(True)
+    features["GradualRolloutUserID"].increment_stats(False)
+
+    # GradualRolloutUserID was deleted and Default isn't looked up again before metrics are sent
+    provisioning = [feature for feature in MOCK_ALL_FEATURES["features"] if feature["name"] != "GradualRolloutUserID"]
+    new_features = build_features(provisioning, DEFAULT_STRATEGY_MAPPING, features)
+    newer_features = build_features(provisioning, DEFAULT_STRATEGY_MAPPING, new_features)
+    assert collect_feature_stats(newer_features) == {
+        "Default": {"yes": 1, "no": 0},
+        "GradualRolloutUserID": {"yes": 0, "no": 1}
+    }
+
+    # Dropped once collected
+    assert materialised_features(build_features(provisioning, DEFAULT_STRATEGY_MAPPING, newer_features)) == {}
@@ -0,0 +1,213 @@
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+import pytest
+from redis.exceptions import ConnectionError
+from tests.utilities.metrics_server import MetricsServer
+from tests.utilities.mocks.mock_redis import MockRedis
+from tests.utilities.testing_constants import APP_NAME, INSTANCE_ID, CUSTOM_HEADERS
+from UnleashClient.constants import METRICS_URL, METRICS_BUCKET_KEY, METRICS_LEADER_KEY, METRICS_SENT_KEY
+from UnleashClient.features import Feature
+from UnleashClient.metrics_flusher import MetricsBucket, MetricsFlusher, RedisMetricsFlusher, coalesce_buckets
+from UnleashClient.strategies import Default
+from UnleashClient.variants import Variants
+from tests.utilities.mocks.mock_variants import VARIANTS
+
+
+@pytest.fixture()
+def features():
+    yield {"Default": Feature("Default", True, [Default()]), "Disabled": Feature("Disabled", False, [Default()])}
+
+
+def _flusher(url, features, **kwargs):
+    return MetricsFlusher(url, APP_NAME, INSTANCE_ID, CUSTOM_HEADERS, {}, lambda: features, **kwargs)
+
+
+def test_coalesce_buckets():
+    start = datetime.now(timezone.utc)
+    buckets = [
+        MetricsBucket(start, start + timedelta(seconds=60), {"a": {"yes": 1, "no": 2}}),
+        MetricsBucket(start + timedelta(seconds=60), start + timedelta(seconds=120), {"a": {"yes": 3}, "b": {"no": 1}})
+    ]
+
+    assert coalesce_buckets(buckets) == MetricsBucket(start, start + timedelta(seconds=120),
+                                                      {"a": {"yes": 4, "no": 2}, "b": {"no": 1}})
+
+
+def test_coalesce_buckets_variants():
+    start = datetime.now(timezone.utc)
+    buckets = [
+        MetricsBucket(start, start, {"a": {"yes": 1, "no": 0, "variants": {"blue": 1}}}),
+        MetricsBucket(start, start, {"a": {"yes": 2, "no": 0, "variants": {"blue": 1, "red": 1}}})
+    ]
+
+    assert coalesce_buckets(buckets).toggles == {"a": {"yes": 3, "no": 0, "variants": {"blue": 2, "red": 1}}}
+
+
+def test_flush_sends_gzipped_bucket(features):
+    features["Default"].is_enabled({})
+    features["Default"].is_enabled({})
+    features["Disabled"].is_enabled({})
+
+    with MetricsServer() as server:
+        assert _flusher(server.url, features).flush()
+
+    assert len(server.requests) == 1
+    request = server.requests[0]
+    assert request["path"] == METRICS_URL
+    assert request["headers"]["Content-Encoding"] == "gzip"
+    assert request["body"]["appName"] == APP_NAME
+    assert request["body"]["bucket"]["toggles"] == {"Default": {"yes": 2, "no": 0}, "Disabled": {"yes": 0, "no": 1}}
+    assert features["Default"].yes_count == 0
+
+
+def test_flush_nothing_evaluated(features):
+    with MetricsServer() as server:
+        assert _flusher(server.url, features).flush()
+
+    assert not server.requests
+
+
+def test_flush_retries_with_backoff(features):
+    with MetricsServer(statuses=[500]) as server:
+        flusher = _flusher(server.url, features, interval=60)
+
+        features["Default"].is_enabled({})
+        assert not flusher.flush()
+        assert flusher.failures == 1
+
+        # Waiting to retry: the next bucket is only queued
+        features["Default"].is_enabled({})
+        assert not flusher.flush()
+        assert len(server.requests) == 1
+        assert len(flusher.queue) == 2
+
+        # Both buckets are sent as one
+        assert flusher.flush(force=True)
+        assert flusher.failures == 0
+        assert not flusher.queue
+
+    assert len(server.requests) == 2
+    assert server.requests[1]["body"]["bucket"]["toggles"] == {"Default": {"yes": 2, "no": 0}}
+
+
+def test_queue_is_bounded(features):
+    flusher = _flusher("http://127.0.0.1:1", features, queue_size=2)
+
+    for count in range(1, 4):
+        features["Default"].yes_count = count
+        flusher.collect()
+
+    assert [bucket.toggles["Default"]["yes"] for bucket in flusher.queue] == [2, 3]
+
+
+def test_stop_sends_remaining_metrics(features):
+    with MetricsServer() as server:
+        flusher = _flusher(server.url, features, interval=60)
+        flusher.start()
+        features["Default"].is_enabled({})
+        flusher.stop()
+        flusher.join(5)
+
+    assert not flusher.is_alive()
+    assert server.requests[0]["body"]["bucket"]["toggles"] == {"Default": {"yes": 1, "no": 0}}
+
+
+def test_evaluations_do_not_wait_for_flush(features):
+    with MetricsServer(delay=1) as server:
+        features["Default"].is_enabled({})
+        flusher = _flusher(server.url, features)
+        sender = threading.Thread(target=flusher.flush)
+        sender.start()
+
+        while not server.requests:
+            time.sleep(0.01)
+        # The server is holding the request
+        start = time.monotonic()
+        for _ in range(10000):
+            features["Default"].is_enabled({})
+        elapsed = time.monotonic() - start
+        sender.join()
+
+    assert elapsed < 0.5
+    assert features["Default"].yes_count == 10000
+
+
+def _redis_flusher(cache, url, features, **kwargs):
+    return RedisMetricsFlusher(cache, url, APP_NAME, INSTANCE_ID, CUSTOM_HEADERS, {}, lambda: features, **kwargs)
+
+
+def test_redis_flusher_aggregates_processes(mocker):
+    cache = MockRedis()
+    time_mock = mocker.patch("UnleashClient.metrics_flusher.time.time", return_value=6000.0)
+    processes = [{"Default": Feature("Default", True, [Default()])} for _ in range(3)]
+
+    with MetricsServer() as server:
+        flushers = [_redis_flusher(cache, server.url, features, interval=60, grace=10) for features in processes]
+
+        for features in processes:
+            features["Default"].is_enabled({})
+            features["Default"].is_enabled({})
+        for flusher in flushers:
+            assert flusher.flush()
+
+        # One leader, nothing sent while the bucket is open
+        assert [flusher.is_leader for flusher in flushers] == [True, False, False]
+        assert cache.data[METRICS_BUCKET_KEY.format(APP_NAME, 6000)] == {'["Default","yes"]': 6}
+        assert not server.requests
+
+        time_mock.return_value = 6075.0
+        for flusher in flushers:
+            assert flusher.flush()
+
+    assert len(server.requests) == 1
+    assert server.requests[0]["body"]["bucket"]["toggles"] == {"Default": {"yes": 6, "no": 0}}
+    assert server.requests[0]["body"]["bucket"]["start"] == datetime.fromtimestamp(6000, timezone.utc).isoformat()
+    assert METRICS_BUCKET_KEY.format(APP_NAME, 6000) not in cache.data
+    assert cache.data[METRICS_SENT_KEY.format(APP_NAME)] == 6000
+
+
+def test_redis_flusher_aggregates_variants(mocker):
+    cache = MockRedis()
+    time_mock = mocker.patch("UnleashClient.metrics_flusher.time.time", return_value=6000.0)
+    features = {"Variants": Feature("Variants", True, [Default()], Variants(VARIANTS, "Variants"))}
+    variant = features["Variants"].get_variant({"userId": "2"})
+
+    with MetricsServer() as server:
+        flusher = _redis_flusher(cache, server.url, features)
+        flusher.flush()
+        time_mock.return_value = 6075.0
+        flusher.flush()
+
+    assert server.requests[0]["body"]["bucket"]["toggles"] == {
+        "Variants": {"yes": 1, "no": 0, "variants": {variant["name"]: 1}}
+    }
+
+
+def test_redis_flusher_leader_takeover(mocker, features):
+    cache = MockRedis()
+    mocker.patch("UnleashClient.metrics_flusher.time.time", return_value=6000.0)
+    leader = _redis_flusher(cache, "http://127.0.0.1:1", features)
+    follower = _redis_flusher(cache, "http://127.0.0.1:1", features)
+
+    leader.collect()
+    follower.collect()
+    assert leader.is_leader and not follower.is_leader
+
+    # The lock expired and the follower took over
+    del cache.data[METRICS_LEADER_KEY.format(APP_NAME)]
+    follower.collect()
+    leader.collect()
+    assert follower.is_leader and not leader.is_leader
+
+
+def test_redis_flusher_falls_back_to_sending(mocker, features):
+    cache = MockRedis()
+    mocker.patch.object(cache, "pipeline", side_effect=ConnectionError("Redis is down"))
+    mocker.patch.object(cache, "lock", side_effect=ConnectionError("Redis is down"))
+    features["Default"].is_enabled({})
+
+    with MetricsServer() as server:
+        assert _redis_flusher(cache, server.url, features).flush()
+
+    assert server.requests[0]["body"]["bucket"]["toggles"] == {"Default": {"yes": 1, "no": 0}}
@@ -0,0 +1,50 @@
+import pickle
+import pytest
+from UnleashClient import serialization
+from tests.utilities.mocks import MOCK_ALL_FEATURES
+
+
+@pytest.mark.parametrize("codec", ["pickle", "zlib-json"])
+def test_codec_round_trip(codec):
+    raw = serialization.encode(MOCK_ALL_FEATURES, codec)
+
+    assert raw[:1] == serialization.get_codec(codec).header
+    assert serialization.decode(raw) == MOCK_ALL_FEATURES
+
+
+def test_msgpack_round_trip():
+    pytest.importorskip("msgpack")
+    raw = serialization.encode(MOCK_ALL_FEATURES, "msgpack")
+
+    assert raw[:1] == b"\x02"
+    assert serialization.decode(raw) == MOCK_ALL_FEATURES
+
+
+def test_decode_legacy_pickle():
+    for protocol in range(2, pickle.HIGHEST_PROTOCOL + 1):
+        assert serialization.decode(pickle.dumps(MOCK_ALL_FEATURES, protocol=protocol)) == MOCK_ALL_FEATURES
+
+
+def test_decode_refuses_pickle():
+    with pytest.raises(ValueError):
+        serialization.decode(pickle.dumps(MOCK_ALL_FEATURES), allow_pickle=False)
+
+    raw = serialization.encode(MOCK_ALL_FEATURES, "zlib-json")
+    assert serialization.decode(raw, allow_pickle=False) == MOCK_ALL_FEATURES
+
+
+def test_codec_is_abstract():
+    with pytest.raises(TypeError):
+        serialization.Codec()
+
+
+def test_zlib_json_is_smaller_than_pickle():
+    assert len(serialization.encode(MOCK_ALL_FEATURES, "zlib-json")) < len(serialization.encode(MOCK_ALL_FEATURES, "pickle"))
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        serialization.get_codec("yaml")
+
+    with pytest.raises(ValueError):
+        serialization.decode(b"\x7fnot a codec")
@@ -0,0 +1,60 @@
+import os
+import pytest
+from UnleashClient.snapshot import FeatureSnapshot, read_snapshot_version, try_lock, write_snapshot
+from UnleashClient.loader import load_disk_snapshot, load_feature_snapshot, store_provisioning
+from UnleashClient.features import Feature
+from tests.utilities.mocks import MOCK_ALL_FEATURES, MockRedis
+from tests.utilities.testing_constants import DEFAULT_STRATEGY_MAPPING
+
+FEATURES = MOCK_ALL_FEATURES["features"]
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "features.snapshot")
+    write_snapshot(path, FEATURES[:1], "1")
+    write_snapshot(path, FEATURES, "2")
+
+    snapshot = FeatureSnapshot(path)
+    assert snapshot.version == read_snapshot_version(path) == "2"
+    assert list(snapshot) == [feature["name"] for feature in FEATURES]
+    assert snapshot.get(FEATURES[3]["name"]) == FEATURES[3]
+    assert snapshot.get("unknown") is None
+    assert snapshot.provisioning() == FEATURES
+    snapshot.close()
+
+    assert os.listdir(str(tmp_path)) == ["features.snapshot"]
+
+
+def test_snapshot_missing_or_invalid(tmp_path):
+    path = tmp_path / "features.snapshot"
+    assert read_snapshot_version(str(path)) is None
+    assert load_disk_snapshot(str(path), DEFAULT_STRATEGY_MAPPING) is None
+
+    path.write_bytes(b"not a snapshot")
+    with pytest.raises(ValueError):
+        FeatureSnapshot(str(path))
+    assert read_snapshot_version(str(path)) is None
+    assert load_disk_snapshot(str(path), DEFAULT_STRATEGY_MAPPING) is None
+
+
+def test_load_feature_snapshot_saves_to_disk(tmp_path):
+    path = str(tmp_path / "features.snapshot")
+    cache = MockRedis()
+    version = store_provisioning(cache, MOCK_ALL_FEATURES)
+
+    load_feature_snapshot(cache, DEFAULT_STRATEGY_MAPPING, snapshot_path=path)
+    features, disk_version = load_disk_snapshot(path, DEFAULT_STRATEGY_MAPPING)
+
+    assert disk_version == version
+    assert isinstance(features["GradualRolloutUserID"], Feature)
+    assert load_disk_snapshot(path, DEFAULT_STRATEGY_MAPPING, features, version) is None
+
+
+def test_try_lock(tmp_path):
+    path = str(tmp_path / "features.snapshot.lock")
+    lock = try_lock(path)
+
+    assert lock is not None
+    assert try_lock(path) is None
+    lock.close()
+    assert try_lock(path) is not None
@@ -0,0 +1,84 @@
+import threading
+from UnleashClient.constants import FEATURES_CHANNEL
+from UnleashClient.loader import store_provisioning
+from UnleashClient.subscriber import ProvisioningSubscriber
+from tests.utilities.mocks import MOCK_ALL_FEATURES, MockRedis
+
+
+class MockPubSub:
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.channels = []
+
+    def subscribe(self, channel):
+        self.channels.append(channel)
+
+    def get_message(self, timeout=0):
+        if not self.messages:
+            raise ConnectionError("Connection closed by server.")
+        return self.messages.pop(0)
+
+    def reset(self):
+        self.channels = []
+
+
+class PubSubRedis(MockRedis):
+    def __init__(self, messages):
+        super().__init__()
+        self.pubsubs = []
+        self.messages = messages
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        pubsub = MockPubSub(self.messages)
+        self.pubsubs.append(pubsub)
+        return pubsub
+
+
+def test_store_provisioning_publishes_version():
+    cache = MockRedis()
+    version = store_provisioning(cache, MOCK_ALL_FEATURES)
+
+    assert cache.published == [(FEATURES_CHANNEL, version)]
+
+
+def test_subscriber_callbacks():
+    events = []
+    done = threading.Event()
+    cache = PubSubRedis([None, {'type': 'message', 'channel': FEATURES_CHANNEL, 'data': b'abc'}])
+
+    def on_unsubscribe():
+        events.append('unsubscribe')
+        subscriber.stop()
+        done.set()
+
+    subscriber = ProvisioningSubscriber(cache,
+                                        on_update=lambda version: events.append(version),
+                                        on_subscribe=lambda: events.append('subscribe'),
+                                        on_unsubscribe=on_unsubscribe,
+                                        retry_interval=0.01)
+    subscriber.start()
+
+    assert done.wait(5)
+    subscriber.join(5)
+    assert events == ['subscribe', 'abc', 'unsubscribe']
+    assert cache.pubsubs[0].channels == []
+    assert not subscriber.is_alive()
+
+
+def test_subscriber_retries():
+    done = threading.Event()
+    subscribes = []
+
+    def on_subscribe():
+        subscribes.append(True)
+        if len(subscribes) == 2:
+            subscriber.stop()
+            done.set()
+
+    subscriber = ProvisioningSubscriber(PubSubRedis([]), on_update=lambda version: None,
+                                        on_subscribe=on_subscribe, retry_interval=0.01)
+    subscriber.start()
+
+    assert done.wait(5)
+    subscriber.join(5)
+    assert len(subscribes) == 2
@@ -1,4 +1,5 @@
 import pytest
+from UnleashClient import utils
 from UnleashClient.variants import Variants
 from tests.utilities.mocks.mock_variants import VARIANTS
 
@@ -70,3 +71,53 @@ def test_variation_novariants():
     variant = variations.get_variant({})
     assert variant
     assert variant['name'] == 'disabled'
+
+    # "variants": null in the provisioning
+    assert Variants(None, "TestFeature").get_variant({})['name'] == 'disabled'
+
+
+def test_variation_frozen(variations):
+    variant = variations.get_variant({'userId': '2'})
+
+    assert variant['enabled']
+    assert 'weight' not in variant and 'overrides' not in variant
+    assert variations.get_variant({'userId': '2'}) is variant
+    with pytest.raises(TypeError):
+        variant['enabled'] = False
+    with pytest.raises(TypeError):
+        variant['payload']['value'] = "Changed"
+
+
+def test_variation_bisect_matches_weights(variations):
+    # Same selection as walking the variants until their cumulative weight reaches the hash
+    for user_id in range(2, 200):  # userId 1 has an override
+        target = utils.normalized_hash(str(user_id), "TestFeature", 100)
+        counter = 0
+        for expected in VARIANTS:
+            counter += expected['weight']
+            if counter >= target:
+                break
+
+        assert variations.get_variant({'userId': str(user_id)})['name'] == expected['name']
+
+
+def test_variation_override_index():
+    variants = [
+        {"name": "VarA", "weight": 50, "overrides": [{"contextName": "userId", "values": ["1", "2"]}]},
+        {"name": "VarB", "weight": 50, "overrides": [
+            {"contextName": "sessionId", "values": ["s"]},
+            {"contextName": "userId", "values": ["2"]}
+        ]}
+    ]
+    variations = Variants(variants, "TestFeature")
+
+    assert variations._apply_overrides({'userId': '1'})['name'] == 'VarA'
+    # The last matching variant wins
+    assert variations._apply_overrides({'userId': '2'})['name'] == 'VarB'
+    assert variations._apply_overrides({'userId': '1', 'sessionId': 's'})['name'] == 'VarB'
+    assert variations._apply_overrides({'userId': ['unhashable']}) is None
+
+
+def test_variation_zero_weight():
+    variations = Variants([{"name": "VarA", "weight": 0}], "TestFeature")
+    assert variations.get_variant({'userId': '1'})['name'] == 'disabled'
@@ -0,0 +1,50 @@
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MetricsServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the Unleash metrics endpoint, recording the (decompressed) requests it receives.
+
+    Responds with the next status of statuses (202 once they run out), after waiting delay seconds.
+    """
+    daemon_threads = True
+
+    def __init__(self, statuses=(), delay: float = 0) -> None:
+        super().__init__(("127.0.0.1", 0), _MetricsHandler)
+        self.statuses = list(statuses)
+        self.delay = delay
+        self.requests = []
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        self.server.requests.append({"path": self.path, "headers": dict(self.headers), "body": json.loads(body)})
+
+        time.sleep(self.server.delay)
+        status = self.server.statuses.pop(0) if self.server.statuses else 202
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args) -> None:
+        pass
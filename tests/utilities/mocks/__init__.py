@@ -2,3 +2,4 @@ from .mock_metrics import MOCK_METRICS_REQUEST
 from .mock_all_features import MOCK_ALL_FEATURES
 from .mock_features import MOCK_FEATURE_RESPONSE
 from .mock_custom_strategy import MOCK_CUSTOM_STRATEGY
+from .mock_redis import MockRedis
@@ -0,0 +1,123 @@
+from redis.exceptions import LockError
+
+
+class MockPipeline:
+    """
+    Queues commands against a MockRedis and runs them on execute().
+    """
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.commands = []
+
+    def execute(self):
+        results = [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+        self.commands = []
+        return results
+
+
+class MockLock:
+    """
+    Non-expiring stand-in for redis.lock.Lock, held while its token is stored under its name.
+    """
+    def __init__(self, redis, name, timeout=None):
+        self.redis = redis
+        self.name = name
+        self.timeout = timeout
+        self.token = object()
+
+    def acquire(self, blocking=None):
+        if self.name in self.redis.data:
+            return False
+        self.redis.data[self.name] = self.token
+        return True
+
+    def extend(self, additional_time):
+        if self.redis.data.get(self.name) is not self.token:
+            raise LockError("Cannot extend a lock that's no longer owned")
+        return True
+
+    def release(self):
+        if self.redis.data.get(self.name) is not self.token:
+            raise LockError("Cannot release a lock that's no longer owned")
+        del self.redis.data[self.name]
+
+
+class MockRedis:
+    """
+    In-memory stand-in for the subset of redis.Redis used by the client.
+    """
+    def __init__(self, data: dict = None):
+        self.data = dict(data or {})
+        self.calls = []
+        self.published = []
+
+    def get(self, name):
+        self.calls.append(('get', name))
+        return self.data.get(name)
+
+    def set(self, name, value):
+        self.calls.append(('set', name))
+        self.data[name] = value
+        return True
+
+    def delete(self, *names):
+        for name in names:
+            self.data.pop(name, None)
+        return len(names)
+
+    def hset(self, name, key, value):
+        self.calls.append(('hset', name))
+        self.data.setdefault(name, {})[key] = value
+        return 1
+
+    def hgetall(self, name):
+        self.calls.append(('hgetall', name))
+        return dict(self.data.get(name, {}))
+
+    def hmget(self, name, keys):
+        self.calls.append(('hmget', name))
+        return [self.data.get(name, {}).get(key) for key in keys]
+
+    def hincrby(self, name, key, amount=1):
+        self.calls.append(('hincrby', name))
+        values = self.data.setdefault(name, {})
+        values[key] = values.get(key, 0) + amount
+        return values[key]
+
+    def sadd(self, name, *values):
+        self.calls.append(('sadd', name))
+        members = self.data.setdefault(name, set())
+        added = len(set(values) - members)
+        members.update(values)
+        return added
+
+    def smembers(self, name):
+        self.calls.append(('smembers', name))
+        return set(self.data.get(name, set()))
+
+    def expire(self, name, time):
+        self.calls.append(('expire', name))
+        return name in self.data
+
+    def lock(self, name, timeout=None):
+        return MockLock(self, name, timeout)
+
+    def publish(self, channel, message):
+        self.calls.append(('publish', channel))
+        self.published.append((channel, message))
+        return 0
+
+    def pipeline(self, transaction=True):
+        return MockPipeline(self)
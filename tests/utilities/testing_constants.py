@@ -11,6 +11,10 @@ DISABLE_METRICS = True
 DISABLE_REGISTRATION = True
 CUSTOM_HEADERS = {"name": "My random header."}
 CUSTOM_OPTIONS = {"verify": False}
+CAS_NAME = "haptik"
+REDIS_HOST = "localhost"
+REDIS_PORT = 6379
+REDIS_DB = 0
 
 # URLs
 URL = "http://localhost:4242/api"